@@ -0,0 +1,120 @@
+"""Token authentication with an in-process cache of token -> user lookups.
+
+A small set of tokens makes most API requests, so CachingTokenAuthentication
+keeps the user of recently seen tokens in a bounded LRU cache whose entries
+expire after BLOG_AUTH_CACHE_TIMEOUT seconds. A hit authenticates without
+any query.
+
+Entries are dropped when their token is deleted or their user is saved or
+deleted in this process (deactivation included). Other processes, and
+QuerySet.update() calls that send no signals, are only caught by the
+timeout, which therefore bounds how long a revoked token keeps working.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from blog import cache
+
+
+_tokens = OrderedDict()
+_user_keys = {}
+_tokens_lock = threading.Lock()
+
+
+def get_size():
+    return getattr(settings, "BLOG_AUTH_CACHE_SIZE", 1024)
+
+
+def get_timeout():
+    return getattr(settings, "BLOG_AUTH_CACHE_TIMEOUT", 60)
+
+
+def get_cached(key):
+    """Return the cached (user, token) of a token key, or None."""
+    with _tokens_lock:
+        entry = _tokens.get(key)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            del _tokens[key]
+            return None
+        _tokens.move_to_end(key)
+    return entry[0], entry[1]
+
+
+def get_cached_for_user(user_id):
+    """Return the cached token of a user, or None."""
+    with _tokens_lock:
+        key = _user_keys.get(user_id)
+    if key is None:
+        return None
+    cached = get_cached(key)
+    return cached[1] if cached is not None else None
+
+
+def set_cached(key, user, token):
+    timeout = get_timeout()
+    if timeout <= 0:
+        return
+    with _tokens_lock:
+        _tokens[key] = (user, token, time.monotonic() + timeout)
+        _tokens.move_to_end(key)
+        _user_keys[user.pk] = key
+        while len(_tokens) > get_size():
+            _, (evicted, _, _) = _tokens.popitem(last=False)
+            if _user_keys.get(evicted.pk) not in _tokens:
+                _user_keys.pop(evicted.pk, None)
+
+
+def invalidate_token(key):
+    with _tokens_lock:
+        _tokens.pop(key, None)
+
+
+def invalidate_user(user_id):
+    with _tokens_lock:
+        for key in [key for key, entry in _tokens.items() if entry[0].pk == user_id]:
+            del _tokens[key]
+        _user_keys.pop(user_id, None)
+
+
+def clear():
+    with _tokens_lock:
+        _tokens.clear()
+        _user_keys.clear()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        cached = get_cached(key)
+        if cached is not None:
+            cache.record("auth", "hit")
+            user, token = cached
+            # Each request gets its own copy, so attributes a view sets on
+            # request.user do not leak into other requests.
+            return copy.copy(user), token
+
+        cache.record("auth", "miss")
+        user, token = super().authenticate_credentials(key)
+        set_cached(key, user, token)
+        return copy.copy(user), token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance=None, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_changed_user(sender, instance=None, **kwargs):
+    invalidate_user(instance.pk)
@@ -0,0 +1,306 @@
+"""Sparse fieldsets, truncated texts and fast payload building for the API.
+
+``?fields=id,title`` picks the payload fields of a list or detail endpoint
+and ``?truncate=N`` cuts texts to at most N characters. Comment lists embed
+their post: ``post`` selects the whole post payload, ``post.title`` single
+fields of it, and leaving both out drops the join.
+
+Every payload field declares the columns it reads. Fieldset.query() loads
+exactly those as values_list() rows, so no model instance is built, and
+truncated texts are cut by the database (Substr) instead of being
+transferred whole. Fieldset.compile() turns the selection into one
+function from a row to its payload, with the column positions resolved
+once per page rather than once per row.
+"""
+import hashlib
+from operator import attrgetter, itemgetter
+
+from django.db.models import Case, F, TextField, Value, When
+from django.db.models.functions import Substr
+
+from blog.models import render_body
+
+
+class InvalidFieldset(ValueError):
+    """Raised when the fields or truncate query parameters cannot be honoured."""
+
+
+class Column:
+    """A computed column: a query expression and its equivalent on a loaded object.
+
+    ``expression(lookup)`` builds the expression, with ``lookup`` mapping
+    field names to lookups through the relation of a nested Fieldset.
+    """
+
+    def __init__(self, name, expression, get):
+        self.name = name
+        self.expression = expression
+        self.get = get
+
+
+class Field:
+    """A payload field: the columns it reads and how they turn into its value.
+
+    ``columns`` are attribute names (``author_id`` rather than ``author``),
+    which values_list() and getattr() both accept, or Columns. ``convert``
+    receives their values; without it the field is the single column
+    itself. ``text`` fields are the ones ``truncate`` applies to.
+    """
+
+    def __init__(self, columns, convert=None, text=False):
+        self.columns = tuple(columns)
+        self.convert = convert
+        self.text = text
+
+
+def truncate(text, length):
+    """Cut ``text`` to ``length`` characters, the last one an ellipsis if it was cut."""
+    if len(text) <= length:
+        return text
+    return text[:length - 1] + "…"
+
+
+class Fieldset:
+    """The payload fields selected from ``fields``, in the order of that mapping.
+
+    ``nested`` maps relation names to the Fieldsets of the embedded objects;
+    ``prefix`` is the relation a nested Fieldset is reached through.
+    """
+
+    def __init__(self, fields, names, truncate=None, nested=None, prefix=""):
+        self.fields = fields
+        self.names = [name for name in fields if name in names]
+        self.truncate = truncate
+        self.nested = nested or {}
+        self.prefix = prefix
+
+    def lookup(self, column):
+        return "%s__%s" % (self.prefix, column) if self.prefix else column
+
+    def alias(self, name):
+        # Annotations may not clash with field names nor contain "__".
+        return self.lookup(name).replace("__", "_")
+
+    def get_columns(self, name):
+        """Return the columns of a selected field and the function converting their values."""
+        field = self.fields[name]
+        if self.truncate is None or not field.text:
+            return field.columns, field.convert
+        column = field.columns[0]
+        limit = self.truncate
+        truncated = Column(
+            "%s_truncated" % column,
+            # One character more than asked, to tell whether it was cut.
+            lambda lookup: Substr(lookup(column), 1, limit + 1),
+            attrgetter(column),
+        )
+        return (truncated,), lambda text: truncate(text, limit)
+
+    def row_columns(self):
+        """Return the (row name, expression or None, object getter) of every column read."""
+        columns = {}
+        for name in self.names:
+            if name in self.nested:
+                key = self.lookup("%s_id" % name)
+                columns.setdefault(key, (key, None, attrgetter("%s_id" % name)))
+                for row_name, expression, get in self.nested[name].row_columns():
+                    columns.setdefault(row_name, (
+                        row_name, expression, lambda obj, name=name, get=get: get(getattr(obj, name)),
+                    ))
+                continue
+            for column in self.get_columns(name)[0]:
+                if isinstance(column, Column):
+                    row_name = self.alias(column.name)
+                    columns.setdefault(row_name, (row_name, column.expression(self.lookup), column.get))
+                else:
+                    row_name = self.lookup(column)
+                    columns.setdefault(row_name, (row_name, None, attrgetter(column)))
+        return list(columns.values())
+
+    def query(self, queryset, *columns):
+        """Return ``queryset`` as named rows of the columns of this fieldset, then ``columns``.
+
+        ``columns`` are extra columns the caller needs, e.g. the keyset
+        pagination ordering.
+        """
+        names = []
+        expressions = {}
+        for row_name, expression, _ in self.row_columns():
+            names.append(row_name)
+            if expression is not None:
+                expressions[row_name] = expression
+        names.extend(column for column in columns if column not in names)
+        return queryset.annotate(**expressions).values_list(*names, named=True)
+
+    def compile(self, names=None):
+        """Return a function building the payload of a row from query().
+
+        The column positions and converters are resolved here, once, into
+        one getter per field; payloads made of plain columns only are
+        built by a single itemgetter. Nested payloads are built once per
+        related object and shared by the rows that embed it.
+        """
+        if names is None:
+            names = [row_name for row_name, _, _ in self.row_columns()]
+        index = {name: position for position, name in enumerate(names)}
+        getters = []
+        positions = []
+        for name in self.names:
+            if name in self.nested:
+                getters.append((name, self.compile_nested(name, names, index)))
+                continue
+            columns, convert = self.get_columns(name)
+            columns = [
+                index[self.alias(column.name) if isinstance(column, Column) else self.lookup(column)]
+                for column in columns
+            ]
+            if convert is None:
+                # Fields without a converter read a single column.
+                getters.append((name, itemgetter(*columns)))
+                positions.extend(columns)
+            else:
+                getters.append((name, self.compile_converter(convert, itemgetter(*columns), len(columns))))
+
+        if len(positions) == len(getters) > 1:
+            keys = tuple(self.names)
+            values = itemgetter(*positions)
+            return lambda row: dict(zip(keys, values(row)))
+
+        getters = tuple(getters)
+        return lambda row: {name: get(row) for name, get in getters}
+
+    @staticmethod
+    def compile_converter(convert, values, count):
+        if count == 1:
+            return lambda row: convert(values(row))
+        return lambda row: convert(*values(row))
+
+    def compile_nested(self, name, names, index):
+        build = self.nested[name].compile(names)
+        key = itemgetter(index[self.lookup("%s_id" % name)])
+        built = {}
+
+        def get(row):
+            related_id = key(row)
+            data = built.get(related_id)
+            if data is None:
+                data = built[related_id] = build(row)
+            return data
+
+        return get
+
+    def serialize_rows(self, rows):
+        """Return the payloads of rows from query()."""
+        serialize = self.compile()
+        return [serialize(row) for row in rows]
+
+    def serialize_objects(self, objects):
+        """Return the payloads of loaded objects, e.g. a post that was just saved."""
+        getters = [get for _, _, get in self.row_columns()]
+        serialize = self.compile()
+        return [serialize([get(obj) for get in getters]) for obj in objects]
+
+    @property
+    def key(self):
+        """A string identifying the selection, for cache keys."""
+        parts = [",".join(self.names), str(self.truncate)]
+        parts.extend("%s(%s)" % (name, fieldset.key) for name, fieldset in self.nested.items())
+        return hashlib.md5(";".join(parts).encode()).hexdigest()
+
+
+# The text of posts the backfill has not rendered yet, and nothing for the others.
+TEXT_FALLBACK = Column(
+    "text_fallback",
+    lambda lookup: Case(
+        When(**{lookup("text_html"): "", "then": F(lookup("text"))}),
+        default=Value(""),
+        output_field=TextField(),
+    ),
+    lambda post: "" if post.text_html else post.text,
+)
+
+POST_FIELDS = {
+    "id": Field(["id"]),
+    "title": Field(["title"]),
+    "text": Field(["text"], text=True),
+    "text_html": Field(["text_html", TEXT_FALLBACK], render_body),
+    "excerpt": Field(["excerpt"]),
+    "author": Field(["author_id"]),
+    "is_published": Field(["published_date"], lambda published_date: published_date is not None),
+    "approved_comment_count": Field(["approved_comment_count"]),
+}
+
+POST_LIST_FIELDS = ["id", "title", "text", "text_html", "excerpt", "is_published", "approved_comment_count"]
+
+POST_DETAIL_FIELDS = POST_LIST_FIELDS + ["author"]
+
+# ListAPIView's payload, which PostSerializer used to produce.
+POST_SUMMARY_FIELDS = ["id", "author", "title", "text"]
+
+COMMENT_FIELDS = {
+    "id": Field(["id"]),
+    "post": Field(["post_id"]),
+    "author": Field(["author"]),
+    "text": Field(["text"], text=True),
+    "is_approved": Field(["approved_comment"], lambda approved: approved is True),
+}
+
+COMMENT_DEFAULT_FIELDS = list(COMMENT_FIELDS)
+
+# Search hits come from raw SQL, so these are only used with serialize_objects().
+SEARCH_FIELDS = {
+    "id": Field(["id"]),
+    "title": Field(["title"]),
+    "title_highlight": Field(["title_highlight"]),
+    "excerpt": Field(["excerpt"]),
+    "author": Field(["author_id"]),
+    "is_published": Field(["published_date"], lambda published_date: published_date is not None),
+    "score": Field(["score"]),
+}
+
+
+def parse_truncate(params):
+    value = params.get("truncate")
+    if value is None or value == "":
+        return None
+    try:
+        truncate = int(value)
+    except ValueError:
+        truncate = 0
+    if truncate < 1:
+        raise InvalidFieldset("Invalid truncate: %r, expected a positive number of characters." % value)
+    return truncate
+
+
+def get_fieldset(params, fields, default, nested=None):
+    """Return the Fieldset the ``fields`` and ``truncate`` query parameters select.
+
+    ``nested`` maps relation names to the (fields, default) of the objects
+    embedded under them. Raises InvalidFieldset for unknown field names.
+    """
+    nested = nested or {}
+    truncate = parse_truncate(params)
+    requested = [name.strip() for name in params.get("fields", "").split(",") if name.strip()]
+    if not requested:
+        names = list(default)
+        nested_names = {relation: list(nested[relation][1]) for relation in nested if relation in default}
+    else:
+        names = []
+        nested_names = {}
+        for name in requested:
+            relation, _, subfield = name.partition(".")
+            if relation in nested:
+                related_fields, related_default = nested[relation]
+                if subfield and subfield not in related_fields:
+                    raise InvalidFieldset("Unknown field: %r." % name)
+                selected = nested_names.setdefault(relation, [])
+                selected.extend([subfield] if subfield else related_default)
+                names.append(relation)
+            elif subfield or name not in fields:
+                raise InvalidFieldset("Unknown field: %r." % name)
+            else:
+                names.append(name)
+    return Fieldset(fields, names, truncate, {
+        relation: Fieldset(nested[relation][0], selected, truncate, prefix=relation)
+        for relation, selected in nested_names.items()
+    })
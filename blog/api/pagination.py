@@ -0,0 +1,227 @@
+import base64
+import json
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def get_query_params(request):
+    """Return the query parameters of a DRF or a plain Django request."""
+    return getattr(request, "query_params", request.GET)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the ordering."""
+
+
+class KeysetPagination(BasePagination):
+    """Opaque cursor pagination keyed on a unique, ordered tuple of columns.
+
+    Pages are fetched with ``WHERE (a, b) > (x, y) ORDER BY a, b LIMIT n``
+    so fetching page N costs the same as fetching the first page, unlike
+    offset pagination which has to scan and discard every preceding row.
+    The last field of ``ordering`` must be unique (normally ``id``).
+    """
+
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    total_query_param = "total"
+    max_limit = 100
+
+    def __init__(self, ordering=("id",)):
+        self.ordering = tuple(ordering)
+        self.queryset = None
+
+    @property
+    def default_limit(self):
+        return settings.REST_FRAMEWORK.get("PAGE_SIZE") or 10
+
+    def get_limit(self, request):
+        """Return the page size requested by the client, clamped to max_limit."""
+
+        try:
+            limit = int(get_query_params(request)[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def encode_cursor(self, row, reverse=False):
+        """Return an opaque cursor pointing at the given row."""
+
+        values = [self._dump_value(getattr(row, field.lstrip("-"))) for field in self.ordering]
+        payload = json.dumps({"k": values, "r": reverse}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, model=None):
+        """Return the (values, reverse) pair stored in a cursor.
+
+        Values are checked against the ordering fields of ``model``, and
+        orderings that are not model fields must hold numbers, so a
+        tampered cursor is refused instead of failing in the query.
+        """
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            values = payload["k"]
+            reverse = bool(payload["r"])
+        except (ValueError, TypeError, KeyError):
+            raise InvalidCursor("Invalid cursor.")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor("Invalid cursor.")
+        return [
+            self._check_value(model, field.lstrip("-"), self._load_value(value))
+            for field, value in zip(self.ordering, values)
+        ], reverse
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of ``queryset`` as a list."""
+
+        self.queryset = queryset
+
+        def fetch(ordering, values, count):
+            page_queryset = queryset.order_by(*ordering)
+            if values is not None:
+                page_queryset = page_queryset.filter(self._after(ordering, values))
+            return list(page_queryset[:count])
+
+        return self.paginate(fetch, request, model=queryset.model)
+
+    def paginate(self, fetch, request, model=None):
+        """Return one page of rows from ``fetch(ordering, after_values, count)``.
+
+        ``model`` is the model whose fields the ordering names, if any.
+        """
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        cursor = get_query_params(request).get(self.cursor_query_param)
+        values, reverse = self.decode_cursor(cursor, model) if cursor else (None, False)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        # Fetch one extra row to find out whether there is another page.
+        rows = fetch(ordering, values, self.limit + 1)
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        if reverse:
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+        return rows
+
+    def get_next_cursor(self):
+        if not self.page or not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_cursor(self):
+        if not self.page or not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_approximate_count(self):
+        """Return an estimate of the total number of rows, or None if not requested.
+
+        PostgreSQL answers from the planner's row estimate, so the cost does
+        not grow with the table. Other backends fall back to COUNT(*), which
+        is served from an index when one covers the filter.
+        """
+
+        if self.queryset is None:
+            return None
+        if get_query_params(self.request).get(self.total_query_param) not in ("1", "true", "approx"):
+            return None
+        connection = connections[self.queryset.db]
+        if connection.vendor == "postgresql":
+            sql, params = self.queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN " + sql, params)
+                plan = cursor.fetchone()[0]
+            match = re.search(r"rows=(\d+)", plan)
+            if match:
+                return int(match.group(1))
+        return self.queryset.count()
+
+    def get_paginated_data(self, data):
+        """Return the page payload: data, counts and cursors."""
+
+        response = {
+            "data": data,
+            "count": len(data),
+            "next": self.get_next_cursor(),
+            "previous": self.get_previous_cursor(),
+        }
+        total = self.get_approximate_count()
+        if total is not None:
+            response["total"] = total
+        return response
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data), status=200)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else "-" + field
+
+    @staticmethod
+    def _after(ordering, values):
+        """Build the lexicographic ``(a, b, ...) > (x, y, ...)`` filter."""
+
+        condition = Q()
+        for index in reversed(range(len(ordering))):
+            field = ordering[index]
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            step = Q(**{"%s__%s" % (name, lookup): values[index]})
+            if index < len(ordering) - 1:
+                step |= Q(**{name: values[index]}) & condition
+            condition = step
+        return condition
+
+    @staticmethod
+    def _dump_value(value):
+        if hasattr(value, "isoformat"):
+            return {"dt": value.isoformat()}
+        return value
+
+    @staticmethod
+    def _check_value(model, name, value):
+        if value is None or isinstance(value, (bool, list, dict)):
+            raise InvalidCursor("Invalid cursor.")
+        try:
+            field = model._meta.get_field(name) if model is not None else None
+        except FieldDoesNotExist:
+            field = None
+        if field is None:
+            # Orderings outside the model, such as search ranks, are numbers.
+            if not isinstance(value, (int, float)):
+                raise InvalidCursor("Invalid cursor.")
+            return value
+        try:
+            return field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor.")
+
+    @staticmethod
+    def _load_value(value):
+        if isinstance(value, dict):
+            parsed = parse_datetime(value.get("dt") or "")
+            if parsed is None:
+                raise InvalidCursor("Invalid cursor.")
+            return parsed
+        return value
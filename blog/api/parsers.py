@@ -0,0 +1,96 @@
+import json
+import zlib
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def get_max_body_size():
+    return getattr(settings, "BLOG_API_MAX_BODY_SIZE", 64 * 1024 * 1024)
+
+
+def read_body(stream):
+    """Read a request body, refusing bodies over BLOG_API_MAX_BODY_SIZE."""
+    if stream is None:
+        return b""
+    limit = get_max_body_size()
+    body = stream.read(limit + 1)
+    if len(body) > limit:
+        raise ParseError("Request body exceeds %d bytes." % limit)
+    return body
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline delimited JSON into a lazy iterator of objects.
+
+    Lines are decoded as the view consumes them, so a bulk upload can be
+    processed in chunks without holding the whole body in memory.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return self.iter_objects(stream, encoding)
+
+    def iter_objects(self, stream, encoding):
+        if stream is None:
+            return
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode(encoding))
+            except ValueError as exc:
+                raise ParseError("NDJSON parse error on line %d - %s" % (number, exc))
+
+
+class GzipJSONParser(BaseParser):
+    """Parse gzip compressed JSON, the format of GzipJSONRenderer.
+
+    Bodies are decompressed up to BLOG_API_MAX_BODY_SIZE bytes, so a small
+    upload cannot expand into an arbitrarily large one.
+    """
+
+    media_type = "application/x-json-gzip"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        limit = get_max_body_size()
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(read_body(stream), limit)
+            if decompressor.unconsumed_tail:
+                raise ParseError("Decompressed request body exceeds %d bytes." % limit)
+            body += decompressor.flush()
+            if orjson is not None:
+                return orjson.loads(body)
+            return json.loads(body)
+        except (zlib.error, ValueError) as exc:
+            raise ParseError("Compressed JSON parse error - %s" % exc)
+
+
+class MessagePackParser(BaseParser):
+    """Parse MessagePack, the format of MessagePackRenderer; needs the msgpack package."""
+
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if msgpack is None:
+            raise ParseError("MessagePack is not supported, the msgpack package is not installed.")
+        try:
+            return msgpack.unpackb(read_body(stream), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError("MessagePack parse error - %s" % exc)
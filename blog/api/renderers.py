@@ -0,0 +1,115 @@
+import gzip
+import re
+import time
+
+from rest_framework.utils import encoders
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+
+from blog.metrics import add_time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# U+2028 and U+2029 in UTF-8.
+LINE_SEPARATORS = re.compile(b"\xe2\x80[\xa8\xa9]")
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding with orjson, several times faster on large payloads.
+
+    The output matches JSONRenderer's compact UTF-8 output: dates and
+    types orjson does not know go through DRF's JSONEncoder. Indented
+    output, and installs without orjson, go through JSONRenderer.
+    """
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=encoders.JSONEncoder().default, option=self.options)
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped like JSONRenderer does, so the output stays a JavaScript
+        # subset. One search is cheaper than two replaces, and rarely matches.
+        if LINE_SEPARATORS.search(ret):
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class GzipJSONRenderer(ORJSONRenderer):
+    """Render gzip compressed JSON for bulk consumers that ask for it.
+
+    The compression is part of the media type rather than a
+    Content-Encoding, so proxies and clients hand the body over as is.
+    """
+
+    media_type = "application/x-json-gzip"
+    format = "jsongz"
+    # Level 1 compresses list payloads to about a sixth, several times
+    # faster than the default level, which saves only a few percent more.
+    compresslevel = 1
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        ret = super().render(data, None, renderer_context)
+        # mtime=0 keeps the output, and so the response, stable.
+        return gzip.compress(ret, compresslevel=self.compresslevel, mtime=0)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack; needs the msgpack package.
+
+    Values MessagePack has no type for, such as dates, are converted like
+    JSONRenderer converts them, so both formats carry the same data.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encoders.JSONEncoder().default)
+
+
+class TimedRendererMixin:
+    """Add the render time of API responses to the request metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            add_time("serialize", time.perf_counter() - started)
+
+
+class TimedORJSONRenderer(TimedRendererMixin, ORJSONRenderer):
+    pass
+
+
+class TimedGzipJSONRenderer(TimedRendererMixin, GzipJSONRenderer):
+    pass
+
+
+class TimedMessagePackRenderer(TimedRendererMixin, MessagePackRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
@@ -1,8 +1,32 @@
 from blog.models import Post, Comment
 
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
+
+class AuthorField(serializers.PrimaryKeyRelatedField):
+    """Author field that can resolve ids from a map preloaded into the context.
+
+    Bulk uploads put {id: user} for every referenced author in
+    context["authors"] so validating n posts costs one query, not n.
+    """
+
+    def to_internal_value(self, data):
+        authors = self.context.get("authors")
+        if authors is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return authors[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
 class PostSerializer(serializers.ModelSerializer):
+    author = AuthorField(queryset=get_user_model().objects.all())
     
     class Meta:
         model = Post
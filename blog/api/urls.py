@@ -2,26 +2,37 @@ from django.urls import path, include
 from blog.api.views import (
     PublishedPostsAPIView, 
     PostPublishingAPIView, 
+    BulkPostPublishingAPIView,
     UnpublishedPostsAPIView, 
     PostAPIView, 
+    BulkPostAPIView,
     ListAPIView, 
     CommentAPIView,
     CommentsAPIView,
     ApprovedCommentsAPIView,
     ApprovingCommentAPIView,
+    ModerationQueueAPIView,
+    DatabasePoolsAPIView,
     CustomAuthToken,
-    PostCommentsAPIView
+    PostCommentsAPIView,
+    SearchPostsAPIView,
+    ExportAPIView
 )
 
 urlpatterns = [
     path('api-token-auth/', CustomAuthToken.as_view()), #token authentication
+    path("db/pools/", DatabasePoolsAPIView.as_view()), #connection pool metrics, admin only
     
     #Post API
     path("post/list/", ListAPIView.as_view()),
     path("post/published/", PublishedPostsAPIView.as_view()),
     path("post/publish/<int:post_id>/", PostPublishingAPIView.as_view()), #publishing post
+    path("post/publish/bulk/", BulkPostPublishingAPIView.as_view(publish=True)), #publishing many posts
+    path("post/unpublish/bulk/", BulkPostPublishingAPIView.as_view(publish=False)), #unpublishing many posts
     path("post/unpublished/", UnpublishedPostsAPIView.as_view()),
     path("posts/", PostAPIView.as_view()), #creating post
+    path("posts/search/", SearchPostsAPIView.as_view()), #full-text search
+    path("posts/bulk/", BulkPostAPIView.as_view()), #creating many posts
     path("posts/<int:post_id>/", PostAPIView.as_view()), #reading, updating and deleting posts
     
     #Comment API
@@ -29,6 +40,11 @@ urlpatterns = [
     path("comment/new/", CommentsAPIView.as_view()), #creating comment
     path("approve/comment/<int:comment_id>/", ApprovingCommentAPIView.as_view()), #approving comment
     path("comments/approved/", ApprovedCommentsAPIView.as_view()), #reading comment
+    path("comments/pending/", ModerationQueueAPIView.as_view()), #moderation queue, batch approving and removing
     
-    path('post/<int:post_id>/comments/', PostCommentsAPIView.as_view())
+    path('post/<int:post_id>/comments/', PostCommentsAPIView.as_view()),
+
+    #Export API
+    path("export/posts/", ExportAPIView.as_view(model="posts")), #streaming posts
+    path("export/comments/", ExportAPIView.as_view(model="comments")), #streaming comments
 ]
\ No newline at end of file
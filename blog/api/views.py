@@ -1,91 +1,143 @@
+from blog import cache as blog_cache
+from blog import export, login
+from blog.db import pool_stats
+from blog.bulk import approve_comments, create_posts, delete_comments, set_published
+from blog.api.parsers import GzipJSONParser, MessagePackParser, NDJSONParser
+from blog.conditional import (
+    conditional,
+    post_stamps,
+    comment_stamps,
+    thread_stamps,
+    post_list_stamps,
+    comment_list_stamps,
+)
+from blog.api import fieldsets
+from blog.api.fieldsets import InvalidFieldset
+from blog.api.pagination import KeysetPagination, InvalidCursor
 from blog.api.serializers import PostSerializer, CommentSerializer
 from blog.models import Post, Comment
+from blog.search import search_posts
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.authtoken.models import Token
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
 
 
 class PostsDataMixin:
-    """Mixin for getting posts data."""
+    """Mixin for getting posts data.
 
-    def get_posts_data(self, posts):
-        """Get posts data from posts queryset."""
-        
-        posts_data = []
-        for post in posts:
-            data = {
-                "id": post.id, 
-                "title": post.title, 
-                "text": post.text,
-                "is_published": post.is_published(),
-                }
-            posts_data.append(data)
+    Payloads are built from a Fieldset (see blog.api.fieldsets), which the
+    fields and truncate query parameters select; without one they hold
+    every field. Lists are built from the values_list() rows of
+    Fieldset.query(), single objects from model instances.
+    """
+
+    def get_posts_fieldset(self, request, default=fieldsets.POST_LIST_FIELDS):
+        """Return the fieldset of a posts payload requested by the query parameters."""
 
-        return posts_data
+        return fieldsets.get_fieldset(request.query_params, fieldsets.POST_FIELDS, default)
+
+    def get_posts_data(self, rows, fieldset=None):
+        """Get posts data from the rows of fieldset.query()."""
+        
+        if fieldset is None:
+            fieldset = fieldsets.Fieldset(fieldsets.POST_FIELDS, fieldsets.POST_LIST_FIELDS)
+        return fieldset.serialize_rows(rows)
     
-    def get_post_data(self, post):
+    def get_post_data(self, post, fieldset=None):
         """Return individual post data."""
         
-        data = {
-            "id": post.id, 
-            "title": post.title, 
-            "text": post.text, 
-            "author": post.author.id,
-            "is_published": post.is_published()
-            }
-        return data
+        if fieldset is None:
+            fieldset = fieldsets.Fieldset(fieldsets.POST_FIELDS, fieldsets.POST_DETAIL_FIELDS)
+        return fieldset.serialize_objects([post])[0]
+
+
+def get_error_response(exc, status=400):
+    """Return the error response for an invalid cursor or fieldset."""
+
+    error_response = {
+        "title": "Error",
+        "message": str(exc)
+    }
+    return Response(error_response, status=status)
+
+
+class KeysetPaginationMixin:
+    """Mixin for paginating list endpoints with opaque keyset cursors."""
+
+    pagination_class = KeysetPagination
+    ordering = ("id",)
+
+    def get_ordering_columns(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_paginated_posts_response(self, request, posts, cache_name):
+        """Return a cached, paginated response of posts data for the posts queryset."""
+
+        def get_page_data():
+            paginator = self.pagination_class(ordering=self.ordering)
+            page = paginator.paginate_queryset(fieldset.query(posts, *self.get_ordering_columns()), request, view=self)
+            return paginator.get_paginated_data(self.get_posts_data(page, fieldset))
+
+        try:
+            fieldset = self.get_posts_fieldset(request)
+            response = blog_cache.get_or_set(
+                blog_cache.list_key(blog_cache.POSTS, cache_name, request.query_params),
+                get_page_data,
+                namespace="post_list",
+            )
+        except (InvalidCursor, InvalidFieldset) as exc:
+            return get_error_response(exc)
+        return Response(response, status=200)
     
     
 class CommentsDataMixin(PostsDataMixin):
     """Mixin for getting comment data."""
+
+    def get_comments_fieldset(self, request, nested=True):
+        """Return the fieldset of a comments payload; lists embed their post when ``nested``."""
+
+        return fieldsets.get_fieldset(
+            request.query_params,
+            fieldsets.COMMENT_FIELDS,
+            fieldsets.COMMENT_DEFAULT_FIELDS,
+            {"post": (fieldsets.POST_FIELDS, fieldsets.POST_DETAIL_FIELDS)} if nested else None,
+        )
     
-    def get_comments_data(self, comments):
-        """Get comment data from comment queryset."""
-        
-        comments_data = []
-        for comment in comments:
-            data = {
-                "id": comment.id,
-                "post": self.get_post_data(comment.post),
-                "author": comment.author, 
-                "text": comment.text,
-                "is_approved": comment.is_approved()
-                }
-            comments_data.append(data)
+    def get_comments_data(self, rows, fieldset):
+        """Get comment data from the rows of fieldset.query().
+
+        The rows carry the columns of the embedded posts, if any; each post
+        payload is built once and shared by every comment on that post.
+        """
         
-        return comments_data
+        return fieldset.serialize_rows(rows)
     
-    def get_comment_data(self, comment):
+    def get_comment_data(self, comment, fieldset=None):
         """Return individual comment data."""
         
-        data = {
-            "id": comment.id, 
-            "post": comment.post.id,
-            "author": comment.author,
-            "text": comment.text,
-            "is_approved": comment.is_approved()
-            }
-        return data
+        if fieldset is None:
+            fieldset = fieldsets.Fieldset(fieldsets.COMMENT_FIELDS, fieldsets.COMMENT_DEFAULT_FIELDS)
+        return fieldset.serialize_objects([comment])[0]
             
     
-class  PublishedPostsAPIView(PostsDataMixin, APIView):
+class  PublishedPostsAPIView(KeysetPaginationMixin, PostsDataMixin, APIView):
     """Get all published posts."""
     
     permission_classes = [AllowAny]
+    ordering = ("published_date", "id")
     
+    @method_decorator(conditional(post_list_stamps))
     def get(self, request, *args, **kwargs):
-        """Get all published posts data."""
-        
-        posts = Post.objects.exclude(published_date=None)
-        posts_data = self.get_posts_data(posts)
-        response = {
-            "data": posts_data, 
-            "count": len(posts_data)
-            }
+        """Get a page of published posts data."""
         
-        return Response(response, status=200)
+        posts = Post.objects.filter(published_date__isnull=False)
+        return self.get_paginated_posts_response(request, posts, "published")
 
 
 class PostPublishingAPIView(APIView):
@@ -103,34 +155,93 @@ class PostPublishingAPIView(APIView):
         return Response(response, status=200)
 
 
-class UnpublishedPostsAPIView(PostsDataMixin, APIView):
+class BatchMixin:
+    """Mixin for endpoints that act on a batch of ids given in "ids"."""
+
+    def get_ids(self, request):
+        """Return the list of integer ids in the request data, or None if it is malformed."""
+
+        try:
+            if hasattr(request.data, "getlist"):
+                ids = request.data.getlist("ids")
+            else:
+                ids = request.data.get("ids")
+            if not isinstance(ids, list) or any(isinstance(item_id, bool) for item_id in ids):
+                return None
+            return [int(item_id) for item_id in ids]
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    def get_batch_response(self, message, ids):
+        """Return the response for a batch that changed ``ids``."""
+
+        response = {
+            "title": "Success",
+            "message": message,
+            "data": {
+                "ids": ids,
+                "count": len(ids)
+                }
+            }
+        return Response(response, status=200)
+
+    def get_ids_error_response(self):
+        error_response = {
+            "title": "Error",
+            "message": "Expected a list of ids in \"ids\"."
+        }
+        return Response(error_response, status=400)
+
+
+class BulkPostPublishingAPIView(BatchMixin, APIView):
+    """API for publishing or unpublishing many posts at once."""
+
+    publish = True
+
+    def patch(self, request, *args, **kwargs):
+        """Publish or unpublish the posts whose ids are given in "ids"."""
+
+        ids = self.get_ids(request)
+        if ids is None:
+            return self.get_ids_error_response()
+
+        affected = set_published(ids, self.publish)
+        return self.get_batch_response("Posts published!" if self.publish else "Posts unpublished!", affected)
+
+
+class UnpublishedPostsAPIView(KeysetPaginationMixin, PostsDataMixin, APIView):
     """API for unpublished posts."""
 
+    ordering = ("created_date", "id")
+
+    @method_decorator(conditional(post_list_stamps))
     def get(self, request, *args, **kwargs):
-        """Get all published posts data."""
+        """Get a page of unpublished posts data."""
         
         posts = Post.objects.filter(published_date=None)
-        posts_data = self.get_posts_data(posts)
-        response = {
-            "data": posts_data, 
-            "count": len(posts_data)
-            }
-        
-        return Response(response, status=200)
+        return self.get_paginated_posts_response(request, posts, "unpublished")
 
 
 class PostAPIView(PostsDataMixin, APIView):
     """API for blog post."""
 
+    @method_decorator(conditional(post_stamps))
     def get(self, request, post_id, *args, **kwargs):
         """Get post data on given post id or primary key, pk."""
         
         try:
-            post = Post.objects.get(pk=post_id)
+            fieldset = self.get_posts_fieldset(request, fieldsets.POST_DETAIL_FIELDS)
+            post_data = blog_cache.get_or_set(
+                "%s:%s" % (blog_cache.post_key(post_id), fieldset.key),
+                lambda: self.get_posts_data([fieldset.query(Post.objects.all()).get(pk=post_id)], fieldset)[0],
+                namespace="post",
+            )
             response = {
-                "data": self.get_post_data(post)
+                "data": post_data
             }
             return Response(response, 200)
+        except InvalidFieldset as exc:
+            return get_error_response(exc)
         except Post.DoesNotExist:
             error_response = {
                 "title": "Error",
@@ -228,29 +339,169 @@ class PostAPIView(PostsDataMixin, APIView):
             
     
 
+class BulkPostAPIView(APIView):
+    """API for creating many posts in one request.
+
+    Accepts a JSON array, also gzip compressed or as MessagePack, or an
+    NDJSON stream of post data. Posts are validated and inserted chunk by
+    chunk, so an NDJSON upload is never held in memory as a whole. Invalid items are reported and skipped.
+    """
+
+    parser_classes = [JSONParser, NDJSONParser, GzipJSONParser, MessagePackParser]
+    batch_size = 1000
+
+    def post(self, request, *args, **kwargs):
+        """Create posts and return a result for every item."""
+
+        items = request.data
+        if isinstance(items, (dict, str, bytes)) or not hasattr(items, "__iter__"):
+            error_response = {
+                "title": "Error",
+                "message": "Expected a JSON array or NDJSON stream of posts."
+            }
+            return Response(error_response, status=400)
+
+        results = []
+        try:
+            for chunk in self.iter_chunks(items):
+                results.extend(self.create_chunk(chunk, offset=len(results)))
+        except ParseError as exc:
+            results.append({
+                "index": len(results),
+                "status": "error",
+                "errors": {"non_field_errors": [str(exc.detail)]}
+            })
+
+        created = sum(1 for result in results if result["status"] == "created")
+        response = {
+            "title": "Success!" if created else "Error",
+            "message": "%d of %d posts created!" % (created, len(results)),
+            "data": {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results
+                }
+            }
+        return Response(response, status=201 if created else 400)
+
+    def iter_chunks(self, items):
+        """Yield lists of up to batch_size items, flushing before a parse error."""
+
+        chunk = []
+        try:
+            for item in items:
+                chunk.append(item)
+                if len(chunk) == self.batch_size:
+                    yield chunk
+                    chunk = []
+        except ParseError:
+            if chunk:
+                yield chunk
+            raise
+        if chunk:
+            yield chunk
+
+    def create_chunk(self, chunk, offset):
+        """Validate and insert one chunk of post data, returning its results."""
+
+        author_ids = set()
+        for item in chunk:
+            try:
+                author_ids.add(int(item["author"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        authors = get_user_model().objects.in_bulk(author_ids)
+        child = PostSerializer(many=True, context={"request": self.request, "authors": authors}).child
+
+        results = []
+        posts = []
+        for index, item in enumerate(chunk, start=offset):
+            try:
+                posts.append(Post(**child.run_validation(item)))
+                results.append({"index": index, "status": "created"})
+            except ValidationError as exc:
+                results.append({"index": index, "status": "error", "errors": exc.detail})
+
+        posts = iter(create_posts(posts, batch_size=self.batch_size))
+        for result in results:
+            if result["status"] == "created":
+                result["id"] = next(posts).id
+        return results
+
+
+class ExportAPIView(APIView):
+    """API for streaming every post or comment as NDJSON or CSV.
+
+    Query parameters: output (ndjson or csv), published, since (ISO date
+    or datetime) and author; comments also take approved.
+    """
+
+    model = "posts"
+
+    def get(self, request, *args, **kwargs):
+        """Stream the rows matching the filters."""
+
+        params = request.query_params
+        output = params.get("output", "ndjson")
+        try:
+            if output not in export.FORMATS:
+                raise ValueError("Unknown export format: %r." % output)
+            filters = {
+                "published": export.parse_flag(params["published"]) if "published" in params else None,
+                "since": export.parse_since(params["since"]) if "since" in params else None,
+                "author": params.get("author"),
+            }
+            if self.model == "comments":
+                filters["approved"] = export.parse_flag(params["approved"]) if "approved" in params else None
+                fields, rows = export.COMMENT_FIELDS, export.get_comments(**filters)
+            else:
+                fields, rows = export.POST_FIELDS, export.get_posts(**filters)
+        except ValueError as exc:
+            error_response = {
+                "title": "Error",
+                "message": str(exc)
+            }
+            return Response(error_response, status=400)
+
+        response = StreamingHttpResponse(export.render(output, fields, rows), content_type=export.FORMATS[output])
+        response["Content-Disposition"] = 'attachment; filename="%s.%s"' % (self.model, output)
+        return response
+
+
 class ListAPIView(PostsDataMixin, APIView):
     """List all post data"""
     
+    @method_decorator(conditional(post_list_stamps))
     def get(self, request, format=None):
         """get method returns all post data wether published or not."""
 
-        posts = Post.objects.all()
-        serializer = PostSerializer(posts, many=True)
-        return Response(serializer.data)
+        try:
+            fieldset = self.get_posts_fieldset(request, fieldsets.POST_SUMMARY_FIELDS)
+        except InvalidFieldset as exc:
+            return get_error_response(exc)
+        return Response(self.get_posts_data(fieldset.query(Post.objects.all()), fieldset))
     
    
 class CommentAPIView(CommentsDataMixin, APIView):
     """API for accessing a comment."""
     
+    @method_decorator(conditional(comment_stamps))
     def get(self, request, comment_id, *args, **kwargs):
         """Get comment data on given post id or primary key, pk"""
         
         try:
-            comment = Comment.objects.get(pk=comment_id)
+            fieldset = self.get_comments_fieldset(request, nested=False)
+            comment_data = blog_cache.get_or_set(
+                "%s:%s" % (blog_cache.comment_key(comment_id), fieldset.key),
+                lambda: self.get_comments_data([fieldset.query(Comment.objects.all()).get(pk=comment_id)], fieldset)[0],
+                namespace="comment",
+            )
             response = {
-                "data": self.get_comment_data(comment)
+                "data": comment_data
             }
             return Response(response, 200)
+        except InvalidFieldset as exc:
+            return get_error_response(exc)
         except Comment.DoesNotExist:
             error_response = {
                 "title": "Error",
@@ -294,16 +545,27 @@ class ApprovedCommentsAPIView(CommentsDataMixin, APIView):
     
     permission_classes = [AllowAny]
     
+    @method_decorator(conditional(comment_list_stamps))
     def get(self, request, *args, **kwargs):
         """Get all approved comment data."""
         
-        comments = Comment.objects.exclude(approved_comment=False)
-        comments_data = self.get_comments_data(comments)
-        response = {
-            "data": comments_data, 
-            "count": len(comments_data)
-            }
-        
+        def get_approved_comments_data():
+            comments = fieldset.query(Comment.objects.filter(approved_comment=True))
+            comments_data = self.get_comments_data(comments, fieldset)
+            return {
+                "data": comments_data, 
+                "count": len(comments_data)
+                }
+
+        try:
+            fieldset = self.get_comments_fieldset(request)
+        except InvalidFieldset as exc:
+            return get_error_response(exc)
+        response = blog_cache.get_or_set(
+            blog_cache.list_key(blog_cache.COMMENTS, "approved", request.query_params),
+            get_approved_comments_data,
+            namespace="comment_list",
+        )
         return Response(response, status=200)
         
 
@@ -333,40 +595,113 @@ class ApprovingCommentAPIView(APIView):
         return Response(response, status=200)
     
     
+class ModerationQueueAPIView(BatchMixin, KeysetPaginationMixin, CommentsDataMixin, APIView):
+    """API for the queue of comments waiting for approval, across all posts."""
+
+    ordering = ("created_date", "id")
+
+    @method_decorator(conditional(comment_list_stamps))
+    def get(self, request, *args, **kwargs):
+        """Get a page of pending comments, oldest first."""
+
+        def get_page_data():
+            paginator = self.pagination_class(ordering=self.ordering)
+            comments = fieldset.query(Comment.objects.filter(approved_comment=False), *self.get_ordering_columns())
+            page = paginator.paginate_queryset(comments, request, view=self)
+            return paginator.get_paginated_data(self.get_comments_data(page, fieldset))
+
+        try:
+            fieldset = self.get_comments_fieldset(request)
+            response = blog_cache.get_or_set(
+                blog_cache.list_key(blog_cache.COMMENTS, "pending", request.query_params),
+                get_page_data,
+                namespace="comment_list",
+            )
+        except (InvalidCursor, InvalidFieldset) as exc:
+            return get_error_response(exc)
+        return Response(response, status=200)
+
+    def patch(self, request, *args, **kwargs):
+        """Approve the comments whose ids are given in "ids"."""
+
+        ids = self.get_ids(request)
+        if ids is None:
+            return self.get_ids_error_response()
+        return self.get_batch_response("Comments Approved!", approve_comments(ids))
+
+    def delete(self, request, *args, **kwargs):
+        """Remove the comments whose ids are given in "ids"."""
+
+        ids = self.get_ids(request)
+        if ids is None:
+            return self.get_ids_error_response()
+        return self.get_batch_response("Comments Removed!", delete_comments(ids))
+
+
+class DatabasePoolsAPIView(APIView):
+    """API for the connection pool metrics of the serving worker process."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """Get the size, wait and checkout time metrics of every pool."""
+
+        response = {
+            "data": pool_stats()
+            }
+        return Response(response, status=200)
+
+
 class CustomAuthToken(ObtainAuthToken):
-    
+    """Issue API tokens; see blog.login for the throttling of failed logins."""
+
     def post(self, request, *args, **kwargs):
-        
         try:
-            serializer = self.serializer_class(data=request.data, context={'request': request})
-            if serializer.is_valid(raise_exception=True):
-                user = serializer.validated_data['user']
-                token, created = Token.objects.get_or_create(user=user)
-                response = {
-                    'token': token.key,
-                    'user_id': user.pk,
-                    'email': user.email
-                }
-                return Response(response, 200)
-            else:
-                raise ValueError(str(serializer.errors))
+            username, password = get_credentials(request.data)
+            user = login.authenticate(request, username, password)
+            if user is None:
+                raise ValidationError("Unable to log in with provided credentials.")
+        except login.LoginThrottled as exc:
+            return Response(get_login_error(exc), status=429, headers={"Retry-After": str(exc.wait)})
         except Exception as exc:
-            error_response = {
-                "title": "Error",
-                "message": "Invalid username/password",
-                "error": str(exc)
-            }
-            return Response(error_response, status=400)
-        
-        
-        
+            return Response(get_login_error(exc), status=400)
+        return Response(get_token_data(user), 200)
+
+
+def get_credentials(data):
+    username, password = data.get("username"), data.get("password")
+    if not username or not password:
+        raise ValidationError('Must include "username" and "password".')
+    return username, password
+
+
+def get_token_data(user):
+    return {
+        'token': login.get_token(user).key,
+        'user_id': user.pk,
+        'email': user.email
+    }
+
+
+def get_login_error(exc):
+    return {
+        "title": "Error",
+        "message": "Invalid username/password",
+        "error": str(exc)
+    }
+
 
 class PostCommentsAPIView(CommentsDataMixin, APIView):
     """API for getting comments for a specific post"""
     
+    @method_decorator(conditional(thread_stamps))
     def get(self, request, post_id, *args, **kwargs):
         """Get post data on given post id or primary key, pk."""
         
+        try:
+            fieldset = self.get_comments_fieldset(request)
+        except InvalidFieldset as exc:
+            return get_error_response(exc)
         try:
             post_exists = Post.objects.filter(id=post_id).exists()
             if not post_exists:
@@ -375,9 +710,9 @@ class PostCommentsAPIView(CommentsDataMixin, APIView):
                 "message": "Post not found."
             }
                 return Response(error_response, status=404)
-            comment = Comment.objects.filter(post=post_id)
+            comment = fieldset.query(Comment.objects.filter(post=post_id))
             response = {
-                "data": self.get_comments_data(comment)
+                "data": self.get_comments_data(comment, fieldset)
             }
             return Response(response, 200)
         except Exception as exc:
@@ -387,4 +722,50 @@ class PostCommentsAPIView(CommentsDataMixin, APIView):
                 "error": str(exc)
             }
             return Response(error_response, status=500)
-            
\ No newline at end of file
+
+
+class SearchPostsAPIView(APIView):
+    """API for full-text search over post titles and texts."""
+
+    pagination_class = KeysetPagination
+    ordering = ("score", "id")
+
+    def get_hits_data(self, hits, fieldset=None):
+        """Get search results data from search hits."""
+
+        if fieldset is None:
+            fieldset = fieldsets.Fieldset(fieldsets.SEARCH_FIELDS, fieldsets.SEARCH_FIELDS)
+        return fieldset.serialize_objects(hits)
+
+    @method_decorator(conditional(post_list_stamps))
+    def get(self, request, *args, **kwargs):
+        """Get a ranked page of posts matching every term of the q parameter as a prefix."""
+
+        query = request.query_params.get("q", "")
+        published_only = request.query_params.get("published") in ("1", "true")
+
+        def fetch(ordering, values, count):
+            return search_posts(
+                query,
+                after=values,
+                descending=ordering[0].startswith("-"),
+                limit=count,
+                published_only=published_only,
+            )
+
+        def get_page_data():
+            paginator = self.pagination_class(ordering=self.ordering)
+            hits = paginator.paginate(fetch, request)
+            return paginator.get_paginated_data(self.get_hits_data(hits, fieldset))
+
+        try:
+            # Search rows are small already; fields only shapes the payload.
+            fieldset = fieldsets.get_fieldset(request.query_params, fieldsets.SEARCH_FIELDS, fieldsets.SEARCH_FIELDS)
+            response = blog_cache.get_or_set(
+                blog_cache.list_key(blog_cache.POSTS, "search", request.query_params),
+                get_page_data,
+                namespace="post_search",
+            )
+        except (InvalidCursor, InvalidFieldset) as exc:
+            return get_error_response(exc)
+        return Response(response, status=200)
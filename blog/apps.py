@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        # Connect the connection health check and SQLite pragma receivers,
+        # the receivers that invalidate cached token lookups and feeds, and
+        # the ones that regenerate static pages.
+        from blog import db, feeds, static_site  # noqa: F401
+        from blog.api import authentication  # noqa: F401
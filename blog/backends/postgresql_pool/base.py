@@ -0,0 +1,79 @@
+"""PostgreSQL backend that borrows connections from an in-process pool.
+
+Use it with CONN_MAX_AGE = 0: Django then "closes" the connection at the
+end of every request, which returns it to the pool instead. Pool options
+live under the database's POOL key: MAX_SIZE (default 10) and TIMEOUT in
+seconds to wait for a free connection (default 30).
+"""
+import psycopg2.extensions
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from blog.db import ConnectionPool, PoolTimeout, get_pool
+
+Database = base.Database
+
+
+def is_alive(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    except Database.Error:
+        return False
+
+
+def reset(connection):
+    """Roll back any open transaction; return False if the connection can not be reused."""
+    if connection.closed:
+        return False
+    status = connection.get_transaction_status()
+    if status == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        return True
+    if status in (psycopg2.extensions.TRANSACTION_STATUS_INTRANS, psycopg2.extensions.TRANSACTION_STATUS_INERROR):
+        try:
+            connection.rollback()
+            return True
+        except Database.Error:
+            return False
+    return False
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get("POOL", {})
+        return get_pool(self.alias, lambda: ConnectionPool(
+            lambda: Database.connect(**conn_params),
+            max_size=options.get("MAX_SIZE", 10),
+            timeout=options.get("TIMEOUT", 30.0),
+            check=is_alive if self.settings_dict.get("CONN_HEALTH_CHECKS") else None,
+            reset=reset,
+        ))
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        try:
+            connection = self.pool.checkout()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc))
+
+        # As in the postgresql backend.
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    @async_unsafe
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(self.connection)
@@ -0,0 +1,181 @@
+"""Set-based write paths for posts and comments.
+
+These bypass Model.save() and its signals, so they take care of the side
+effects the signals would otherwise have (cache and feed invalidation,
+static page regeneration) themselves.
+"""
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog import cache, feeds, static_site
+from blog.models import Post, Comment
+
+
+# SQLite before 3.32 allows at most 999 bound parameters per statement.
+ID_CHUNK_SIZE = 900
+
+
+def chunked(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def bulk_create(model, objs, batch_size=1000):
+    """Insert ``objs`` with multi-row INSERTs and set their primary keys.
+
+    Backends that cannot return ids from a bulk insert get them otherwise.
+    SQLite (on Django 3.2) gets them from the table's maximum id: it holds
+    its single write lock from the first INSERT until commit, so the new
+    rows of one transaction have consecutive ids. Other backends, e.g.
+    MySQL, whose concurrent inserts may interleave ids, insert one row per
+    statement instead.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+    using = router.db_for_write(model)
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.features.can_return_rows_from_bulk_insert or connection.vendor == "sqlite":
+            model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+        else:
+            insert_rows(model, objs, using)
+        if objs[0].pk is None:
+            last_id = model.objects.using(using).aggregate(last=Max("pk"))["last"]
+            for pk, obj in enumerate(objs, start=last_id - len(objs) + 1):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = using
+    return objs
+
+
+def insert_rows(model, objs, using):
+    """Insert ``objs`` one INSERT each, as Model.save() would but without its signals, and set their ids."""
+    meta = model._meta
+    fields = [field for field in meta.local_concrete_fields if field is not meta.auto_field]
+    returning_fields = meta.db_returning_fields
+    for obj in objs:
+        rows = model._base_manager.using(using)._insert(
+            [obj], fields=fields, returning_fields=returning_fields, using=using,
+        )
+        for value, field in zip(rows[0], returning_fields):
+            setattr(obj, field.attname, value)
+        obj._state.adding = False
+        obj._state.db = using
+
+
+def create_posts(posts, batch_size=1000):
+    """Insert unsaved posts in bulk and invalidate the cached post lists."""
+    posts = list(posts)
+    for post in posts:
+        post.render_text()
+    posts = bulk_create(Post, posts, batch_size=batch_size)
+    if posts:
+        cache.invalidate_lists()
+        published = [post.pk for post in posts if post.published_date]
+        if published:
+            feeds.invalidate()
+        static_site.schedule(published)
+    return posts
+
+
+def set_published(ids, published):
+    """Publish or unpublish the posts with the given ids in one UPDATE per id chunk.
+
+    Posts already in the requested state are left alone. Returns the ids
+    of the posts that changed.
+    """
+    affected = []
+    now = timezone.now()
+    with transaction.atomic():
+        for chunk in chunked(sorted(set(ids)), ID_CHUNK_SIZE):
+            posts = Post.objects.select_for_update().filter(id__in=chunk, published_date__isnull=published)
+            changed = list(posts.values_list("id", flat=True))
+            if changed:
+                Post.objects.filter(id__in=changed).update(
+                    published_date=now if published else None,
+                    updated_at=now,
+                )
+            affected.extend(changed)
+    cache.invalidate_posts(affected)
+    if affected:
+        feeds.invalidate()
+    static_site.schedule(affected)
+    return affected
+
+
+def approved_comment_count():
+    """Expression counting the approved comments of the outer post."""
+    approved = (
+        Comment.objects.filter(post=OuterRef("pk"), approved_comment=True)
+        .order_by().values("post").annotate(count=Count("id")).values("count")
+    )
+    return Coalesce(Subquery(approved), 0)
+
+
+def recount_posts(post_ids):
+    """Recompute approved_comment_count of the given posts, one UPDATE per id chunk."""
+    for chunk in chunked(sorted(set(post_ids)), ID_CHUNK_SIZE):
+        Post.objects.filter(id__in=chunk).update(approved_comment_count=approved_comment_count())
+
+
+def approve_comments(ids):
+    """Approve the pending comments with the given ids in one UPDATE per id chunk.
+
+    Returns the ids of the comments that were approved.
+    """
+    rows = []
+    now = timezone.now()
+    with transaction.atomic():
+        for chunk in chunked(sorted(set(ids)), ID_CHUNK_SIZE):
+            pending = Comment.objects.select_for_update().filter(id__in=chunk, approved_comment=False)
+            changed = list(pending.values_list("id", "post_id"))
+            if changed:
+                Comment.objects.filter(id__in=[comment_id for comment_id, _ in changed]).update(
+                    approved_comment=True,
+                    updated_at=now,
+                )
+            rows.extend(changed)
+        recount_posts(post_id for _, post_id in rows)
+    invalidate_comment_rows(rows, rows)
+    return [comment_id for comment_id, _ in rows]
+
+
+def delete_comments(ids):
+    """Delete the comments with the given ids in one DELETE per id chunk.
+
+    Returns the ids of the comments that were deleted.
+    """
+    rows = []
+    with transaction.atomic():
+        for chunk in chunked(sorted(set(ids)), ID_CHUNK_SIZE):
+            comments = Comment.objects.select_for_update().filter(id__in=chunk)
+            found = list(comments.values_list("id", "post_id", "approved_comment"))
+            if found:
+                # Nothing references comments, so the rows can go without the
+                # collector, which would load them and send a signal per row.
+                doomed = Comment.objects.filter(id__in=[row[0] for row in found])
+                doomed._raw_delete(doomed.db)
+            rows.extend(found)
+        recount_posts(post_id for _, post_id, approved in rows if approved)
+    invalidate_comment_rows(rows, [row for row in rows if row[2]])
+    return [row[0] for row in rows]
+
+
+def invalidate_comment_rows(rows, recounted):
+    """Invalidate changed comments, their threads, and posts whose count changed, once committed."""
+    if not rows:
+        return
+    comment_ids = [row[0] for row in rows]
+    post_ids = {row[1] for row in rows}
+    recounted_ids = {row[1] for row in recounted}
+
+    def invalidate():
+        cache.invalidate_comments(comment_ids, post_ids)
+        if recounted_ids:
+            cache.invalidate_posts(recounted_ids)
+
+    transaction.on_commit(invalidate)
+    static_site.schedule(recounted_ids)
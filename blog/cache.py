@@ -0,0 +1,233 @@
+"""Payload cache for the blog API.
+
+Entries are stored through Django's cache framework, so any configured
+backend (locmem, file, memcached or a Redis backend) can hold them.
+
+Keys are versioned instead of deleted: every post and comment has a
+version counter and every list namespace has a generation counter.
+Invalidating bumps the counter, which makes the old entries unreachable
+even if a request that started before the change writes its result late.
+Together with validators loaded from the database they make the stamps
+of conditional requests. Counters expire after BLOG_STAMP_TIMEOUT seconds, which bounds how long
+a process whose cache did not see a bump, e.g. another worker with the
+default per-process LocMemCache, keeps serving the old entries.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+
+MISSING = object()
+
+POSTS = "posts"
+COMMENTS = "comments"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the cache backend configured for blog payloads."""
+    return caches[getattr(settings, "BLOG_CACHE_ALIAS", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "BLOG_CACHE_TIMEOUT", 300)
+
+
+def get_lock_timeout():
+    return getattr(settings, "BLOG_CACHE_LOCK_TIMEOUT", 5)
+
+
+def record(namespace, outcome):
+    """Count a cache outcome ("hit", "miss" or "coalesced") for a namespace."""
+    with _stats_lock:
+        _stats[(namespace, outcome)] += 1
+
+
+def stats():
+    """Return the hit/miss counters of this process as {namespace: {outcome: n}}."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    result = {}
+    for (namespace, outcome), count in snapshot.items():
+        result.setdefault(namespace, {})[outcome] = count
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_version(name):
+    """Return the current value of a version counter, creating it if needed."""
+    cache = get_cache()
+    key = "blog:version:%s" % name
+    version = cache.get(key)
+    if version is None:
+        version = int(time.time() * 1000)
+        cache.add(key, version, get_stamp_timeout())
+        version = cache.get(key, version)
+    return version
+
+
+def get_stamp_timeout():
+    return getattr(settings, "BLOG_STAMP_TIMEOUT", 60)
+
+
+def get_stamp(name, load_validator):
+    """Return the (version, modified, tag) stamp of a counter in one cache round trip.
+
+    ``version`` is the counter, for cache keys. ``modified`` and ``tag``
+    come from ``load_validator()``, which reads them from the database
+    (e.g. the latest updated_at and a row count) and is only called when
+    they are not cached, so they are the same in every process and across
+    reloads. A loader that finds nothing, e.g. for an id that does not
+    exist, returns None and gets a stamp that is not stored and never
+    matches another one.
+
+    Stamps expire after BLOG_STAMP_TIMEOUT seconds. With a per-process
+    cache a bump only reaches the process that made the change, so the
+    others reload the stamp, and rebuild the entries stored under it,
+    within that time.
+    """
+    cache = get_cache()
+    version_key = "blog:version:%s" % name
+    validator_key = "blog:modified:%s" % name
+    values = cache.get_many([version_key, validator_key])
+    if version_key in values and validator_key in values:
+        return (values[version_key],) + values[validator_key]
+
+    # Start from the clock rather than 1 so an expired counter never
+    # comes back at a value that old, stale entries were stored under.
+    version = values.get(version_key, int(time.time() * 1000))
+    validator = values.get(validator_key) or load_validator()
+    if validator is None:
+        return version, timezone.now(), "missing:%s" % version
+    timeout = get_stamp_timeout()
+    cache.add(version_key, version, timeout)
+    cache.add(validator_key, validator, timeout)
+    return (cache.get(version_key, version),) + validator
+
+
+def bump_version(name):
+    """Move a counter on and drop its validator, which the next get_stamp() reloads."""
+    cache = get_cache()
+    key = "blog:version:%s" % name
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), get_stamp_timeout())
+    cache.delete("blog:modified:%s" % name)
+
+
+def post_version(post_id):
+    return get_version("post:%s" % post_id)
+
+
+def comment_version(comment_id):
+    return get_version("comment:%s" % comment_id)
+
+
+def thread_version(post_id):
+    return get_version("thread:%s" % post_id)
+
+
+def list_generation(namespace):
+    return get_version("list:%s" % namespace)
+
+
+def post_key(post_id):
+    return "blog:post:%s:%s" % (post_id, post_version(post_id))
+
+
+def comment_key(comment_id):
+    return "blog:comment:%s:%s" % (comment_id, comment_version(comment_id))
+
+
+def list_key(namespace, name, params=None):
+    """Return the key of a list page; ``params`` are the query parameters shaping the page."""
+    digest = ""
+    if params:
+        items = sorted(params.lists()) if hasattr(params, "lists") else sorted(params.items())
+        digest = hashlib.md5(repr(items).encode()).hexdigest()
+    return "blog:list:%s:%s:%s:%s" % (namespace, list_generation(namespace), name, digest)
+
+
+def get_or_set(key, compute, namespace="default", timeout=None):
+    """Return the cached value for ``key``, computing and storing it on a miss.
+
+    Only one caller recomputes a missing key at a time: the others wait for
+    the value to appear instead of all hitting the database (single-flight).
+    A waiter gives up and computes the value itself once the lock is
+    released without a value or the lock timeout passes.
+    """
+    cache = get_cache()
+    value = cache.get(key, MISSING)
+    if value is not MISSING:
+        record(namespace, "hit")
+        return value
+
+    record(namespace, "miss")
+    lock_key = key + ":lock"
+    lock_timeout = get_lock_timeout()
+    locked = cache.add(lock_key, 1, lock_timeout)
+    if not locked:
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            value = cache.get(key, MISSING)
+            if value is not MISSING:
+                record(namespace, "coalesced")
+                return value
+            if cache.get(lock_key) is None:
+                # The holder finished without storing a value, e.g. it raised.
+                break
+
+    try:
+        value = compute()
+        cache.set(key, value, get_timeout() if timeout is None else timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def invalidate_lists(*namespaces):
+    for namespace in namespaces or (POSTS, COMMENTS):
+        bump_version("list:%s" % namespace)
+
+
+def invalidate_post(post_id):
+    """Invalidate a post and every list that may embed it."""
+    bump_version("post:%s" % post_id)
+    invalidate_lists(POSTS, COMMENTS)
+
+
+def invalidate_posts(post_ids):
+    """Invalidate many posts, bumping the list generations only once."""
+    for post_id in post_ids:
+        bump_version("post:%s" % post_id)
+    invalidate_lists(POSTS, COMMENTS)
+
+
+def invalidate_comment(comment_id, post_id):
+    """Invalidate a comment, the comment thread of its post and the comment lists."""
+    bump_version("comment:%s" % comment_id)
+    bump_version("thread:%s" % post_id)
+    invalidate_lists(COMMENTS)
+
+
+def invalidate_comments(comment_ids, post_ids):
+    """Invalidate many comments and threads, bumping the comment lists only once."""
+    for comment_id in comment_ids:
+        bump_version("comment:%s" % comment_id)
+    for post_id in post_ids:
+        bump_version("thread:%s" % post_id)
+    invalidate_lists(COMMENTS)
@@ -0,0 +1,127 @@
+"""Conditional GET (ETag / Last-Modified) support for the blog views.
+
+Validators are built from the stamps kept in blog.cache, so a
+revalidation request that matches is answered with 304 Not Modified
+before the view renders a template, serializes data or touches the ORM.
+The database is only consulted to seed a stamp that is not cached yet.
+
+ETags hash the modified times and tags of the stamps, which are loaded
+from the database: the latest updated_at of the rows and, for threads
+and lists, their count, which deletions change. Unchanged data thus gets
+the same ETag in every process and after the stamps reload. The versions
+of the stamps only key cached payloads. Stamps expire (see
+blog.cache.get_stamp), so a change another process made, or a scheduled
+publication that has come, reaches the validators once the stamps reload.
+"""
+import datetime
+import hashlib
+
+from django.contrib.auth import SESSION_KEY
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from blog import cache
+from blog.models import Post, Comment
+
+
+def conditional(get_stamps, vary_on_user=False):
+    """Return a condition() decorator validating against ``get_stamps``.
+
+    ``get_stamps(*args, **kwargs)`` receives the view arguments without the
+    request and returns a list of (version, modified, tag) stamps. Pages that
+    differ per user set ``vary_on_user``; they get an ETag per user and no
+    Last-Modified, which cannot tell the variants apart.
+    """
+
+    def stamps(request, *args, **kwargs):
+        if not hasattr(request, "_blog_stamps"):
+            request._blog_stamps = get_stamps(*args, **kwargs)
+        return request._blog_stamps
+
+    def etag(request, *args, **kwargs):
+        parts = [stamps_key(stamps(request, *args, **kwargs))]
+        parts.append(request.get_full_path())
+        parts.append(request.META.get("HTTP_ACCEPT", ""))
+        if vary_on_user:
+            parts.append(get_user_variant(request))
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        if vary_on_user:
+            return None
+        return max(modified for _, modified, _ in stamps(request, *args, **kwargs))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def stamps_key(stamps):
+    """Join the validators of ``stamps``, leaving out their versions."""
+    return "|".join("%s@%s" % (modified.isoformat(), tag) for _, modified, tag in stamps)
+
+
+def get_user_variant(request):
+    """Identify the logged in user from the session without loading the user row."""
+    session = getattr(request, "session", None)
+    user_id = session.get(SESSION_KEY) if session is not None else None
+    return "user:%s" % user_id if user_id else "anonymous"
+
+
+# The modified time of an empty thread or list, which has no rows to date it.
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def latest(*values):
+    """Return the latest of the given times that have come, or EPOCH."""
+    now = timezone.now()
+    return max((value for value in values if value is not None and value <= now), default=EPOCH)
+
+
+def load_post_validator(post_id):
+    # A post whose publication date has come changes without being saved.
+    row = Post.objects.filter(pk=post_id).values_list("updated_at", "published_date").first()
+    return (latest(*row), "") if row else None
+
+
+def load_comment_validator(comment_id):
+    modified = Comment.objects.filter(pk=comment_id).values_list("updated_at", flat=True).first()
+    return (modified, "") if modified else None
+
+
+def load_comments_validator(comments):
+    """The last change of ``comments`` and their count, which a deletion changes."""
+    modified = comments.aggregate(modified=Max("updated_at"), count=Count("id"))
+    return latest(modified["modified"]), modified["count"]
+
+
+def post_stamps(post_id, **kwargs):
+    return [cache.get_stamp("post:%s" % post_id, lambda: load_post_validator(post_id))]
+
+
+def comment_stamps(comment_id, **kwargs):
+    return [cache.get_stamp("comment:%s" % comment_id, lambda: load_comment_validator(comment_id))]
+
+
+def thread_stamps(post_id, **kwargs):
+    """Stamps of a post together with its comment thread."""
+    return post_stamps(post_id) + [cache.get_stamp(
+        "thread:%s" % post_id, lambda: load_comments_validator(Comment.objects.filter(post=post_id)),
+    )]
+
+
+def load_post_list_validator():
+    """The last change of any post, or the last scheduled publication that has come, and the post count."""
+    modified = Post.objects.aggregate(
+        updated=Max("updated_at"),
+        published=Max("published_date", filter=Q(published_date__lte=timezone.now())),
+        count=Count("id"),
+    )
+    return latest(modified["updated"], modified["published"]), modified["count"]
+
+
+def post_list_stamps(*args, **kwargs):
+    return [cache.get_stamp("list:%s" % cache.POSTS, load_post_list_validator)]
+
+
+def comment_list_stamps(*args, **kwargs):
+    return [cache.get_stamp("list:%s" % cache.COMMENTS, lambda: load_comments_validator(Comment.objects.all()))]
@@ -0,0 +1,184 @@
+"""Database connection reuse.
+
+Persistent connections (CONN_MAX_AGE) are checked at the start of every
+request when the database has CONN_HEALTH_CHECKS set, so a connection the
+server dropped while idle is replaced instead of failing the request.
+Django 3.2 reads CONN_MAX_AGE but not CONN_HEALTH_CHECKS, which only
+arrived in 4.1 under the same name.
+
+ConnectionPool backs the blog.backends.postgresql_pool engine: an
+in-process pool shared by the threads of one worker, with wait and
+checkout time metrics. SQLite connections get the pragmas from the
+BLOG_SQLITE_PRAGMAS setting, WAL mode by default, so readers do not
+block behind the writer.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """A thread-safe pool of at most ``max_size`` connections made by ``connect()``.
+
+    ``check(connection)`` is called on idle connections before they are
+    handed out and ``reset(connection)`` when they are returned; either
+    returning False discards the connection.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=30.0, check=None, reset=None, close=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self.reset = reset
+        self.close_connection = close or (lambda connection: connection.close())
+        self.idle = deque()
+        self.size = 0
+        self.checked_out = {}
+        self.condition = threading.Condition()
+        self.metrics = {
+            "connections_opened": 0,
+            "connections_discarded": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "checkout_seconds_total": 0.0,
+            "checkout_seconds_max": 0.0,
+        }
+
+    def checkout(self):
+        """Return an idle or new connection, waiting up to ``timeout`` for one to free up."""
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        waited = opened = False
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self.metrics["timeouts"] += 1
+                        raise PoolTimeout("No connection available within %.1f seconds." % self.timeout)
+                    waited = True
+                    self.condition.wait(remaining)
+                connection = self.idle.pop() if self.idle else None
+                if connection is None:
+                    self.size += 1
+                acquired = time.perf_counter()
+
+            if connection is None:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    self.discard(None)
+                    raise
+                opened = True
+            elif self.check is not None and not self.check(connection):
+                self.discard(connection)
+                continue
+            break
+
+        now = time.perf_counter()
+        with self.condition:
+            self.checked_out[id(connection)] = now
+            self.record("wait", acquired - started)
+            self.metrics["checkouts"] += 1
+            self.metrics["waits"] += waited
+            self.metrics["connections_opened"] += opened
+        return connection
+
+    def checkin(self, connection):
+        """Return a checked out connection to the pool."""
+        with self.condition:
+            checked_out = self.checked_out.pop(id(connection), None)
+            if checked_out is not None:
+                self.record("checkout", time.perf_counter() - checked_out)
+        if self.reset is not None and not self.reset(connection):
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def discard(self, connection):
+        """Close a connection and free its slot."""
+        if connection is not None:
+            try:
+                self.close_connection(connection)
+            except Exception:
+                pass
+        with self.condition:
+            self.size -= 1
+            self.metrics["connections_discarded"] += connection is not None
+            self.condition.notify()
+
+    def close(self):
+        """Close every idle connection."""
+        with self.condition:
+            idle, self.idle = list(self.idle), deque()
+        for connection in idle:
+            self.discard(connection)
+
+    def record(self, name, seconds):
+        self.metrics["%s_seconds_total" % name] += seconds
+        self.metrics["%s_seconds_max" % name] = max(self.metrics["%s_seconds_max" % name], seconds)
+
+    def stats(self):
+        with self.condition:
+            return dict(
+                self.metrics,
+                size=self.size,
+                idle=len(self.idle),
+                in_use=self.size - len(self.idle),
+                max_size=self.max_size,
+            )
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, create):
+    """Return the pool of a database alias, creating it with ``create()`` the first time."""
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = create()
+        return pools[alias]
+
+
+def pool_stats():
+    """Return {alias: stats} for every pool of this process."""
+    with pools_lock:
+        return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Replace persistent connections that stopped working while idle."""
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get("CONN_HEALTH_CHECKS")
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "BLOG_SQLITE_PRAGMAS", {}).items():
+            cursor.execute("PRAGMA %s = %s" % (name, value))
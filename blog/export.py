@@ -0,0 +1,125 @@
+"""Streaming export of posts and comments as NDJSON or CSV.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor
+on PostgreSQL and chunked fetches elsewhere, and are rendered one line at
+a time. Memory use therefore stays flat however large the tables are.
+"""
+import csv
+from datetime import date, datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog.models import Post, Comment
+
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+POST_FIELDS = [
+    "id", "author_id", "title", "text", "created_date", "published_date", "updated_at", "approved_comment_count",
+]
+
+COMMENT_FIELDS = [
+    "id", "post_id", "author", "text", "created_date", "approved_comment", "updated_at",
+]
+
+
+def parse_since(value):
+    """Parse an ISO date or datetime into an aware datetime."""
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError("Invalid since date: %r." % value)
+        since = datetime.combine(day, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def parse_flag(value):
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ValueError("Invalid boolean: %r." % value)
+
+
+def get_posts(published=None, since=None, author=None):
+    """Return export rows of posts, optionally filtered.
+
+    ``since`` limits the rows to posts created at or after it and
+    ``author`` is a user id or username.
+    """
+    posts = Post.objects.all()
+    if published is not None:
+        posts = posts.filter(published_date__isnull=not published)
+    if since is not None:
+        posts = posts.filter(created_date__gte=since)
+    if author is not None:
+        author = str(author)
+        if author.isascii() and author.isdigit():
+            posts = posts.filter(author_id=int(author))
+        else:
+            posts = posts.filter(author__username=author)
+    return posts.order_by("id").values_list(*POST_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+def get_comments(published=None, since=None, author=None, approved=None):
+    """Return export rows of comments, optionally filtered.
+
+    ``published`` filters on the comment's post and ``author`` is the
+    comment's author name.
+    """
+    comments = Comment.objects.all()
+    if published is not None:
+        comments = comments.filter(post__published_date__isnull=not published)
+    if since is not None:
+        comments = comments.filter(created_date__gte=since)
+    if author is not None:
+        comments = comments.filter(author=author)
+    if approved is not None:
+        comments = comments.filter(approved_comment=approved)
+    return comments.order_by("id").values_list(*COMMENT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def format_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def render_ndjson(fields, rows):
+    """Yield one JSON object per row, each on its own line."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + "\n"
+
+
+def render_csv(fields, rows):
+    """Yield a CSV header line followed by one line per row."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([format_value(value) for value in row])
+
+
+def render(output, fields, rows):
+    if output == "csv":
+        return render_csv(fields, rows)
+    if output == "ndjson":
+        return render_ndjson(fields, rows)
+    raise ValueError("Unknown export format: %r." % output)
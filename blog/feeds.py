@@ -0,0 +1,185 @@
+"""RSS and Atom feeds of the published posts and of each post's comments.
+
+Feed readers poll often, so the serialized feeds are cached as bytes and
+validated with ETag/Last-Modified: a poll that matches costs a cache read
+and a 304, a poll that does not costs a cache read more.
+
+Feed bytes are stored under the validators of their stamps, which are
+loaded from the database (see blog.conditional), not under the stamp
+versions. They are thus shared by every process on a shared cache and
+outlive stamp reloads: a feed is only rebuilt when its data changed, or
+after BLOG_FEED_TIMEOUT.
+
+The posts feeds list the BLOG_FEED_ITEMS most recently published posts,
+the window, and their validator is the ids and update times of the
+posts in it. Saving or deleting a post drops the validator, which then
+reloads with one query; comments and edits of drafts or of posts older
+than the window leave it, and the cached feeds, as they were. The
+comment feeds are stored under the validators of their post and its
+comment thread.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from blog import cache
+from blog.conditional import conditional, latest, stamps_key, thread_stamps
+from blog.models import EXCERPT_WORDS, Post
+
+
+FEED_VERSION = "feed"
+
+
+def get_items():
+    return getattr(settings, "BLOG_FEED_ITEMS", 20)
+
+
+def get_timeout():
+    return getattr(settings, "BLOG_FEED_TIMEOUT", 3600)
+
+
+def load_feed_validator():
+    """The last change of the posts in the window, and a digest of their ids and update times."""
+    window = list(
+        Post.objects.filter(published_date__lte=timezone.now())
+        .order_by("-published_date", "-id")
+        .values_list("id", "updated_at", "published_date")[:get_items()]
+    )
+    digest = hashlib.md5(repr([(pk, updated.isoformat()) for pk, updated, _ in window]).encode())
+    return latest(*[value for _, *values in window for value in values]), digest.hexdigest()
+
+
+def feed_stamps(*args, **kwargs):
+    return [cache.get_stamp(FEED_VERSION, load_feed_validator)]
+
+
+def comment_feed_stamps(pk, **kwargs):
+    return thread_stamps(pk)
+
+
+def invalidate():
+    cache.bump_version(FEED_VERSION)
+
+
+class LatestPostsFeed(Feed):
+    title = "Franzooot's Blog"
+    link = reverse_lazy("post_list")
+    description = "The latest published posts."
+
+    def items(self):
+        return (
+            Post.objects.filter(published_date__lte=timezone.now())
+            .select_related("author")
+            .order_by("-published_date", "-id")[:get_items()]
+        )
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        if post.excerpt or not post.text:
+            return post.excerpt
+        return Truncator(post.text).words(EXCERPT_WORDS)
+
+    def item_link(self, post):
+        return reverse("post_detail", kwargs={"pk": post.pk})
+
+    def item_pubdate(self, post):
+        return post.published_date
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_author_name(self, post):
+        return post.author.username
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class PostCommentsFeed(Feed):
+
+    def get_object(self, request, pk):
+        return get_object_or_404(Post, pk=pk, published_date__lte=timezone.now())
+
+    def title(self, post):
+        return "Comments on %s" % post.title
+
+    def link(self, post):
+        return reverse("post_detail", kwargs={"pk": post.pk})
+
+    def description(self, post):
+        return "The latest approved comments on %s." % post.title
+
+    def items(self, post):
+        return post.approved_comments().order_by("-created_date", "-id")[:get_items()]
+
+    def item_title(self, comment):
+        return "%s: %s" % (comment.author, Truncator(comment.text).words(10))
+
+    def item_description(self, comment):
+        return comment.text
+
+    def item_link(self, comment):
+        return "%s#comment-%d" % (reverse("post_detail", kwargs={"pk": comment.post_id}), comment.pk)
+
+    def item_pubdate(self, comment):
+        return comment.created_date
+
+    def item_author_name(self, comment):
+        return comment.author
+
+
+class PostCommentsAtomFeed(PostCommentsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, post):
+        return self.description(post)
+
+
+def cached_feed(feed, name, get_stamps):
+    """Return a view serving ``feed`` from cached bytes, with conditional GET support.
+
+    The bytes are stored under the validators of the stamps ``get_stamps``
+    returns and the absolute URL of the feed, whose links carry the
+    requested host.
+    """
+
+    @conditional(get_stamps)
+    def view(request, *args, **kwargs):
+        validators = hashlib.md5(stamps_key(get_stamps(*args, **kwargs)).encode()).hexdigest()
+        location = hashlib.md5(request.build_absolute_uri(request.path).encode()).hexdigest()
+        key = "blog:feed:%s:%s:%s" % (name, validators, location)
+
+        def build():
+            response = feed(request, *args, **kwargs)
+            return response.content, response["Content-Type"]
+
+        content, content_type = cache.get_or_set(key, build, namespace="feed", timeout=get_timeout())
+        return HttpResponse(content, content_type=content_type)
+
+    return view
+
+
+latest_posts_rss = cached_feed(LatestPostsFeed(), "posts:rss", feed_stamps)
+latest_posts_atom = cached_feed(LatestPostsAtomFeed(), "posts:atom", feed_stamps)
+post_comments_rss = cached_feed(PostCommentsFeed(), "comments:rss", comment_feed_stamps)
+post_comments_atom = cached_feed(PostCommentsAtomFeed(), "comments:atom", comment_feed_stamps)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance=None, using=None, **kwargs):
+    transaction.on_commit(invalidate, using=using)
@@ -0,0 +1,141 @@
+"""Token issuance for CustomAuthToken.
+
+Credentials are checked by django.contrib.auth.authenticate(), so the
+configured backends, is_active and the user_login_failed signal apply as
+on any other login. A login is dominated by the password hash check
+(PBKDF2), so this module avoids running it when the outcome is already
+known:
+
+- a username tried from a client with too many recent failures
+  (BLOG_LOGIN_MAX_FAILURES), and a client with too many failures over all
+  usernames (BLOG_LOGIN_CLIENT_MAX_FAILURES), are throttled for
+  BLOG_LOGIN_LOCKOUT seconds. Failures from other clients never lock a
+  user out;
+- a username and password pair that just failed fails again without a
+  hash check. The pair is stored as an HMAC that covers the stored
+  password hash too, so it stops matching once the password changes.
+
+The client is the REMOTE_ADDR of the request, or the address the last
+NUM_PROXIES proxies (REST_FRAMEWORK settings) saw in X-Forwarded-For.
+Counters and failed pairs live in the blog cache, so they are shared by
+every process on a shared cache backend.
+
+The hash check runs on the request's thread: a sync worker, or under
+ASGI the one thread sync views share on Django 3.2, is busy for its
+duration. Limiting the failed checks is what bounds the CPU a login
+storm takes. The issued token goes to the authentication cache, so the
+client's following API requests authenticate without a query.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.utils.crypto import salted_hmac
+from rest_framework.authtoken.models import Token
+from rest_framework.throttling import BaseThrottle
+
+from blog import cache
+from blog.api import authentication
+
+
+class LoginThrottled(Exception):
+
+    def __init__(self, wait):
+        super().__init__("Too many failed login attempts, retry in %d seconds." % wait)
+        self.wait = wait
+
+
+def get_lockout():
+    return getattr(settings, "BLOG_LOGIN_LOCKOUT", 300)
+
+
+def get_client(request):
+    """Return the address of the client; X-Forwarded-For only counts behind NUM_PROXIES proxies."""
+    return BaseThrottle().get_ident(request)
+
+
+def digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def failure_keys(username, client):
+    """Return the failure counter keys of a username tried from a client and of the client, with their limits."""
+    return [
+        ("blog:login:failures:user:%s" % digest("%s\0%s" % (username, client)),
+         getattr(settings, "BLOG_LOGIN_MAX_FAILURES", 5)),
+        ("blog:login:failures:client:%s" % digest(client),
+         getattr(settings, "BLOG_LOGIN_CLIENT_MAX_FAILURES", 50)),
+    ]
+
+
+def failed_user_key(username):
+    """Key marking a username with recently failed pairs, which are only looked up then."""
+    return "blog:login:failed-user:%s" % digest(username)
+
+
+def attempt_key(username, password, stored):
+    """Return the key of a failed pair; ``stored`` is the password hash of the user, if any."""
+    value = salted_hmac("blog.login.attempt", "%s\0%s\0%s" % (username, password, stored), algorithm="sha256")
+    return "blog:login:failed:%s" % value.hexdigest()
+
+
+def get_stored_password(username):
+    """Return the password hash of a username, or "" when no user has it."""
+    UserModel = get_user_model()
+    return UserModel._default_manager.filter(
+        **{UserModel.USERNAME_FIELD: username}
+    ).values_list("password", flat=True).first() or ""
+
+
+def authenticate(request, username, password):
+    """Return the user with these credentials or None; raise LoginThrottled when throttled."""
+    backend = cache.get_cache()
+    client = get_client(request)
+    keys = failure_keys(username, client)
+    values = backend.get_many([key for key, _ in keys] + [failed_user_key(username)])
+    for key, limit in keys:
+        if values.get(key, 0) >= limit:
+            cache.record("login", "throttled")
+            raise LoginThrottled(get_lockout())
+
+    stored = None
+    if failed_user_key(username) in values:
+        stored = get_stored_password(username)
+        if backend.get(attempt_key(username, password, stored)) is not None:
+            cache.record("login", "known_failure")
+            user_login_failed.send(sender=__name__, credentials={"username": username}, request=request)
+            fail(username, password, client, stored)
+            return None
+
+    user = auth.authenticate(request, username=username, password=password)
+    if user is None:
+        fail(username, password, client, stored)
+        return None
+    cache.record("login", "success")
+    return user
+
+
+def fail(username, password, client, stored=None):
+    backend = cache.get_cache()
+    lockout = get_lockout()
+    for key, _ in failure_keys(username, client):
+        backend.add(key, 0, lockout)
+        try:
+            backend.incr(key)
+        except ValueError:
+            backend.set(key, 1, lockout)
+    if stored is None:
+        stored = get_stored_password(username)
+    backend.set_many({failed_user_key(username): True, attempt_key(username, password, stored): True}, lockout)
+    cache.record("login", "failure")
+
+
+def get_token(user):
+    """Return the token of a user, creating it if needed."""
+    token = authentication.get_cached_for_user(user.pk)
+    if token is None:
+        token, _ = Token.objects.get_or_create(user=user)
+        authentication.set_cached(token.key, user, token)
+    return token
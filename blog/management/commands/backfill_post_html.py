@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import cache
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Fill Post.text_html and Post.excerpt for rows saved before they existed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Number of posts rendered and updated per transaction.",
+        )
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Re-render every post, e.g. after changing how texts are rendered.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = Post.objects.only("id", "text").order_by("id")
+        if not options["all"]:
+            posts = posts.filter(text_html="").exclude(text="")
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Keyset batches: each one is rendered and written in its own
+            # short transaction.
+            batch = list(posts.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.render_text()
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, ["text_html", "excerpt"])
+            cache.invalidate_posts([post.id for post in batch])
+            last_id = batch[-1].id
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS("Rendered the text of %d posts." % updated))
@@ -0,0 +1,380 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from importlib import import_module
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, RequestFactory
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import force_authenticate
+from rest_framework.views import APIView
+
+from blog.models import Post, Comment
+from blog.seed import seed, seed_users
+
+
+PASSWORD = "bench-password"
+
+
+class Scenario:
+    """One request to benchmark.
+
+    ``path`` and ``data`` may be callables taking the seeded fixture ids.
+    Scenarios that write run every request inside a rolled back
+    transaction so each iteration sees the same data.
+    """
+
+    def __init__(self, name, method, path, data=None, auth="token", writes=False, content_type=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.auth = auth
+        self.writes = writes
+        self.content_type = content_type
+
+    def resolve(self, fixture):
+        path = self.path(fixture) if callable(self.path) else self.path
+        data = self.data(fixture) if callable(self.data) else self.data
+        return path, data
+
+
+def scenarios():
+    post = lambda f: f["published_post"]
+    draft = lambda f: f["draft_post"]
+    comment = lambda f: f["approved_comment"]
+    pending = lambda f: f["pending_comment"]
+    new_post = lambda f: {"author": f["user"], "title": "Benchmark post", "text": "Benchmark text " * 50}
+    return [
+        # blog/api/urls.py
+        Scenario("api token-auth", "post", "/api-token-auth/", {"username": "bench", "password": PASSWORD}, auth=None),
+        Scenario("api db-pools", "get", "/db/pools/"),
+        Scenario("api post-list", "get", "/post/list/"),
+        Scenario("api post-published", "get", "/post/published/", auth=None),
+        Scenario("api post-publish", "patch", lambda f: "/post/publish/%d/" % draft(f), writes=True),
+        Scenario("api post-publish-bulk", "patch", "/post/publish/bulk/",
+                 lambda f: {"ids": f["draft_posts"]}, writes=True, content_type="application/json"),
+        Scenario("api post-unpublish-bulk", "patch", "/post/unpublish/bulk/",
+                 lambda f: {"ids": f["published_posts"]}, writes=True, content_type="application/json"),
+        Scenario("api post-unpublished", "get", "/post/unpublished/"),
+        Scenario("api posts-create", "post", "/posts/", new_post, writes=True),
+        Scenario("api posts-search", "get", "/posts/search/?q=lorem"),
+        Scenario("api posts-bulk", "post", "/posts/bulk/",
+                 lambda f: [new_post(f)] * 100, writes=True, content_type="application/json"),
+        Scenario("api posts-get", "get", lambda f: "/posts/%d/" % post(f)),
+        Scenario("api posts-put", "put", lambda f: "/posts/%d/" % post(f), new_post,
+                 writes=True, content_type="application/json"),
+        Scenario("api posts-delete", "delete", lambda f: "/posts/%d/" % f["own_post"], writes=True),
+        Scenario("api comments-get", "get", lambda f: "/comments/%d/" % comment(f)),
+        Scenario("api comment-new", "post", "/comment/new/",
+                 lambda f: {"post": post(f), "author": "bench", "text": "Benchmark comment"}, writes=True),
+        Scenario("api comment-approve", "patch", lambda f: "/approve/comment/%d/" % pending(f), writes=True),
+        Scenario("api comment-remove", "delete", lambda f: "/approve/comment/%d/" % pending(f), writes=True),
+        Scenario("api comments-approved", "get", "/comments/approved/", auth=None),
+        Scenario("api comments-pending", "get", "/comments/pending/"),
+        Scenario("api comments-pending-approve", "patch", "/comments/pending/",
+                 lambda f: {"ids": f["pending_comments"]}, writes=True, content_type="application/json"),
+        Scenario("api comments-pending-remove", "delete", "/comments/pending/",
+                 lambda f: {"ids": f["pending_comments"]}, writes=True, content_type="application/json"),
+        Scenario("api post-comments", "get", lambda f: "/post/%d/comments/" % post(f)),
+        Scenario("api export-posts", "get", "/export/posts/?published=true"),
+        Scenario("api export-comments", "get", "/export/comments/?approved=true"),
+        # blog/urls.py
+        Scenario("page post_list", "get", "/", auth=None),
+        Scenario("page post_detail", "get", lambda f: "/post/%d/" % post(f), auth=None),
+        Scenario("page post_search", "get", "/search/?q=lorem", auth=None),
+        Scenario("page post_new", "get", "/post/new/", auth="session"),
+        Scenario("page post_new submit", "post", "/post/new/", {"title": "Benchmark", "text": "Benchmark text"},
+                 auth="session", writes=True),
+        Scenario("page post_edit", "get", lambda f: "/post/%d/edit/" % post(f), auth="session"),
+        Scenario("page post_edit submit", "post", lambda f: "/post/%d/edit/" % post(f),
+                 {"title": "Benchmark", "text": "Benchmark text"}, auth="session", writes=True),
+        Scenario("page post_draft_list", "get", "/drafts/", auth="session"),
+        Scenario("page post_publish", "get", lambda f: "/post/%d/publish/" % draft(f), auth="session", writes=True),
+        Scenario("page post_remove", "get", lambda f: "/post/%d/remove/" % post(f), auth="session", writes=True),
+        Scenario("page add_comment_to_post", "get", lambda f: "/post/%d/comment/" % post(f), auth=None),
+        Scenario("page add_comment_to_post submit", "post", lambda f: "/post/%d/comment/" % post(f),
+                 {"author": "bench", "text": "Benchmark comment"}, auth=None, writes=True),
+        Scenario("page comment_moderation", "get", "/moderation/", auth="session"),
+        Scenario("page comment_moderation submit", "post", "/moderation/",
+                 lambda f: {"action": "approve", "ids": f["pending_comments"]}, auth="session", writes=True),
+        Scenario("page comment_approve", "get", lambda f: "/comment/%d/approve/" % pending(f),
+                 auth="session", writes=True),
+        Scenario("page comment_remove", "get", lambda f: "/comment/%d/remove/" % pending(f),
+                 auth="session", writes=True),
+        Scenario("page metrics", "get", "/metrics/", auth="session"),
+    ]
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and benchmark every blog page and API endpoint. "
+        "Reports throughput, latency percentiles, query counts and peak memory as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--comments-per-post", type=int, default=5)
+        parser.add_argument("--iterations", type=int, default=100, help="Timed requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per scenario first.")
+        parser.add_argument("--memory-iterations", type=int, default=5, help="Requests traced for peak memory.")
+        parser.add_argument("--cold", action="store_true", help="Clear the cache before every request.")
+        parser.add_argument("--only", action="append", default=[], help="Run scenarios whose name contains this.")
+        parser.add_argument("--mode", choices=["client", "factory", "both"], default="both",
+                            help="Full stack through the test client, API views through RequestFactory, or both.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument("--baseline", help="JSON report of an earlier run to compare against.")
+        parser.add_argument("--max-regression", type=float, default=25.0,
+                            help="Percent p95 latency increase over the baseline that fails the run.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--no-test-database", action="store_true",
+                            help="Seed and benchmark the current database, which must be a test database "
+                                 "already, e.g. from a test case, instead of a throwaway one.")
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        if options["no_test_database"]:
+            fixture = self.seed(options)
+            results = self.run_scenarios(fixture, options)
+        else:
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                fixture = self.seed(options)
+                results = self.run_scenarios(fixture, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            "meta": {
+                "timestamp": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "users": options["users"],
+                "posts": options["posts"],
+                "comments_per_post": options["comments_per_post"],
+                "iterations": options["iterations"],
+                "cold": options["cold"],
+            },
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as stream:
+                stream.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["baseline"]:
+            self.check_regressions(results, options["baseline"], options["max_regression"])
+
+    def seed(self, options):
+        """Insert the benchmark data set and return the ids scenarios refer to."""
+        started = time.perf_counter()
+        now = timezone.now()
+        bench = User.objects.create_user("bench", password=PASSWORD, is_staff=True)
+        counts = seed(
+            posts=options["posts"],
+            comments_per_post=options["comments_per_post"],
+            approval_ratio=2 / 3,
+            text_words=200,
+            author_ids=seed_users(options["users"]) or [bench.id],
+            rng=random.Random(options["seed"]),
+        )
+        own_post = Post.objects.create(author=bench, title="Own post", text="Benchmark text", published_date=now)
+
+        posts = Post.objects.exclude(pk=own_post.pk).order_by("pk").values_list("pk", flat=True)
+        comments = Comment.objects.order_by("pk").values_list("pk", flat=True)
+        published = list(posts.filter(published_date__isnull=False)[:50])
+        drafts = list(posts.filter(published_date__isnull=True)[:50])
+        approved = list(comments.filter(approved_comment=True)[:1])
+        pending_ids = list(comments.filter(approved_comment=False)[:50])
+        fixture = {
+            "user": bench.id,
+            "token": bench.auth_token.key,
+            "own_post": own_post.id,
+            "published_post": published[0] if published else None,
+            "published_posts": published[:50],
+            "draft_post": drafts[0] if drafts else None,
+            "draft_posts": drafts[:50],
+            "approved_comment": approved[0] if approved else None,
+            "pending_comment": pending_ids[0] if pending_ids else None,
+            "pending_comments": pending_ids[:50],
+        }
+        self.stderr.write("Seeded %d users, %d posts, %d comments in %.1f s" % (
+            options["users"] + 1, counts["posts"], counts["comments"], time.perf_counter() - started,
+        ))
+        return fixture
+
+    def check_coverage(self, names):
+        """Warn about URL patterns no scenario exercises."""
+        covered = set()
+        for path in names:
+            try:
+                match = resolve(path.split("?")[0])
+            except Exception:
+                continue
+            covered.add(match.route)
+        for urlconf in ("blog.urls", "blog.api.urls"):
+            for pattern in import_module(urlconf).urlpatterns:
+                if str(pattern.pattern) not in covered:
+                    self.stderr.write("No scenario covers %s" % pattern.pattern)
+
+    def run_scenarios(self, fixture, options):
+        selected = [
+            scenario for scenario in scenarios()
+            if not options["only"] or any(name in scenario.name for name in options["only"])
+        ]
+        self.check_coverage([scenario.resolve(fixture)[0] for scenario in scenarios()])
+
+        results = {}
+        modes = ["client", "factory"] if options["mode"] == "both" else [options["mode"]]
+        for scenario in selected:
+            for mode in modes:
+                if mode == "factory" and not self.is_api_view(scenario.resolve(fixture)[0]):
+                    continue
+                name = scenario.name if mode == "client" else "%s (view)" % scenario.name
+                self.stderr.write("Running %s" % name)
+                results[name] = self.run_scenario(scenario, mode, fixture, options)
+        return results
+
+    def is_api_view(self, path):
+        view_class = getattr(resolve(path.split("?")[0]).func, "cls", None)
+        return view_class is not None and issubclass(view_class, APIView)
+
+    def make_requester(self, scenario, mode, fixture):
+        path, data = scenario.resolve(fixture)
+        headers = {}
+        if scenario.auth == "token":
+            headers["HTTP_AUTHORIZATION"] = "Token %s" % fixture["token"]
+        kwargs = {"content_type": scenario.content_type} if scenario.content_type else {}
+        if scenario.content_type == "application/json" and data is not None:
+            data = json.dumps(data)
+
+        if mode == "client":
+            client = Client()
+            if scenario.auth == "session":
+                client.force_login(User.objects.get(pk=fixture["user"]))
+            method = getattr(client, scenario.method)
+
+            def request():
+                return method(path, data, **kwargs, **headers) if data is not None else method(path, **headers)
+            return request
+
+        factory = RequestFactory()
+        match = resolve(path.split("?")[0])
+        user = User.objects.get(pk=fixture["user"])
+        method = getattr(factory, scenario.method)
+
+        def request():
+            request = method(path, data, **kwargs) if data is not None else method(path)
+            if scenario.auth:
+                force_authenticate(request, user=user, token=user.auth_token)
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            return response
+        return request
+
+    def run_once(self, request, scenario, cold):
+        """Run one request, rolling back its writes, and return (seconds, queries, status)."""
+        if cold:
+            cache.clear()
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            with transaction.atomic():
+                response = request()
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                if scenario.writes:
+                    transaction.set_rollback(True)
+            elapsed = time.perf_counter() - started
+        return elapsed, counter.count, response.status_code
+
+    def run_scenario(self, scenario, mode, fixture, options):
+        request = self.make_requester(scenario, mode, fixture)
+        for _ in range(options["warmup"]):
+            self.run_once(request, scenario, options["cold"])
+
+        latencies = []
+        queries = []
+        statuses = {}
+        started = time.perf_counter()
+        for _ in range(options["iterations"]):
+            elapsed, count, status = self.run_once(request, scenario, options["cold"])
+            latencies.append(elapsed)
+            queries.append(count)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        total = time.perf_counter() - started
+
+        tracemalloc.start()
+        peak = 0
+        for _ in range(options["memory_iterations"]):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            self.run_once(request, scenario, options["cold"])
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            "requests_per_second": round(len(latencies) / total, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+            "queries_median": statistics.median(queries),
+            "queries_max": max(queries),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "statuses": statuses,
+        }
+
+    def check_regressions(self, results, baseline_path, max_regression):
+        with open(baseline_path) as stream:
+            baseline = json.load(stream)["results"]
+
+        failures = []
+        for name, result in sorted(results.items()):
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            limit = previous["p95_ms"] * (1 + max_regression / 100)
+            if result["p95_ms"] > limit:
+                failures.append("%s: p95 %.2f ms > %.2f ms (baseline %.2f ms + %g%%)" % (
+                    name, result["p95_ms"], limit, previous["p95_ms"], max_regression,
+                ))
+            if result["queries_max"] > previous["queries_max"]:
+                failures.append("%s: %d queries > %d in the baseline" % (
+                    name, result["queries_max"], previous["queries_max"],
+                ))
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError("%d regressions against %s" % (len(failures), baseline_path))
+        self.stderr.write(self.style.SUCCESS("No regressions against %s" % baseline_path))
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from blog.compression import brotli
+from blog.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the bytes on the wire and the response times of post_list and ListAPIView "
+        "without compression, with gzip and with brotli, in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=200, help="Posts to seed.")
+        parser.add_argument("--repeat", type=int, default=20, help="Requests per variant; the median is reported.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # Pages are rendered per request, with the hashed static names left out.
+            with override_settings(
+                BLOG_STATIC_SITE_ROOT="",
+                STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+            ):
+                self.run(options["posts"], options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, posts, repeat):
+        seed(users=10, posts=posts, comments_per_post=2, approval_ratio=1.0, published_ratio=1.0)
+        client = APIClient()
+        client.force_authenticate(User.objects.first())
+        encodings = [("identity", ""), ("gzip", "gzip")]
+        if brotli is not None:
+            encodings.append(("br", "br, gzip"))
+        self.stdout.write("%d posts, brotli %s" % (posts, "installed" if brotli else "missing"))
+        self.stdout.write("%-28s %10s %7s %9s" % ("response", "bytes", "size", "ms"))
+        for name, path in [("post_list", "/"), ("ListAPIView", "/post/list/")]:
+            baseline = None
+            for label, accept_encoding in encodings:
+                timings = []
+                for _ in range(repeat):
+                    # Time the rendering too, not a cached payload only.
+                    cache.clear()
+                    started = time.perf_counter()
+                    response = client.get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+                    timings.append(time.perf_counter() - started)
+                size = len(response.content)
+                baseline = baseline or size
+                self.stdout.write("%-28s %10d %6.0f%% %9.1f" % (
+                    "%s: %s" % (name, label), size, 100.0 * size / baseline, statistics.median(timings) * 1000,
+                ))
@@ -0,0 +1,77 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.parsers import JSONParser
+
+from blog.api import fieldsets
+from blog.api.parsers import GzipJSONParser, MessagePackParser
+from blog.api.renderers import GzipJSONRenderer, MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from blog.models import Post, Comment
+from blog.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the payload size and the encode and decode times of the API formats, JSON, "
+        "gzip compressed JSON and MessagePack, on list payloads in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Posts, and comments, per list.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per format; the median is reported.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed(users=10, posts=options["rows"], comments_per_post=1, approval_ratio=1.0, published_ratio=1.0)
+            self.stdout.write("%d posts, %d comments, orjson %s, msgpack %s" % (
+                Post.objects.count(), Comment.objects.count(),
+                "installed" if orjson else "missing", "installed" if msgpack else "missing",
+            ))
+            self.stdout.write("%-28s %11s %7s %10s %10s" % ("format", "bytes", "size", "encode ms", "decode ms"))
+            formats = [
+                ("json", ORJSONRenderer(), JSONParser()),
+                ("json gzip", GzipJSONRenderer(), GzipJSONParser()),
+            ]
+            if msgpack is not None:
+                formats.append(("msgpack", MessagePackRenderer(), MessagePackParser()))
+            post_fieldset = fieldsets.get_fieldset({}, fieldsets.POST_FIELDS, fieldsets.POST_LIST_FIELDS)
+            self.compare(options["repeat"], "posts", {
+                "data": post_fieldset.serialize_rows(post_fieldset.query(Post.objects.all())),
+            }, formats)
+            comment_fieldset = fieldsets.get_fieldset(
+                {}, fieldsets.COMMENT_FIELDS, fieldsets.COMMENT_DEFAULT_FIELDS,
+                {"post": (fieldsets.POST_FIELDS, fieldsets.POST_DETAIL_FIELDS)},
+            )
+            self.compare(options["repeat"], "comments", {
+                "data": comment_fieldset.serialize_rows(
+                    comment_fieldset.query(Comment.objects.filter(approved_comment=True))
+                ),
+            }, formats)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def compare(self, repeat, name, data, formats):
+        """Time each format; sizes are relative to the first one."""
+        baseline = None
+        for label, renderer, parser in formats:
+            encode_times = []
+            decode_times = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                body = renderer.render(data)
+                encoded = time.perf_counter()
+                parser.parse(io.BytesIO(body))
+                encode_times.append(encoded - started)
+                decode_times.append(time.perf_counter() - encoded)
+            baseline = baseline or len(body)
+            self.stdout.write("%-28s %11d %6.0f%% %10.1f %10.1f" % (
+                "%s: %s" % (name, label), len(body), 100.0 * len(body) / baseline,
+                statistics.median(encode_times) * 1000, statistics.median(decode_times) * 1000,
+            ))
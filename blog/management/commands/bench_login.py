@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.test import APIRequestFactory
+
+from blog import cache
+from blog.api import authentication
+from blog.api.views import CustomAuthToken
+
+
+PASSWORD = "bench-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare logins per CPU second of the stock ObtainAuthToken view and CustomAuthToken "
+        "for valid logins, a repeated wrong password and a credential stuffing run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200, help="Logins per workload.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            User.objects.create_user("bench", password=PASSWORD)
+            count = options["iterations"]
+            workloads = {
+                "valid": [("bench", PASSWORD)] * count,
+                "wrong password": [("bench", "wrong")] * count,
+                "stuffing": [("user%d" % index, "password%d" % index) for index in range(count)],
+            }
+            views = {"before": ObtainAuthToken.as_view(), "after": CustomAuthToken.as_view()}
+            self.stdout.write("%-16s %-7s %10s %14s %s" % ("workload", "view", "logins/s", "logins/cpu-s", "statuses"))
+            for workload, credentials in workloads.items():
+                for name, view in views.items():
+                    self.run(workload, name, view, credentials)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, workload, name, view, credentials):
+        cache.get_cache().clear()
+        authentication.clear()
+        factory = APIRequestFactory()
+        statuses = {}
+        started, cpu_started = time.perf_counter(), time.process_time()
+        for username, password in credentials:
+            request = factory.post("/api-token-auth/", {"username": username, "password": password})
+            status = view(request).status_code
+            statuses[status] = statuses.get(status, 0) + 1
+        elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+        self.stdout.write("%-16s %-7s %10.1f %14.1f %s" % (
+            workload, name, len(credentials) / elapsed, len(credentials) / cpu,
+            " ".join("%d:%d" % item for item in sorted(statuses.items())),
+        ))
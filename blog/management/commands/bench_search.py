@@ -0,0 +1,67 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.models import Post
+from blog.search import search_posts
+from blog.seed import VOCABULARY, random_text, seed
+
+
+class Command(BaseCommand):
+    help = "Compare full-text search against icontains scans for the first page of results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed-posts", type=int, default=0, help="Number of posts to insert first.")
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["seed_posts"]:
+            self.seed(options["seed_posts"], options["batch_size"])
+
+        total = Post.objects.count()
+        limit = options["limit"]
+        # Common queries draw from the Zipf head, rare ones from the tail.
+        workloads = {
+            "common": [random_text(random.randint(1, 2)) for _ in range(options["queries"])],
+            "rare": [random.choice(VOCABULARY[len(VOCABULARY) // 2:]) for _ in range(options["queries"])],
+        }
+        self.stdout.write("Benchmarking %d queries per workload over %d posts" % (options["queries"], total))
+
+        for workload, queries in workloads.items():
+            self.report("%s full-text" % workload, [
+                self.timed(lambda: search_posts(query, limit=limit)) for query in queries
+            ])
+            self.report("%s icontains" % workload, [
+                self.timed(lambda: list(self.icontains(query)[:limit])) for query in queries
+            ])
+
+    def icontains(self, query):
+        posts = Post.objects.all()
+        for term in query.split():
+            posts = posts.filter(Q(title__icontains=term) | Q(text__icontains=term))
+        return posts.order_by("id")
+
+    def timed(self, run):
+        started = time.perf_counter()
+        run()
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, name, timings):
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            "%-18s median %8.2f ms   p95 %8.2f ms   max %8.2f ms"
+            % (name, statistics.median(timings), p95, timings[-1])
+        )
+
+    def seed(self, count, batch_size):
+        user, _ = User.objects.get_or_create(username="bench")
+        started = time.perf_counter()
+        seed(posts=count, max_comments=0, published_ratio=1.0, title_words=5, author_ids=[user.id], batch_size=batch_size)
+        self.stdout.write("Seeded %d posts in %.1f s" % (count, time.perf_counter() - started))
@@ -0,0 +1,121 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from blog.api import fieldsets
+from blog.api.renderers import ORJSONRenderer, orjson
+from blog.api.serializers import PostSerializer
+from blog.models import Post, Comment
+from blog.seed import seed
+
+
+def build_posts_from_instances(posts):
+    """The payload loop PostsDataMixin ran before the values() path."""
+    return [{
+        "id": post.id,
+        "title": post.title,
+        "text": post.text,
+        "text_html": post.body_html,
+        "excerpt": post.excerpt,
+        "is_published": post.is_published(),
+        "approved_comment_count": post.approved_comment_count,
+    } for post in posts]
+
+
+def build_comments_from_instances(comments):
+    """The payload loop CommentsDataMixin ran before the values() path."""
+    data = []
+    posts_data = {}
+    for comment in comments:
+        if comment.post_id not in posts_data:
+            post = comment.post
+            posts_data[comment.post_id] = {
+                "id": post.id,
+                "title": post.title,
+                "text": post.text,
+                "text_html": post.body_html,
+                "excerpt": post.excerpt,
+                "author": post.author_id,
+                "is_published": post.is_published(),
+                "approved_comment_count": post.approved_comment_count,
+            }
+        data.append({
+            "id": comment.id,
+            "post": posts_data[comment.post_id],
+            "author": comment.author,
+            "text": comment.text,
+            "is_approved": comment.is_approved(),
+        })
+    return data
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare building and rendering API list payloads from model instances and JSONRenderer "
+        "against Fieldset values() rows and ORJSONRenderer, in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Posts, and comments, per list.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the median is reported.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed(users=10, posts=options["rows"], comments_per_post=1, approval_ratio=1.0, published_ratio=1.0)
+            self.stdout.write("%d posts, %d comments, orjson %s" % (
+                Post.objects.count(), Comment.objects.count(), "installed" if orjson else "missing",
+            ))
+            self.stdout.write("%-38s %9s %9s %9s %14s %9s" % (
+                "variant", "fetch ms", "build ms", "render ms", "serialization", "overall",
+            ))
+            post_fieldset = fieldsets.get_fieldset({}, fieldsets.POST_FIELDS, fieldsets.POST_LIST_FIELDS)
+            self.compare(options["repeat"], "posts", [
+                ("instances + JSONRenderer", lambda: list(Post.objects.all()), build_posts_from_instances, JSONRenderer()),
+                ("PostSerializer + JSONRenderer", lambda: list(Post.objects.all()),
+                 lambda rows: PostSerializer(rows, many=True).data, JSONRenderer()),
+                ("values + JSONRenderer", lambda: list(post_fieldset.query(Post.objects.all())),
+                 post_fieldset.serialize_rows, JSONRenderer()),
+                ("values + ORJSONRenderer", lambda: list(post_fieldset.query(Post.objects.all())),
+                 post_fieldset.serialize_rows, ORJSONRenderer()),
+            ])
+            comment_fieldset = fieldsets.get_fieldset(
+                {}, fieldsets.COMMENT_FIELDS, fieldsets.COMMENT_DEFAULT_FIELDS,
+                {"post": (fieldsets.POST_FIELDS, fieldsets.POST_DETAIL_FIELDS)},
+            )
+            self.compare(options["repeat"], "comments", [
+                ("instances + JSONRenderer", lambda: list(Comment.objects.filter(approved_comment=True).select_related("post")),
+                 build_comments_from_instances, JSONRenderer()),
+                ("values + ORJSONRenderer", lambda: list(comment_fieldset.query(Comment.objects.filter(approved_comment=True))),
+                 comment_fieldset.serialize_rows, ORJSONRenderer()),
+            ])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def compare(self, repeat, name, variants):
+        """Time each variant; speedups are relative to the first one."""
+        baseline = None
+        for label, fetch, build, renderer in variants:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = fetch()
+                fetched = time.perf_counter()
+                data = build(rows)
+                built = time.perf_counter()
+                renderer.render(data)
+                timings.append((fetched - started, built - fetched, time.perf_counter() - built))
+            fetch_ms, build_ms, render_ms = (
+                statistics.median(timing[part] for timing in timings) * 1000 for part in range(3)
+            )
+            baseline = baseline or (build_ms + render_ms, fetch_ms + build_ms + render_ms)
+            self.stdout.write("%-38s %9.1f %9.1f %9.1f %13.1fx %8.1fx" % (
+                "%s: %s" % (name, label), fetch_ms, build_ms, render_ms,
+                baseline[0] / (build_ms + render_ms), baseline[1] / (fetch_ms + build_ms + render_ms),
+            ))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import static_site
+
+
+class Command(BaseCommand):
+    help = "Render every public page to BLOG_STATIC_SITE_ROOT, spreading the work over worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, help="Worker processes, one per CPU core by default.")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Posts rendered per task.")
+
+    def handle(self, *args, **options):
+        if static_site.get_root() is None:
+            raise CommandError("BLOG_STATIC_SITE_ROOT is not set.")
+        started = time.perf_counter()
+        written = static_site.build(options["workers"], options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS("Wrote %d pages to %s in %.1f s." % (
+            written, static_site.get_root(), time.perf_counter() - started,
+        )))
@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from blog.models import Post, Comment
+from blog.seed import seed
+
+
+HOT_QUERIES = {
+    "post_list": lambda: Post.objects.filter(published_date__lte=timezone.now()).order_by("published_date"),
+    "published_posts_api": lambda: Post.objects.filter(published_date__isnull=False).order_by("published_date", "id")[:11],
+    "post_draft_list": lambda: Post.objects.filter(published_date__isnull=True).order_by("created_date"),
+    "unpublished_posts_api": lambda: Post.objects.filter(published_date=None).order_by("created_date", "id")[:11],
+    "approved_comments_api": lambda: Comment.objects.filter(approved_comment=True),
+    "post_comments": lambda: Comment.objects.filter(post=1).order_by("created_date"),
+    "post_approved_comments": lambda: Comment.objects.filter(post=1, approved_comment=True).order_by("created_date"),
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plan and timing of every hot blog query with and without "
+        "the publish/approval indexes. Optionally seeds data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed-posts", type=int, default=0, help="Number of posts to insert before explaining.")
+        parser.add_argument("--comments-per-post", type=int, default=3)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options["seed_posts"]:
+            self.seed(options["seed_posts"], options["comments_per_post"], options["batch_size"])
+
+        self.stdout.write(self.style.MIGRATE_HEADING("With indexes"))
+        self.explain_all("with indexes")
+
+        try:
+            with transaction.atomic():
+                self.drop_indexes()
+                self.stdout.write(self.style.MIGRATE_HEADING("Without indexes"))
+                self.explain_all("without indexes")
+                raise Rollback
+        except Rollback:
+            pass
+
+    def explain_all(self, phase):
+        for name, build in HOT_QUERIES.items():
+            queryset = build()
+            plan = self.explain(queryset, phase)
+            started = time.perf_counter()
+            list(queryset.values_list("id", flat=True)[:1000])
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write("%s (%.2f ms)" % (name, elapsed))
+            for line in plan.splitlines():
+                self.stdout.write("    " + line)
+
+    def explain(self, queryset, phase):
+        # The phase comment keeps sqlite3's statement cache from returning
+        # the plan prepared before the indexes were dropped.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("%s %s /* %s */" % (connection.ops.explain_query_prefix(), sql, phase), params)
+            rows = cursor.fetchall()
+        return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in (Post, Comment):
+                for index in model._meta.indexes:
+                    cursor.execute("DROP INDEX %s" % connection.ops.quote_name(index.name))
+
+    def seed(self, count, comments_per_post, batch_size):
+        user, _ = User.objects.get_or_create(username="explain")
+        started = time.perf_counter()
+        seed(posts=count, comments_per_post=comments_per_post, author_ids=[user.id], batch_size=batch_size)
+        self.stdout.write("Seeded %d posts in %.1f s" % (count, time.perf_counter() - started))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import export
+
+
+class Command(BaseCommand):
+    help = "Stream posts or comments as NDJSON or CSV to stdout or a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=["posts", "comments"])
+        parser.add_argument("--format", dest="output", choices=sorted(export.FORMATS), default="ndjson")
+        parser.add_argument("--published", choices=["true", "false"], help="Only (un)published posts, or comments on them.")
+        parser.add_argument("--approved", choices=["true", "false"], help="Only (un)approved comments.")
+        parser.add_argument("--since", help="Only rows created at or after this ISO date or datetime.")
+        parser.add_argument("--author", help="Post author id or username, or comment author name.")
+        parser.add_argument("--file", help="Write to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            filters = {
+                "published": export.parse_flag(options["published"]) if options["published"] else None,
+                "since": export.parse_since(options["since"]) if options["since"] else None,
+                "author": options["author"],
+            }
+            if options["model"] == "comments":
+                filters["approved"] = export.parse_flag(options["approved"]) if options["approved"] else None
+                fields, rows = export.COMMENT_FIELDS, export.get_comments(**filters)
+            else:
+                fields, rows = export.POST_FIELDS, export.get_posts(**filters)
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        lines = export.render(options["output"], fields, rows)
+        if options["file"]:
+            with open(options["file"], "w", encoding="utf-8", newline="") as stream:
+                stream.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
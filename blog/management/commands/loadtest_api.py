@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server with many concurrent keep-alive connections "
+        "and report requests per second and latency percentiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="http:// URL to request, e.g. http://127.0.0.1:8000/post/published/")
+        parser.add_argument("--connections", type=int, default=500)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run.")
+        parser.add_argument("--token", help="API token sent as 'Authorization: Token <token>'.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http":
+            raise CommandError("Only http:// URLs are supported.")
+        headers = ["Host: %s" % url.netloc, "Connection: keep-alive"]
+        if options["token"]:
+            headers.append("Authorization: Token %s" % options["token"])
+        target = url.path or "/"
+        if url.query:
+            target += "?" + url.query
+        request = "GET %s HTTP/1.1\r\n%s\r\n\r\n" % (target, "\r\n".join(headers))
+
+        latencies, errors, elapsed = asyncio.run(self.run(
+            url.hostname, url.port or 80, request.encode(),
+            options["connections"], options["duration"], options["timeout"],
+        ))
+        if not latencies:
+            raise CommandError("No request succeeded (%d errors)." % errors)
+
+        latencies.sort()
+        self.stdout.write("%d connections, %.1f s" % (options["connections"], elapsed))
+        self.stdout.write("requests  %8d   errors %d" % (len(latencies), errors))
+        self.stdout.write("req/s     %8.1f" % (len(latencies) / elapsed))
+        for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            value = latencies[min(len(latencies) - 1, int(len(latencies) * quantile))]
+            self.stdout.write("%-9s %8.1f ms" % (name, value * 1000))
+        self.stdout.write("mean      %8.1f ms" % (statistics.mean(latencies) * 1000))
+
+    async def run(self, host, port, request, connections, duration, timeout):
+        latencies = []
+        errors = [0]
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            self.connection(host, port, request, deadline, timeout, latencies, errors)
+            for _ in range(connections)
+        ])
+        return latencies, errors[0], time.perf_counter() - started
+
+    async def connection(self, host, port, request, deadline, timeout, latencies, errors):
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(self.read_response(reader), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                errors[0] += 1
+                writer = self.close(writer)
+                await asyncio.sleep(0.01)
+                continue
+            if status >= 400:
+                errors[0] += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+            if not keep_alive:
+                writer = self.close(writer)
+        self.close(writer)
+
+    async def read_response(self, reader):
+        """Read one response and return its status and whether the connection stays open."""
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await reader.readexactly(int(headers.get("content-length", 0)))
+        return status, headers.get("connection", "").lower() != "close"
+
+    def close(self, writer):
+        if writer is not None:
+            writer.close()
+        return None
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min
+
+from blog import cache, static_site
+from blog.bulk import approved_comment_count, recount_posts
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.approved_comment_count from the comments table to repair drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=10000,
+            help="Number of post ids recounted per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        expected = approved_comment_count()
+
+        bounds = Post.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            self.stdout.write("No posts to recount.")
+            return
+
+        repaired = 0
+        for start in range(bounds["low"], bounds["high"] + 1, batch_size):
+            # Each id range is recounted in its own short transaction so a
+            # full repair never holds row locks on the whole table.
+            with transaction.atomic():
+                posts = Post.objects.filter(id__gte=start, id__lt=start + batch_size)
+                drifted = list(
+                    posts.annotate(expected=expected)
+                    .exclude(approved_comment_count=F("expected"))
+                    .values_list("id", flat=True)
+                )
+                # Chunked like the other bulk writes, under the SQLite parameter limit.
+                recount_posts(drifted)
+            if drifted:
+                cache.invalidate_posts(drifted)
+                # The pages show the counts too.
+                static_site.schedule(drifted)
+            repaired += len(drifted)
+
+        self.stdout.write(self.style.SUCCESS("Repaired approved comment counts on %d posts." % repaired))
+
@@ -0,0 +1,46 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.seed import seed
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic users, posts and comments with realistic distributions for scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--posts", type=int, default=100000)
+        parser.add_argument("--max-comments", type=int, default=50,
+                            help="Comments per post follow a Zipf distribution over 0..max-1.")
+        parser.add_argument("--zipf", type=float, default=1.2, help="Zipf exponent of comments per post.")
+        parser.add_argument("--approval-ratio", type=float, default=0.7)
+        parser.add_argument("--published-ratio", type=float, default=0.8)
+        parser.add_argument("--days", type=int, default=3 * 365, help="Spread creation dates over this many days.")
+        parser.add_argument("--words", type=int, default=80, help="Words per post text.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, help="Random seed, for reproducible data sets.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(done):
+            self.stdout.write("%d/%d posts (%.0f s)" % (done, options["posts"], time.perf_counter() - started))
+
+        counts = seed(
+            users=options["users"],
+            posts=options["posts"],
+            max_comments=options["max_comments"],
+            zipf_exponent=options["zipf"],
+            approval_ratio=options["approval_ratio"],
+            published_ratio=options["published_ratio"],
+            days=options["days"],
+            text_words=options["words"],
+            batch_size=options["batch_size"],
+            rng=random.Random(options["seed"]),
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS("Seeded %d users, %d posts and %d comments in %.1f s." % (
+            counts["users"], counts["posts"], counts["comments"], time.perf_counter() - started,
+        )))
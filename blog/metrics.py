@@ -0,0 +1,240 @@
+"""Per-route request instrumentation.
+
+MetricsMiddleware times a sampled share of requests (the
+BLOG_METRICS_SAMPLE_RATE setting) and records, per URL route:
+
+- the request duration,
+- the number of SQL queries and the time spent running them,
+- the time spent rendering templates (InstrumentedDjangoTemplates),
+- the time spent serializing API responses (blog.api.renderers).
+
+Sampled responses carry the timings in a Server-Timing header. The
+histograms are kept per process and exported in the Prometheus text
+format by metrics_view.
+"""
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.template.backends.django import DjangoTemplates, Template
+
+from blog import cache
+from blog.db import pool_stats
+
+
+# Upper bounds in seconds, and in queries for the query count histogram.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+METRICS = {
+    "request_duration_seconds": ("Request duration.", DURATION_BUCKETS),
+    "db_queries": ("SQL queries per request.", COUNT_BUCKETS),
+    "db_duration_seconds": ("Time spent running SQL queries per request.", DURATION_BUCKETS),
+    "template_duration_seconds": ("Time spent rendering templates per request.", DURATION_BUCKETS),
+    "serialize_duration_seconds": ("Time spent rendering API responses per request.", DURATION_BUCKETS),
+}
+
+# Connection pool statistics (blog.db.ConnectionPool.stats()) that only grow;
+# the others, sizes and maximums, are gauges.
+POOL_COUNTERS = {
+    "connections_opened",
+    "connections_discarded",
+    "checkouts",
+    "waits",
+    "timeouts",
+    "wait_seconds_total",
+    "checkout_seconds_total",
+}
+
+_current = ContextVar("blog_metrics", default=None)
+
+
+class Histogram:
+    """A cumulative histogram with fixed bucket bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def observe(name, route, method, value):
+    with _histograms_lock:
+        key = (name, route, method)
+        if key not in _histograms:
+            _histograms[key] = Histogram(METRICS[name][1])
+        _histograms[key].observe(value)
+
+
+def reset():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+class Timings:
+    """Timings collected for the request being served."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.serialize = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+def add_time(name, seconds):
+    """Add ``seconds`` to the ``name`` timing of the current request, if it is sampled."""
+    timings = _current.get()
+    if timings is not None:
+        setattr(timings, name, getattr(timings, name) + seconds)
+
+
+def get_route(request):
+    """Return the URL name or route pattern the request resolved to."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.url_name or match.route or match.view_name
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= getattr(settings, "BLOG_METRICS_SAMPLE_RATE", 1.0):
+            return self.get_response(request)
+
+        timings = Timings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+
+        route = get_route(request)
+        method = request.method
+        observe("request_duration_seconds", route, method, duration)
+        observe("db_queries", route, method, timings.queries)
+        observe("db_duration_seconds", route, method, timings.db)
+        observe("template_duration_seconds", route, method, timings.template)
+        observe("serialize_duration_seconds", route, method, timings.serialize)
+        response["Server-Timing"] = ", ".join([
+            'db;dur=%.2f;desc="%d queries"' % (timings.db * 1000, timings.queries),
+            "template;dur=%.2f" % (timings.template * 1000),
+            "serialize;dur=%.2f" % (timings.serialize * 1000),
+            "total;dur=%.2f" % (duration * 1000),
+        ])
+        return response
+
+
+class InstrumentedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            add_time("template", time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus():
+    """Return the metrics of this process in the Prometheus text format."""
+    with _histograms_lock:
+        snapshot = {
+            key: (list(histogram.counts), histogram.sum, histogram.count)
+            for key, histogram in _histograms.items()
+        }
+
+    lines = []
+    for name, (description, buckets) in METRICS.items():
+        metric = "blog_%s" % name
+        lines.append("# HELP %s %s" % (metric, description))
+        lines.append("# TYPE %s histogram" % metric)
+        for (key_name, route, method), (counts, total, count) in sorted(snapshot.items()):
+            if key_name != name:
+                continue
+            labels = 'route="%s",method="%s"' % (escape_label(route), escape_label(method))
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append('%s_bucket{%s,le="%s"} %d' % (metric, labels, bound, cumulative))
+            lines.append("%s_sum{%s} %s" % (metric, labels, repr(total)))
+            lines.append("%s_count{%s} %d" % (metric, labels, count))
+
+    lines.append("# HELP blog_cache_requests_total API payload cache lookups by outcome.")
+    lines.append("# TYPE blog_cache_requests_total counter")
+    for namespace, outcomes in sorted(cache.stats().items()):
+        for outcome, count in sorted(outcomes.items()):
+            lines.append('blog_cache_requests_total{namespace="%s",outcome="%s"} %d' % (
+                escape_label(namespace), escape_label(outcome), count,
+            ))
+
+    # Samples are grouped by metric, each after its TYPE line.
+    pools = sorted(pool_stats().items())
+    for name in sorted({name for _, stats in pools for name in stats}):
+        metric = "blog_db_pool_%s" % name
+        lines.append("# TYPE %s %s" % (metric, "counter" if name in POOL_COUNTERS else "gauge"))
+        for alias, stats in pools:
+            if name in stats:
+                lines.append('%s{alias="%s"} %s' % (metric, escape_label(alias), stats[name]))
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Serve the metrics to staff users, or to bearers of BLOG_METRICS_TOKEN."""
+    token = getattr(settings, "BLOG_METRICS_TOKEN", "")
+    authorized = request.user.is_staff or (
+        token and constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), "Bearer %s" % token)
+    )
+    if not authorized:
+        return HttpResponse(status=403)
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
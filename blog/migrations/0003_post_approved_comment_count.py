@@ -0,0 +1,37 @@
+# Generated by Django 3.2.12 on 2026-10-18 02:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def count_approved_comments(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    approved = (
+        Comment.objects.filter(post=OuterRef('pk'), approved_comment=True)
+        .order_by().values('post').annotate(count=Count('id')).values('count')
+    )
+    Post.objects.update(approved_comment_count=Coalesce(Subquery(approved), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='approved_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_comments', to='blog.post'),
+        ),
+        migrations.RunPython(count_approved_comments, migrations.RunPython.noop),
+    ]
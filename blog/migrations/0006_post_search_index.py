@@ -0,0 +1,64 @@
+# Generated by Django 3.2.12 on 2026-10-18 03:20
+
+from django.db import migrations
+
+
+# A frozen copy of the SQL in blog.search, so that later changes to that
+# module do not change what this migration does.
+SQLITE_INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5(
+        title, text, content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_update AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_insert",
+    "DROP TRIGGER IF EXISTS blog_post_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_post_fts_update",
+    "DROP TABLE IF EXISTS blog_post_fts",
+]
+
+POSTGRESQL_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS blog_post_search_idx ON blog_post USING GIN "
+    "(to_tsvector('english', title || ' ' || text))",
+]
+
+POSTGRESQL_UNINSTALL = [
+    "DROP INDEX IF EXISTS blog_post_search_idx",
+]
+
+
+def run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def forwards(apps, schema_editor):
+    run(schema_editor, {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRESQL_INSTALL})
+
+
+def backwards(apps, schema_editor):
+    run(schema_editor, {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRESQL_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.12 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('approved_comment', False)), fields=['created_date', 'id'], name='blog_comment_pending_idx'),
+        ),
+    ]
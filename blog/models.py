@@ -1,12 +1,30 @@
+from collections import Counter
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
 from rest_framework.authtoken.models import Token
 
+from blog import cache
+
+
+EXCERPT_WORDS = 50
+
+
+def render_body(text_html, text):
+    """Return the stored HTML of a post text, or render ``text`` if none is stored yet."""
+    if text_html or not text:
+        return text_html
+    return linebreaksbr(text)
+
 
 class Post(models.Model):
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -14,6 +32,45 @@ class Post(models.Model):
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
     published_date = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    approved_comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # Derived from text on save, so that pages and the API do not run
+    # linebreaksbr or truncate long texts on every request.
+    text_html = models.TextField(blank=True, default="", editable=False)
+    excerpt = models.TextField(blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # post_list and the published posts API: published_date ordered, id tie-breaker.
+            models.Index(
+                fields=["published_date", "id"],
+                name="blog_post_published_idx",
+                condition=models.Q(published_date__isnull=False),
+            ),
+            # post_draft_list and the unpublished posts API.
+            models.Index(
+                fields=["created_date", "id"],
+                name="blog_post_draft_idx",
+                condition=models.Q(published_date__isnull=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.render_text()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"text_html", "excerpt"}
+        super().save(*args, **kwargs)
+
+    def render_text(self):
+        """Compute text_html and excerpt from text."""
+        self.text_html = linebreaksbr(self.text)
+        self.excerpt = Truncator(self.text).words(EXCERPT_WORDS)
+
+    @property
+    def body_html(self):
+        """The rendered text, rendering it on the fly for rows the backfill has not reached."""
+        return mark_safe(render_body(self.text_html, self.text))
 
     def publish(self):
         """Method to publish the post."""
@@ -26,13 +83,116 @@ class Post(models.Model):
     def is_published(self):
         """Check if post is published."""
         return self.published_date is not None
+
+    def approved_comments(self):
+        return self.post_comments.filter(approved_comment=True)
     
+class CommentQuerySet(models.QuerySet):
+
+    def delete(self):
+        """Delete the comments through blog.bulk, like Comment.delete(), e.g. for the admin's bulk action."""
+        from blog.bulk import delete_comments  # blog.bulk imports this module.
+
+        deleted = len(delete_comments(list(self.values_list("pk", flat=True))))
+        return deleted, {self.model._meta.label: deleted}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Comment(models.Model):
-    post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, related_name='post_comments')
+    # Indexed through blog_comment_post_idx, which has post as its leading column.
+    post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, related_name='post_comments', db_index=False)
     author = models.CharField(max_length=200)
     text = models.TextField()
     created_date = models.DateTimeField(default=timezone.now)
     approved_comment = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Comments of a post in thread order.
+            models.Index(
+                fields=["post", "created_date"],
+                name="blog_comment_post_idx",
+            ),
+            # Approved comments of a post in thread order.
+            models.Index(
+                fields=["post", "created_date"],
+                name="blog_comment_post_approved_idx",
+                condition=models.Q(approved_comment=True),
+            ),
+            # The approved comments API.
+            models.Index(
+                fields=["id"],
+                name="blog_comment_approved_idx",
+                condition=models.Q(approved_comment=True),
+            ),
+            # The moderation queue: pending comments, oldest first.
+            models.Index(
+                fields=["created_date", "id"],
+                name="blog_comment_pending_idx",
+                condition=models.Q(approved_comment=False),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "approved_comment" in field_names and "post_id" in field_names:
+            instance._stored_post_id = instance.post_id
+            instance._stored_approved = instance.approved_comment
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the comment and keep the approved comment counts of its old and new post in step."""
+        if self._state.adding:
+            self._stored_post_id, self._stored_approved = self.post_id, False
+        elif not hasattr(self, "_stored_approved"):
+            self._stored_post_id, self._stored_approved = Comment.objects.filter(pk=self.pk).values_list(
+                "post_id", "approved_comment",
+            ).first() or (self.post_id, False)
+        old_post_id = self._stored_post_id
+        deltas = Counter()
+        if self._stored_approved:
+            deltas[old_post_id] -= 1
+        if self.approved_comment:
+            deltas[self.post_id] += 1
+        recounted = [post_id for post_id, delta in deltas.items() if delta]
+        # One transaction, so that on_commit callbacks of the post_save
+        # receivers see the updated counts.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            self._stored_post_id, self._stored_approved = self.post_id, self.approved_comment
+            for post_id in recounted:
+                Post.objects.filter(pk=post_id).update(
+                    approved_comment_count=F("approved_comment_count") + deltas[post_id]
+                )
+        comment_id, moved = self.pk, old_post_id != self.post_id
+
+        def invalidate():
+            if recounted:
+                cache.invalidate_posts(recounted)
+            if moved:
+                # The post_save receiver invalidates the new thread.
+                cache.invalidate_comments([comment_id], [old_post_id])
+
+        if recounted or moved:
+            transaction.on_commit(invalidate, using=kwargs.get("using"))
+
+    def delete(self, using=None, keep_parents=False):
+        """Delete the comment and keep the post's count, the caches and the static pages in step.
+
+        Comments have no delete receivers, so that deleting a post removes
+        its comments in one query instead of loading and signalling each.
+        """
+        from blog.bulk import delete_comments  # blog.bulk imports this module.
+
+        deleted = len(delete_comments([self.pk]))
+        self.pk = None
+        return deleted, {self._meta.label: deleted}
 
     def approve(self):
         self.approved_comment = True
@@ -41,14 +201,39 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
     
-    def approved_comments(self):
-        return self.comments.filter(approved_comment=True)
-    
     def is_approved(self):
         """Check if the comment is approved."""
         return self.approved_comment is True
     
 
+# Invalidation waits for the commit: bumped before it, a version could be
+# refilled by a concurrent reader from the rows the change has not replaced yet.
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance=None, using=None, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(lambda: cache.invalidate_post(post_id), using=using)
+
+
+@receiver(pre_delete, sender=Post)
+def collect_comment_ids(sender, instance=None, **kwargs):
+    instance._deleted_comment_ids = list(instance.post_comments.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_comments(sender, instance=None, using=None, **kwargs):
+    # The comments went with the post in one query, without signals.
+    comment_ids, post_id = instance._deleted_comment_ids, instance.pk
+    transaction.on_commit(lambda: cache.invalidate_comments(comment_ids, [post_id]), using=using)
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_comment_cache(sender, instance=None, using=None, **kwargs):
+    comment_id, post_id = instance.pk, instance.post_id
+    transaction.on_commit(lambda: cache.invalidate_comment(comment_id, post_id), using=using)
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
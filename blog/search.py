@@ -0,0 +1,226 @@
+"""Full-text search over post titles and texts.
+
+SQLite keeps an FTS5 index (blog_post_fts) that triggers update on every
+insert, update and delete of blog_post, including bulk operations that
+send no signals. PostgreSQL uses a GIN index over the same tsvector
+expression the search query uses, so the index is maintained by the
+database itself.
+
+Results are ordered by ascending score (best first) and id, which the
+keyset pagination in blog.api.pagination uses as cursor.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from blog.models import Post
+
+
+# Private use characters mark highlighted terms so that the surrounding
+# text can be escaped before they are turned into <mark> tags.
+START_MARK = "\ue000"
+END_MARK = "\ue001"
+
+PG_VECTOR = "to_tsvector('english', title || ' ' || text)"
+
+SQLITE_INSTALL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5(
+        title, text, content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_update AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_fts(rowid, title, text) VALUES (new.id, new.title, new.text);
+    END""",
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_insert",
+    "DROP TRIGGER IF EXISTS blog_post_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_post_fts_update",
+    "DROP TABLE IF EXISTS blog_post_fts",
+]
+
+POSTGRESQL_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS blog_post_search_idx ON blog_post USING GIN (%s)" % PG_VECTOR,
+]
+
+POSTGRESQL_UNINSTALL = [
+    "DROP INDEX IF EXISTS blog_post_search_idx",
+]
+
+SearchHit = namedtuple(
+    "SearchHit",
+    ["id", "title", "text", "author_id", "published_date", "score", "title_highlight", "excerpt"],
+)
+
+
+def install_index(schema_editor):
+    """Create the search index and its triggers. Safe to run more than once.
+
+    SQLite drops triggers when Django rebuilds blog_post during an
+    AlterField/AddField migration, so such migrations must recreate them,
+    from a copy of SQLITE_INSTALL kept in the migration (see 0008).
+    """
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRESQL_INSTALL}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRESQL_UNINSTALL}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_triggers(connection):
+    """Drop the SQLite index triggers ahead of a large bulk insert.
+
+    Returns True if they were dropped; restore_triggers() then recreates
+    them and rebuilds the index in one pass, which is much faster than
+    updating it row by row.
+    """
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'blog_post_fts_insert'")
+        if cursor.fetchone() is None:
+            return False
+        for statement in SQLITE_UNINSTALL[:3]:
+            cursor.execute(statement)
+    return True
+
+
+def restore_triggers(connection):
+    """Recreate the triggers removed by drop_triggers() and rebuild the index."""
+    with connection.cursor() as cursor:
+        for statement in SQLITE_INSTALL[1:]:
+            cursor.execute(statement)
+
+
+def get_terms(query):
+    """Split a user query into lower-cased word terms."""
+    return re.findall(r"\w+", query.lower())
+
+
+def build_match(terms, vendor):
+    """Return the backend match expression requiring every term as a prefix."""
+    if vendor == "postgresql":
+        return " & ".join("%s:*" % term for term in terms)
+    return " ".join('"%s"*' % term for term in terms)
+
+
+def highlight(value):
+    """Escape a highlighted string and turn the term markers into <mark> tags."""
+    value = escape(value).replace(START_MARK, "<mark>").replace(END_MARK, "</mark>")
+    return mark_safe(value)
+
+
+def search_posts(query, after=None, descending=False, limit=10, published_only=False, using="default"):
+    """Return up to ``limit`` SearchHits matching every term of ``query`` as a prefix.
+
+    ``after`` is the (score, id) of the row to continue after in the
+    requested direction. Lower scores rank better on every backend.
+    """
+    terms = get_terms(query)
+    if not terms:
+        return []
+    connection = connections[using]
+    vendor = connection.vendor
+    match = build_match(terms, vendor)
+
+    if vendor == "postgresql":
+        ranked = (
+            "SELECT id, -ts_rank({vector}, to_tsquery('english', %s)) AS score FROM blog_post "
+            "WHERE {vector} @@ to_tsquery('english', %s)"
+        ).format(vector=PG_VECTOR)
+        params = [match, match]
+    elif vendor == "sqlite":
+        ranked = (
+            "SELECT rowid AS id, bm25(blog_post_fts, 10.0, 1.0) AS score "
+            "FROM blog_post_fts WHERE blog_post_fts MATCH %s"
+        )
+        params = [match]
+    else:
+        return search_posts_by_scan(terms, after, descending, limit, published_only, using)
+
+    # Rank and page on (score, id) alone, then join the page to its posts,
+    # so the sort never carries titles and texts of every match.
+    page = "SELECT r.id, r.score FROM (%s) r" % ranked
+    if published_only:
+        page += " JOIN blog_post d ON d.id = r.id WHERE d.published_date IS NOT NULL"
+    else:
+        page += " WHERE 1 = 1"
+    if after is not None:
+        operator = "<" if descending else ">"
+        page += " AND (r.score {op} %s OR (r.score = %s AND r.id {op} %s))".format(op=operator)
+        params += [after[0], after[0], after[1]]
+    direction = "DESC" if descending else "ASC"
+    order = " ORDER BY r.score {dir}, r.id {dir}".format(dir=direction)
+    page += order + " LIMIT %s"
+    params.append(limit)
+    sql = (
+        "SELECT p.id, p.title, p.text, p.author_id, p.published_date, r.score "
+        "FROM (%s) r JOIN blog_post p ON p.id = r.id" % page
+    ) + order
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    highlights = get_highlights(connection, match, [row[0] for row in rows])
+    return [SearchHit(*row, *highlights.get(row[0], (escape(row[1]), escape(row[2][:200])))) for row in rows]
+
+
+def get_highlights(connection, match, ids):
+    """Return {id: (title_highlight, excerpt)} for one page of results."""
+    if not ids:
+        return {}
+    placeholders = ", ".join(["%s"] * len(ids))
+    if connection.vendor == "postgresql":
+        sql = (
+            "SELECT id, ts_headline('english', title, to_tsquery('english', %s), %s), "
+            "ts_headline('english', text, to_tsquery('english', %s), %s) "
+            "FROM blog_post WHERE id IN ({ids})".format(ids=placeholders)
+        )
+        options = "StartSel={start}, StopSel={end}".format(start=START_MARK, end=END_MARK)
+        params = [match, options + ", HighlightAll=TRUE", match, options + ", MaxWords=30, MinWords=10"] + ids
+    else:
+        sql = (
+            "SELECT rowid, highlight(blog_post_fts, 0, %s, %s), "
+            "snippet(blog_post_fts, 1, %s, %s, '…', 24) "
+            "FROM blog_post_fts WHERE blog_post_fts MATCH %s AND rowid IN ({ids})".format(ids=placeholders)
+        )
+        params = [START_MARK, END_MARK, START_MARK, END_MARK, match] + ids
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0]: (highlight(row[1]), highlight(row[2])) for row in cursor.fetchall()}
+
+
+def search_posts_by_scan(terms, after, descending, limit, published_only, using):
+    """Fallback for backends without full-text search: unranked icontains scan by id."""
+    posts = Post.objects.using(using)
+    for term in terms:
+        posts = posts.filter(Q(title__icontains=term) | Q(text__icontains=term))
+    if published_only:
+        posts = posts.filter(published_date__isnull=False)
+    if after is not None:
+        posts = posts.filter(id__lt=after[1]) if descending else posts.filter(id__gt=after[1])
+    posts = posts.order_by("-id" if descending else "id")[:limit]
+    return [
+        SearchHit(post.id, post.title, post.text, post.author_id, post.published_date, 0.0,
+                  escape(post.title), escape(post.text[:200]))
+        for post in posts
+    ]
@@ -0,0 +1,178 @@
+"""Synthetic users, posts and comments for scale and performance testing.
+
+Rows are built in memory with explicit primary keys, continuing after
+the largest existing id, so bulk_create never has to return ids. Each
+batch is written in its own transaction. Nothing is sent through
+Model.save() or the post_save signals:
+
+- tokens are inserted in batches instead of by create_auth_token;
+- approved_comment_count is computed as the comments are generated;
+- text_html and excerpt are rendered as Post.save() would;
+- the cached lists are invalidated once at the end;
+- the primary key sequences are reset once the rows are in, so that
+  ordinary creates do not reuse the seeded ids.
+
+Seed into a database nobody else is writing to at the same time.
+"""
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from blog import cache, search
+from blog.models import Post, Comment
+
+
+SYLLABLES = "ka lo mi ne ru sa te vo xi za bo de fu gi ha ju".split()
+
+
+def make_word(seed):
+    rng = random.Random(seed)
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+# A Zipf-distributed vocabulary: a few very common words and a long tail
+# of rare ones, so search queries range from unselective to highly selective.
+VOCABULARY = sorted({make_word(seed) for seed in range(20000)})
+random.Random(0).shuffle(VOCABULARY)
+VOCABULARY_WEIGHTS = list(accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+COMMENT_AUTHORS = ["reader%d" % index for index in range(500)]
+
+
+def random_text(words, rng=random):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=VOCABULARY_WEIGHTS, k=words))
+
+
+def zipf_weights(size, exponent):
+    """Cumulative weights of the values 0..size-1 with P(k) proportional to 1 / (k + 1) ** exponent."""
+    return list(accumulate(1 / (value + 1) ** exponent for value in range(size)))
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def reset_sequences(*models):
+    """Move the primary key sequences of ``models`` past the explicit ids inserted."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def seed_users(count, batch_size=5000, prefix="user"):
+    """Insert ``count`` users with unusable passwords and their tokens; return their ids."""
+    first_id = next_id(User)
+    ids = list(range(first_id, first_id + count))
+    for start in range(0, count, batch_size):
+        chunk = ids[start:start + batch_size]
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [User(id=user_id, username="%s%d" % (prefix, user_id), password="!") for user_id in chunk],
+                batch_size=batch_size,
+            )
+            Token.objects.bulk_create(
+                [Token(key=Token.generate_key(), user_id=user_id) for user_id in chunk],
+                batch_size=batch_size,
+            )
+    reset_sequences(User, Token)
+    return ids
+
+
+def seed(
+    users=100,
+    posts=10000,
+    max_comments=50,
+    zipf_exponent=1.2,
+    comments_per_post=None,
+    approval_ratio=0.7,
+    published_ratio=0.8,
+    days=3 * 365,
+    title_words=6,
+    text_words=80,
+    author_ids=None,
+    batch_size=5000,
+    rng=None,
+    progress=None,
+):
+    """Insert synthetic data and return the number of rows of each model.
+
+    Each post gets a Zipf-distributed number of comments between 0 and
+    ``max_comments - 1``, or exactly ``comments_per_post`` when given. Posts
+    are created uniformly over the last ``days`` days. Published ones go
+    live a few hours after creation, and comments follow their post.
+    ``progress(posts_done)`` is called after every batch.
+    """
+    rng = rng or random.Random()
+    now = timezone.now()
+    span = days * 24 * 3600
+    created_users = 0
+    if author_ids is None:
+        author_ids = seed_users(users, batch_size)
+        created_users = len(author_ids)
+    comment_counts = zipf_weights(max_comments, zipf_exponent) if max_comments else None
+
+    rebuild_index = posts >= batch_size and search.drop_triggers(connection)
+    post_id = next_id(Post)
+    comment_id = next_id(Comment)
+    total_comments = 0
+    try:
+        for start in range(0, posts, batch_size):
+            post_rows, comment_rows = [], []
+            for _ in range(min(batch_size, posts - start)):
+                created = now - timedelta(seconds=rng.random() * span)
+                published = None
+                if rng.random() < published_ratio:
+                    published = min(now, created + timedelta(hours=rng.expovariate(1 / 6)))
+                if comments_per_post is not None:
+                    count = comments_per_post
+                elif comment_counts:
+                    count = rng.choices(range(max_comments), cum_weights=comment_counts)[0]
+                else:
+                    count = 0
+                approved = 0
+                for _ in range(count):
+                    is_approved = rng.random() < approval_ratio
+                    approved += is_approved
+                    comment_rows.append(Comment(
+                        id=comment_id,
+                        post_id=post_id,
+                        author=rng.choice(COMMENT_AUTHORS),
+                        text=random_text(rng.randint(5, 40), rng),
+                        created_date=min(now, created + timedelta(seconds=rng.expovariate(1 / 86400))),
+                        approved_comment=is_approved,
+                    ))
+                    comment_id += 1
+                post = Post(
+                    id=post_id,
+                    author_id=rng.choice(author_ids),
+                    title=random_text(title_words, rng),
+                    text=random_text(text_words, rng),
+                    created_date=created,
+                    published_date=published,
+                    approved_comment_count=approved,
+                )
+                post.render_text()
+                post_rows.append(post)
+                post_id += 1
+            with transaction.atomic():
+                Post.objects.bulk_create(post_rows, batch_size=batch_size)
+                Comment.objects.bulk_create(comment_rows, batch_size=batch_size)
+            total_comments += len(comment_rows)
+            if progress is not None:
+                progress(start + len(post_rows))
+    finally:
+        reset_sequences(Post, Comment)
+        if rebuild_index:
+            search.restore_triggers(connection)
+
+    cache.invalidate_lists()
+    return {"users": created_users, "posts": posts, "comments": total_comments}
@@ -0,0 +1,277 @@
+"""Static HTML copies of the public pages.
+
+The pages anonymous visitors see, post_list and the post_detail of every
+published post, are rendered through their views into
+BLOG_STATIC_SITE_ROOT, e.g. post/42/index.html for /post/42/.
+StaticSiteMiddleware serves those files to anonymous GET requests through
+whitenoise, so such requests skip the templates and the database.
+
+Pages are regenerated after the transaction that changed them commits,
+on a background thread, and only the pages a change affects are rewritten:
+
+- saving, publishing or deleting a post updates its page and the index;
+- approving, unapproving or deleting an approved comment updates its post's
+  page and the index, which shows the comment counts.
+
+The bulk write paths in blog.bulk schedule the same updates. The
+build_site command renders every page from scratch, with worker processes
+across the CPU cores. Pages are regenerated by the process that handled
+the change, so every web process must share the directory: run them on
+one host or a shared volume, or leave BLOG_STATIC_SITE_ROOT unset.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from blog import compression
+from blog.models import Post, Comment
+
+
+logger = logging.getLogger(__name__)
+
+_pending = set()
+_pending_index = False
+_scheduled = False
+_pending_lock = threading.Lock()
+_executor = None
+
+# The compressed variants of a page, by encoding, next to its index.html.
+VARIANTS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def get_root():
+    """Return the output directory, or None when static pages are disabled."""
+    root = getattr(settings, "BLOG_STATIC_SITE_ROOT", None)
+    return str(root) if root else None
+
+
+def index_paths():
+    return [reverse("post_list")]
+
+
+def post_path(post_id):
+    return reverse("post_detail", kwargs={"pk": post_id})
+
+
+def file_for(path):
+    return os.path.join(get_root(), path.strip("/"), "index.html")
+
+
+def render(path):
+    """Render a page as an anonymous visitor would see it; return the HTML or None."""
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    match = resolve(path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def write_file(filename, content):
+    """Write ``content`` to ``filename``, replacing the old file atomically."""
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(filename), prefix=".page-")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, filename)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def write_page(path):
+    """Render a page to its file and compressed variants; remove them if the page is gone.
+
+    whitenoise serves the .br or .gz variant to clients that accept it.
+    The variants are replaced before the page, whose modification time
+    whitenoise validates requests against.
+    """
+    content = render(path)
+    if content is None:
+        remove_page(path)
+        return False
+    filename = file_for(path)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    encodings = compression.get_encodings()
+    for encoding, suffix in VARIANTS:
+        if encoding in encodings:
+            write_file(filename + suffix, compression.compress(content, encoding, best=True))
+        elif os.path.exists(filename + suffix):
+            # Left by a process that had Brotli installed; it would go stale.
+            os.unlink(filename + suffix)
+    write_file(filename, content)
+    return True
+
+
+def remove_page(path):
+    filename = file_for(path)
+    for name in [filename] + [filename + suffix for _, suffix in VARIANTS]:
+        try:
+            os.unlink(name)
+        except FileNotFoundError:
+            pass
+
+
+def published_ids(post_ids=None):
+    posts = Post.objects.filter(published_date__lte=timezone.now())
+    if post_ids is not None:
+        posts = posts.filter(pk__in=list(post_ids))
+    return posts.order_by("pk").values_list("pk", flat=True)
+
+
+def regenerate(post_ids=(), index=True):
+    """Rewrite the pages of the given posts, and the index pages if ``index``."""
+    post_ids = set(post_ids)
+    published = set(published_ids(post_ids)) if post_ids else set()
+    for post_id in sorted(post_ids):
+        if post_id in published:
+            write_page(post_path(post_id))
+        else:
+            remove_page(post_path(post_id))
+    if index:
+        for path in index_paths():
+            write_page(path)
+
+
+def schedule(post_ids=(), index=True):
+    """Regenerate the pages of the given posts once the current transaction commits."""
+    if get_root() is None:
+        return
+    post_ids = list(post_ids)
+    transaction.on_commit(lambda: enqueue(post_ids, index))
+
+
+def enqueue(post_ids, index):
+    global _pending_index, _scheduled, _executor
+    if not getattr(settings, "BLOG_STATIC_SITE_BACKGROUND", True):
+        regenerate(post_ids, index)
+        return
+    with _pending_lock:
+        _pending.update(post_ids)
+        _pending_index = _pending_index or index
+        if _scheduled:
+            return
+        _scheduled = True
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blog-static-site")
+    _executor.submit(drain)
+
+
+def drain():
+    """Regenerate everything scheduled so far; changes scheduled meanwhile are coalesced into one run."""
+    global _pending_index, _scheduled
+    with _pending_lock:
+        post_ids, index = set(_pending), _pending_index
+        _pending.clear()
+        _pending_index = _scheduled = False
+    try:
+        regenerate(post_ids, index)
+    except Exception:
+        logger.exception("Regenerating static pages failed")
+    finally:
+        connections.close_all()
+
+
+def render_posts(post_ids):
+    for post_id in post_ids:
+        write_page(post_path(post_id))
+    return len(post_ids)
+
+
+def render_posts_in_worker(post_ids):
+    """Render the pages of a chunk of posts in a build worker process."""
+    try:
+        return render_posts(post_ids)
+    finally:
+        connections.close_all()
+
+
+def build(workers=None, chunk_size=200):
+    """Render every page from scratch and remove the pages of posts no longer published.
+
+    Post pages are spread over ``workers`` processes, one per CPU core by
+    default. Returns the number of pages written.
+    """
+    root = get_root()
+    ids = list(published_ids())
+    chunks = [ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(chunks) > 1:
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            written = sum(executor.map(render_posts_in_worker, chunks))
+    else:
+        written = sum(render_posts(chunk) for chunk in chunks)
+    for path in index_paths():
+        written += write_page(path)
+
+    kept = {str(post_id) for post_id in ids}
+    posts_dir = os.path.join(root, "post")
+    if os.path.isdir(posts_dir):
+        for name in os.listdir(posts_dir):
+            if name not in kept:
+                shutil.rmtree(os.path.join(posts_dir, name), ignore_errors=True)
+    return written
+
+
+class StaticSiteMiddleware(WhiteNoiseMiddleware):
+    """Serve the generated pages to anonymous GET and HEAD requests.
+
+    Files are looked up on every request, since they are rewritten while
+    the server runs; whitenoise answers conditional requests from their
+    modification time and size.
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        root = get_root()
+        if root is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        WhiteNoise.__init__(self, None, autorefresh=True, index_file=True, max_age=0)
+        self.add_files(root)
+
+    def process_request(self, request):
+        if request.method not in ("GET", "HEAD") or request.GET or request.user.is_authenticated:
+            return None
+        return super().process_request(request)
+
+    def immutable_file_test(self, path, url):
+        return False
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def schedule_post(sender, instance=None, **kwargs):
+    schedule([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def schedule_comment(sender, instance=None, **kwargs):
+    # Comment.save() updates _stored_approved and _stored_post_id after the
+    # signal, so they still hold the state before this save. Pending
+    # comments are not public.
+    post_ids = {instance.post_id}
+    if getattr(instance, "_stored_approved", False):
+        post_ids.add(instance._stored_post_id)
+    elif not instance.approved_comment:
+        return
+    schedule(post_ids)
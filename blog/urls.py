@@ -1,15 +1,23 @@
 from django.urls import path, include
-from blog import views
+from blog import feeds, views
+from blog.metrics import metrics_view
 
 urlpatterns = [
     path('', views.post_list, name='post_list'),
     path('post/<int:pk>/', views.post_detail, name='post_detail'),
+    path('post/<int:pk>/comments/feed/', feeds.post_comments_rss, name='post_comments_feed'),
+    path('post/<int:pk>/comments/feed/atom/', feeds.post_comments_atom, name='post_comments_atom_feed'),
+    path('feed/', feeds.latest_posts_rss, name='post_feed'),
+    path('feed/atom/', feeds.latest_posts_atom, name='post_atom_feed'),
+    path('search/', views.post_search, name='post_search'),
     path('post/new/', views.post_new, name='post_new'),
     path('post/<int:pk>/edit/', views.post_edit, name='post_edit'),
     path('drafts/', views.post_draft_list, name='post_draft_list'),
     path('post/<pk>/publish/', views.post_publish, name='post_publish'),
     path('post/<pk>/remove/', views.post_remove, name='post_remove'),
     path('post/<int:pk>/comment/', views.add_comment_to_post, name='add_comment_to_post'),
+    path('moderation/', views.comment_moderation, name='comment_moderation'),
     path('comment/<int:pk>/approve/', views.comment_approve, name='comment_approve'),
     path('comment/<int:pk>/remove/', views.comment_remove, name='comment_remove'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
\ No newline at end of file
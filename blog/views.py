@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.utils import timezone
 from .models import Post, Comment
@@ -5,16 +6,53 @@ from django.shortcuts import render, get_object_or_404
 from .forms import PostForm, CommentForm
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
+from blog import cache
+from blog.conditional import conditional, post_list_stamps, thread_stamps
+from blog.api.pagination import KeysetPagination, InvalidCursor
+from blog.search import search_posts
+from blog.bulk import approve_comments, delete_comments
 
 
+@conditional(post_list_stamps, vary_on_user=True)
 def post_list(request):
     posts = Post.objects.filter(published_date__lte=timezone.now()).order_by('published_date')
     return render(request, 'blog/post_list.html', {'posts': posts})
 
 
+@conditional(lambda pk: thread_stamps(pk), vary_on_user=True)
 def post_detail(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    return render(request, 'blog/post_detail.html', {'post': post})
+    # Lazy: only evaluated when the cached thread fragment is missing.
+    # Anonymous visitors never see pending comments, so they are not loaded.
+    if request.user.is_authenticated:
+        comments = post.post_comments.order_by('created_date')
+    else:
+        comments = post.approved_comments().order_by('created_date')
+    return render(request, 'blog/post_detail.html', {
+        'post': post,
+        'comments': comments,
+        'thread_version': cache.get_version('thread:%s' % post.pk),
+        'fragment_timeout': cache.get_timeout(),
+        'cache_alias': getattr(settings, 'BLOG_CACHE_ALIAS', 'default'),
+    })
+
+def post_search(request):
+    query = request.GET.get('q', '')
+    paginator = KeysetPagination(ordering=('score', 'id'))
+    try:
+        hits = paginator.paginate(
+            lambda ordering, values, count: search_posts(
+                query, after=values, descending=ordering[0].startswith('-'), limit=count, published_only=True
+            ),
+            request,
+        )
+    except InvalidCursor:
+        hits = []
+    return render(request, 'blog/post_search.html', {
+        'query': query,
+        'hits': hits,
+        'next_cursor': paginator.get_next_cursor() if hits else None,
+    })
 
 @login_required
 def post_new(request):
@@ -73,6 +111,26 @@ def add_comment_to_post(request, pk):
         form = CommentForm()
     return render(request, 'blog/add_comment_to_post.html', {'form': form})
 
+@login_required
+def comment_moderation(request):
+    if request.method == "POST":
+        ids = [int(pk) for pk in request.POST.getlist('ids') if pk.isascii() and pk.isdigit()]
+        if request.POST.get('action') == 'approve':
+            approve_comments(ids)
+        elif request.POST.get('action') == 'remove':
+            delete_comments(ids)
+        return redirect('comment_moderation')
+    paginator = KeysetPagination(ordering=('created_date', 'id'))
+    comments = Comment.objects.filter(approved_comment=False).select_related('post')
+    try:
+        comments = paginator.paginate_queryset(comments, request)
+    except InvalidCursor:
+        comments = []
+    return render(request, 'blog/comment_moderation.html', {
+        'comments': comments,
+        'next_cursor': paginator.get_next_cursor() if comments else None,
+    })
+
 @login_required
 def comment_approve(request, pk):
     comment = get_object_or_404(Comment, pk=pk)
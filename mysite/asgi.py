@@ -3,6 +3,23 @@ ASGI config for mysite project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The Procfile serves the WSGI application with sync gunicorn workers, where
+a slow client holds a whole worker until its request completes. To serve
+this ASGI application instead, run gunicorn with uvicorn workers:
+
+    web: gunicorn mysite.asgi:application -k uvicorn.workers.UvicornWorker
+
+or uvicorn alone during development:
+
+    uvicorn mysite.asgi:application --workers 2
+
+The event loop then handles connections, but on Django 3.2 every sync
+view of a process runs on one shared thread: the handler runs them
+thread-sensitive and sets no per-request thread context. Requests are
+thus served one at a time per worker, as with sync workers, plus a
+thread handoff each. All views here are sync, since Django 3.2 has no
+async ORM. Compare the two modes with manage.py loadtest_api.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 """
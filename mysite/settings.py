@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,19 +47,24 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Static files skip it: whitenoise, inserted after SecurityMiddleware by
+    # django_on_heroku below, serves them precompressed.
+    'blog.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.static_site.StaticSiteMiddleware',
+    'blog.metrics.MetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blog.metrics.InstrumentedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,6 +91,84 @@ DATABASES = {
     }
 }
 
+# Connection reuse, see blog/db.py. CONN_MAX_AGE is also read by
+# django_on_heroku for the $DATABASE_URL database. Set DB_POOL=1 to borrow
+# PostgreSQL connections from an in-process pool of DB_POOL_MAX_SIZE
+# connections per worker instead.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 600))
+CONN_HEALTH_CHECKS = os.environ.get('CONN_HEALTH_CHECKS', '1') == '1'
+DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+
+# Applied to every new SQLite connection. WAL lets readers run while a
+# write is in progress; NORMAL sync is safe in WAL mode.
+BLOG_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Point CACHE_BACKEND/CACHE_LOCATION at a file, memcached or Redis backend
+# (e.g. django_redis.cache.RedisCache) to share cached payloads between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Cache alias and timeouts (seconds) used for blog API payloads, see blog/cache.py.
+# The version stamps behind the cache keys and the ETags expire after
+# BLOG_STAMP_TIMEOUT: LocMemCache is per process, so that is how long other
+# gunicorn workers may serve data a change made stale. A shared backend
+# (CACHE_BACKEND/CACHE_LOCATION, e.g. Redis or Memcached) sees every change
+# at once and allows a longer timeout.
+BLOG_CACHE_ALIAS = 'default'
+BLOG_CACHE_TIMEOUT = int(os.environ.get('BLOG_CACHE_TIMEOUT', 300))
+BLOG_CACHE_LOCK_TIMEOUT = 5
+BLOG_STAMP_TIMEOUT = int(os.environ.get('BLOG_STAMP_TIMEOUT', 60))
+
+# Per-process cache of token -> user lookups, see blog/api/authentication.py.
+# The timeout bounds how long other processes accept a revoked token.
+BLOG_AUTH_CACHE_SIZE = 1024
+BLOG_AUTH_CACHE_TIMEOUT = int(os.environ.get('BLOG_AUTH_CACHE_TIMEOUT', 60))
+
+# Token issuance, see blog/login.py. Failed logins per username from one
+# client and per client before they are refused for BLOG_LOGIN_LOCKOUT
+# seconds.
+BLOG_LOGIN_MAX_FAILURES = 5
+BLOG_LOGIN_CLIENT_MAX_FAILURES = 50
+BLOG_LOGIN_LOCKOUT = 300
+
+
+# Static copies of the public pages, see blog/static_site.py. Unset to
+# render every page dynamically; every web process must share the directory.
+BLOG_STATIC_SITE_ROOT = os.environ.get('BLOG_STATIC_SITE_ROOT', '')
+BLOG_STATIC_SITE_BACKGROUND = True
+
+# RSS and Atom feeds, see blog/feeds.py. Items per feed, and how long the
+# serialized feeds stay cached; they are keyed on their data, so changes
+# that alter a feed replace it sooner and stamp reloads do not.
+BLOG_FEED_ITEMS = 20
+BLOG_FEED_TIMEOUT = int(os.environ.get('BLOG_FEED_TIMEOUT', 3600))
+
+# Response compression, see blog/compression.py. Smaller responses are
+# sent as they are.
+BLOG_COMPRESSION_MIN_SIZE = 1024
+
+
+# Request metrics, see blog/metrics.py. The share of requests that is
+# timed, and the bearer token for scraping /metrics/ without a staff login.
+BLOG_METRICS_SAMPLE_RATE = float(os.environ.get('BLOG_METRICS_SAMPLE_RATE', 0.1))
+BLOG_METRICS_TOKEN = os.environ.get('BLOG_METRICS_TOKEN', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -123,6 +208,9 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'static'
+# collectstatic writes hashed names plus .gz variants, and .br ones when
+# Brotli is installed, which whitenoise serves to clients that accept them.
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -136,13 +224,45 @@ LOGIN_REDIRECT_URL = '/'
 import django_on_heroku
 django_on_heroku.settings(locals())
 
+for database in DATABASES.values():
+    database.setdefault('CONN_MAX_AGE', CONN_MAX_AGE)
+    database['CONN_HEALTH_CHECKS'] = CONN_HEALTH_CHECKS
+    if DB_POOL and database['ENGINE'] in ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2'):
+        database['ENGINE'] = 'blog.backends.postgresql_pool'
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = {'MAX_SIZE': DB_POOL_MAX_SIZE, 'TIMEOUT': DB_POOL_TIMEOUT}
+
 AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend', # default
 )
 
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
+    'DEFAULT_AUTHENTICATION_CLASSES': ['blog.api.authentication.CachingTokenAuthentication'],
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Proxies in front of the app; clients are identified by REMOTE_ADDR when
+    # 0, by the address these proxies appended to X-Forwarded-For otherwise.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    'DEFAULT_RENDERER_CLASSES': [
+        # Encodes with orjson when it is installed, see blog/api/renderers.py.
+        'blog.api.renderers.TimedORJSONRenderer',
+        'blog.api.renderers.TimedGzipJSONRenderer',
+        'blog.api.renderers.TimedBrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'blog.api.parsers.GzipJSONParser',
+    ],
 }
+
+# MessagePack requests and responses for bulk consumers, when msgpack is installed.
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(2, 'blog.api.renderers.TimedMessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('blog.api.parsers.MessagePackParser')
+
+# Largest request body, after decompression, the compressed JSON and
+# MessagePack parsers accept.
+BLOG_API_MAX_BODY_SIZE = 64 * 1024 * 1024
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+
+from blog.api import authentication
+from blog.api.authentication import CachingTokenAuthentication
+
+
+class CachingTokenAuthenticationTestCase(TestCase):
+    """Cached token authentication test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        authentication.clear()
+        self.authentication = CachingTokenAuthentication()
+        self.user = User.objects.create(username="testuser")
+        self.key = self.user.auth_token.key
+
+    def test_cache_hit_runs_no_query(self) -> None:
+        """Test that a repeated token is authenticated without queries."""
+        with self.assertNumQueries(1):
+            user, token = self.authentication.authenticate_credentials(self.key)
+        with self.assertNumQueries(0):
+            cached_user, cached_token = self.authentication.authenticate_credentials(self.key)
+
+        self.assertEqual(cached_user, self.user)
+        self.assertEqual(cached_token.key, self.key)
+        self.assertIsNot(cached_user, user)
+
+    def test_authenticated_request(self) -> None:
+        """Test that a cached response to a known token runs no query at all."""
+        headers = {"HTTP_AUTHORIZATION": "Token %s" % self.key}
+        self.assertEqual(self.client.get("/post/published/", **headers).status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/post/published/", **headers)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_deleted_token_is_rejected(self) -> None:
+        """Test that deleting a token drops its cache entry."""
+        self.authentication.authenticate_credentials(self.key)
+        self.user.auth_token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.key)
+
+    def test_deactivated_user_is_rejected(self) -> None:
+        """Test that deactivating a user drops the cache entries of their tokens."""
+        self.authentication.authenticate_credentials(self.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate_credentials(self.key)
+
+    def test_entries_expire(self) -> None:
+        """Test that entries older than the timeout are looked up again."""
+        with mock.patch("blog.api.authentication.time.monotonic", return_value=1000.0):
+            self.authentication.authenticate_credentials(self.key)
+        with mock.patch("blog.api.authentication.time.monotonic", return_value=1061.0):
+            with self.assertNumQueries(1):
+                self.authentication.authenticate_credentials(self.key)
+
+    @override_settings(BLOG_AUTH_CACHE_SIZE=2)
+    def test_least_recently_used_entries_are_evicted(self) -> None:
+        """Test that the cache keeps at most BLOG_AUTH_CACHE_SIZE tokens."""
+        keys = [self.key] + [User.objects.create(username="user%d" % index).auth_token.key for index in range(2)]
+        for key in keys:
+            self.authentication.authenticate_credentials(key)
+
+        self.assertIsNone(authentication.get_cached(keys[0]))
+        self.assertIsNotNone(authentication.get_cached(keys[1]))
+        self.assertIsNotNone(authentication.get_cached(keys[2]))
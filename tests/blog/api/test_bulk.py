@@ -0,0 +1,140 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog import bulk
+from blog.api.views import BulkPostAPIView, BulkPostPublishingAPIView, PublishedPostsAPIView
+from blog.models import Post
+
+
+class BulkPostAPIViewTestCase(TestCase):
+    """Bulk post creation test case."""
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        cache.clear()
+        self.url = "posts/bulk/"
+        self.view = BulkPostAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+
+    def post(self, data, content_type="application/json"):
+        """Run a POST request with a raw body against the view."""
+        request = self.request_factory.post(self.url, data, content_type=content_type)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return self.view(request)
+
+    def test_json_array_creates_posts(self) -> None:
+        """Every valid post of a JSON array is created and gets its id back."""
+
+        items = [{"author": self.user.id, "title": "Post %d" % index, "text": "Test"} for index in range(3)]
+        response = self.post(json.dumps(items))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["data"]["created"], 3)
+        ids = [result["id"] for result in response.data["data"]["results"]]
+        self.assertEqual(
+            list(Post.objects.filter(id__in=ids).order_by("id").values_list("title", flat=True)),
+            ["Post 0", "Post 1", "Post 2"]
+        )
+
+    def test_ndjson_reports_invalid_items(self) -> None:
+        """Invalid items are reported by index and the valid ones are still created."""
+
+        body = "\n".join([
+            json.dumps({"author": self.user.id, "title": "First", "text": "Test"}),
+            json.dumps({"author": self.user.id, "text": "No title"}),
+            json.dumps({"author": 9999, "title": "Unknown author", "text": "Test"}),
+            json.dumps({"author": self.user.id, "title": "Last", "text": "Test"}),
+        ])
+        response = self.post(body, content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 201)
+        results = response.data["data"]["results"]
+        self.assertEqual([result["status"] for result in results], ["created", "error", "error", "created"])
+        self.assertIn("title", results[1]["errors"])
+        self.assertIn("author", results[2]["errors"])
+        self.assertEqual(Post.objects.get(id=results[3]["id"]).title, "Last")
+
+    def test_malformed_ndjson_line_stops_the_upload(self) -> None:
+        """Lines before a malformed line are created and the line is reported."""
+
+        body = json.dumps({"author": self.user.id, "title": "First", "text": "Test"}) + "\n{not json\n"
+        response = self.post(body, content_type="application/x-ndjson")
+
+        results = response.data["data"]["results"]
+        self.assertEqual([result["status"] for result in results], ["created", "error"])
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_backends_without_bulk_ids_insert_per_row(self) -> None:
+        """Test that backends which cannot return bulk insert ids still set them, one row at a time."""
+        posts = [Post(author=self.user, title="Row %d" % index, text="Text") for index in range(3)]
+
+        with mock.patch.object(connection, "vendor", "mysql"), CaptureQueriesContext(connection) as queries:
+            bulk.create_posts(posts)
+
+        self.assertEqual(len([query for query in queries if query["sql"].startswith("INSERT")]), 3)
+        self.assertEqual([Post.objects.get(pk=post.pk).title for post in posts], ["Row 0", "Row 1", "Row 2"])
+
+    def test_object_body_returns_400(self) -> None:
+        """A single object is not a bulk upload."""
+
+        response = self.post(json.dumps({"author": self.user.id, "title": "Post", "text": "Test"}))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["title"], "Error")
+
+
+class BulkPostPublishingAPIViewTestCase(TestCase):
+    """Bulk publishing test case."""
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        cache.clear()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.posts = [Post.objects.create(author=self.user, title="Post %d" % index, text="Test") for index in range(3)]
+
+    def patch(self, publish, data):
+        """Run a PATCH request against the publishing or unpublishing view."""
+        request = self.request_factory.patch("post/publish/bulk/", data, format="json")
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return BulkPostPublishingAPIView.as_view(publish=publish)(request)
+
+    def published_ids(self) -> list:
+        """Return the ids listed by the published posts endpoint."""
+        request = self.request_factory.get("post/published/")
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return [post["id"] for post in PublishedPostsAPIView.as_view()(request).data["data"]]
+
+    def test_publish_and_unpublish(self) -> None:
+        """Only posts whose state changes are reported, and cached lists follow."""
+
+        ids = [post.id for post in self.posts]
+        self.assertEqual(self.published_ids(), [])
+
+        response = self.patch(True, {"ids": ids[:2]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["ids"], ids[:2])
+        self.assertEqual(self.published_ids(), ids[:2])
+
+        response = self.patch(True, {"ids": ids})
+        self.assertEqual(response.data["data"]["ids"], ids[2:])
+
+        response = self.patch(False, {"ids": [ids[0]]})
+        self.assertEqual(response.data["data"]["count"], 1)
+        self.assertEqual(self.published_ids(), ids[1:])
+
+    def test_invalid_ids_return_400(self) -> None:
+        """Ids must be a list of integers."""
+
+        self.assertEqual(self.patch(True, {"ids": "1,2"}).status_code, 400)
+        self.assertEqual(self.patch(True, {"ids": ["a"]}).status_code, 400)
+        self.assertEqual(self.patch(True, {}).status_code, 400)
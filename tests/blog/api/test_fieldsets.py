@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog.models import Post, Comment
+
+
+class FieldsetTestCase(TestCase):
+    """Sparse fieldsets and truncated texts test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(author=self.user, title="Test post", text="A rather long text " * 20,
+                                            published_date=timezone.now())
+            self.comment = Comment.objects.create(post=self.post, author="reader",
+                                                  text="A rather long remark " * 5, approved_comment=True)
+
+    def get(self, url):
+        """Get ``url`` and return the response with the SQL it ran."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [query["sql"] for query in queries]
+
+    def test_list_loads_requested_columns_only(self) -> None:
+        """Test that a list with fields= returns and selects only those fields."""
+        response, queries = self.get("/post/published/?fields=id,title")
+
+        self.assertEqual(response.json()["data"], [{"id": self.post.id, "title": "Test post"}])
+        select = [sql for sql in queries if 'FROM "blog_post"' in sql][-1]
+        self.assertNotIn('"blog_post"."text"', select)
+        self.assertNotIn('"blog_post"."text_html"', select)
+
+    def test_truncate(self) -> None:
+        """Test that truncate= cuts texts in the query."""
+        response, queries = self.get("/posts/%d/?fields=id,text&truncate=10" % self.post.id)
+
+        self.assertEqual(response.json()["data"], {"id": self.post.id, "text": "A rather …"})
+        self.assertIn("SUBSTR", [sql for sql in queries if 'FROM "blog_post"' in sql][-1].upper())
+
+    def test_detail_fieldsets_are_cached_separately(self) -> None:
+        """Test that a detail payload cached for one fieldset is not served for another."""
+        self.client.get("/posts/%d/?fields=id" % self.post.id)
+
+        response = self.client.get("/posts/%d/" % self.post.id)
+
+        self.assertEqual(response.json()["data"]["text"], self.post.text)
+
+    def test_list_api_view(self) -> None:
+        """Test that ListAPIView keeps its payload and accepts fields=."""
+        self.assertEqual(self.client.get("/post/list/").json(), [{
+            "id": self.post.id, "author": self.user.id, "title": "Test post", "text": self.post.text,
+        }])
+        self.assertEqual(self.client.get("/post/list/?fields=title").json(), [{"title": "Test post"}])
+
+    def test_comments_without_post_skip_the_join(self) -> None:
+        """Test that comment lists only join the posts when the payload embeds them."""
+        response, queries = self.get("/comments/approved/?fields=id,author")
+
+        self.assertEqual(response.json()["data"], [{"id": self.comment.id, "author": "reader"}])
+        self.assertFalse([sql for sql in queries if 'JOIN "blog_post"' in sql])
+
+    def test_nested_post_fields(self) -> None:
+        """Test that post.<field> picks fields of the embedded post."""
+        response = self.client.get("/post/%d/comments/?fields=id,post.title,text&truncate=8" % self.post.id)
+
+        self.assertEqual(response.json()["data"], [{
+            "id": self.comment.id, "post": {"title": "Test post"}, "text": "A rathe…",
+        }])
+
+    def test_unknown_field(self) -> None:
+        """Test that unknown fields and invalid truncate values are refused."""
+        self.assertEqual(self.client.get("/post/published/?fields=id,secret").status_code, 400)
+        self.assertEqual(self.client.get("/comments/%d/?fields=post.title" % self.comment.id).status_code, 400)
+        self.assertEqual(self.client.get("/post/list/?truncate=0").status_code, 400)
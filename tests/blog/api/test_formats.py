@@ -0,0 +1,115 @@
+import gzip
+import json
+import unittest
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog.api.renderers import msgpack
+from blog.models import Post, Comment
+
+
+class FormatTestCase(TestCase):
+    """Compressed JSON and MessagePack requests and responses test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Test post", text="Test text",
+                                        published_date=timezone.now())
+        Comment.objects.create(post=self.post, author="reader", text="Remark", approved_comment=True)
+
+    def test_gzip_json_list(self) -> None:
+        """Test that list endpoints emit gzip compressed JSON on request."""
+        for url in ("/post/published/", "/post/list/", "/comments/approved/", "/post/%d/comments/" % self.post.pk):
+            plain = self.client.get(url)
+            response = self.client.get(url, HTTP_ACCEPT="application/x-json-gzip")
+
+            self.assertEqual(response["Content-Type"], "application/x-json-gzip")
+            self.assertEqual(json.loads(gzip.decompress(response.content)), plain.json())
+
+    def test_gzip_json_post(self) -> None:
+        """Test that posts and comments can be created from gzip compressed JSON."""
+        data = {"author": self.user.pk, "title": "Packed post", "text": "Packed text"}
+        body = gzip.compress(json.dumps(data).encode())
+
+        response = self.client.post("/posts/", body, content_type="application/x-json-gzip")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Post.objects.filter(title="Packed post").exists())
+
+        body = gzip.compress(json.dumps({"post": self.post.pk, "author": "packer", "text": "Packed"}).encode())
+        response = self.client.post("/comment/new/", body, content_type="application/x-json-gzip")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["data"]["author"], "packer")
+
+    def test_invalid_gzip_json(self) -> None:
+        """Test that bodies that are not gzip compressed JSON are refused."""
+        response = self.client.post("/posts/bulk/", b"not gzip", content_type="application/x-json-gzip")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_decompressed_size_is_limited(self) -> None:
+        """Test that a body expanding beyond BLOG_API_MAX_BODY_SIZE is refused."""
+        body = gzip.compress(json.dumps([{"author": self.user.pk, "title": "Post", "text": "x" * 2048}]).encode())
+
+        with self.settings(BLOG_API_MAX_BODY_SIZE=1024):
+            response = self.client.post("/posts/bulk/", body, content_type="application/x-json-gzip")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.filter(title="Post").exists())
+
+    @unittest.skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_list(self) -> None:
+        """Test that list endpoints emit MessagePack on request."""
+        for url in ("/post/published/", "/post/list/", "/comments/approved/"):
+            plain = self.client.get(url)
+            response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+
+            self.assertEqual(response["Content-Type"], "application/msgpack")
+            self.assertEqual(msgpack.unpackb(response.content), plain.json())
+
+    @unittest.skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_post(self) -> None:
+        """Test that posts and comments can be created from MessagePack."""
+        body = msgpack.packb({"author": self.user.pk, "title": "Packed post", "text": "Packed text"})
+
+        response = self.client.post("/posts/", body, content_type="application/msgpack",
+                                    HTTP_ACCEPT="application/msgpack")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(msgpack.unpackb(response.content)["data"]["title"], "Packed post")
+
+        body = msgpack.packb({"post": self.post.pk, "author": "packer", "text": "Packed"})
+        response = self.client.post("/comment/new/", body, content_type="application/msgpack")
+
+        self.assertEqual(response.status_code, 201)
+
+    @unittest.skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_bulk(self) -> None:
+        """Test that bulk uploads accept MessagePack arrays."""
+        body = msgpack.packb([
+            {"author": self.user.pk, "title": "First", "text": "Text"},
+            {"author": self.user.pk, "title": "Second", "text": "Text"},
+        ])
+
+        response = self.client.post("/posts/bulk/", body, content_type="application/msgpack")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.filter(title__in=["First", "Second"]).count(), 2)
+
+    def test_formats_have_distinct_etags(self) -> None:
+        """Test that a cached JSON response is not validated for another format."""
+        etag = self.client.get("/posts/%d/" % self.post.pk)["ETag"]
+
+        response = self.client.get("/posts/%d/" % self.post.pk, HTTP_ACCEPT="application/x-json-gzip",
+                                   HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+
+from blog.api import authentication
+from blog.api.views import CustomAuthToken
+
+
+@override_settings(BLOG_LOGIN_MAX_FAILURES=3, BLOG_LOGIN_CLIENT_MAX_FAILURES=5)
+class LoginTestCase(TestCase):
+    """Throttled token issuance test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        authentication.clear()
+        self.request_factory = APIRequestFactory()
+        self.view = CustomAuthToken.as_view()
+        self.user = User.objects.create_user("testuser", password="testpassword")
+
+    def login(self, username="testuser", password="testpassword", client="127.0.0.1", **extra):
+        """Post credentials to the token view and return the response."""
+        request = self.request_factory.post("api-token-auth/", {"username": username, "password": password},
+                                            REMOTE_ADDR=client, **extra)
+        return self.view(request)
+
+    def test_token_lookup_is_reused(self) -> None:
+        """Test that the token of a user is looked up once, then served from memory."""
+        self.assertEqual(self.login().data["token"], self.user.auth_token.key)
+
+        with self.assertNumQueries(1):
+            response = self.login()
+
+        self.assertEqual(response.data["token"], self.user.auth_token.key)
+
+    def test_username_is_throttled(self) -> None:
+        """Test that a username is refused to a client after BLOG_LOGIN_MAX_FAILURES failures from it."""
+        for attempt in range(3):
+            self.assertEqual(self.login(password="wrong%d" % attempt).status_code, 400)
+
+        response = self.login()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "300")
+        self.assertEqual(self.login(client="10.0.0.1").status_code, 200)
+
+    def test_forwarded_for_is_ignored(self) -> None:
+        """Test that a client cannot pick the address it is throttled by with X-Forwarded-For."""
+        for attempt in range(3):
+            self.login(password="wrong%d" % attempt, HTTP_X_FORWARDED_FOR="10.0.0.%d" % attempt)
+
+        self.assertEqual(self.login(HTTP_X_FORWARDED_FOR="10.0.0.9").status_code, 429)
+
+    def test_client_is_throttled(self) -> None:
+        """Test that a client is refused after BLOG_LOGIN_CLIENT_MAX_FAILURES failures."""
+        for index in range(5):
+            self.login(username="user%d" % index)
+
+        self.assertEqual(self.login().status_code, 429)
+        self.assertEqual(self.login(client="10.0.0.1").status_code, 200)
+
+    def test_known_failure_skips_hash_check(self) -> None:
+        """Test that a pair that just failed is refused without checking the hash again."""
+        self.login(password="wrong")
+
+        with mock.patch("django.contrib.auth.authenticate") as authenticate:
+            response = self.login(password="wrong")
+
+        self.assertEqual(response.status_code, 400)
+        authenticate.assert_not_called()
+
+    def test_known_failure_expires_with_password_change(self) -> None:
+        """Test that a pair that failed is accepted once it became the password."""
+        self.assertEqual(self.login(password="newpassword").status_code, 400)
+
+        self.user.set_password("newpassword")
+        self.user.save()
+
+        self.assertEqual(self.login(password="newpassword").status_code, 200)
+
+    def test_failures_are_signalled(self) -> None:
+        """Test that user_login_failed is sent for checked and for known failures."""
+        handler = mock.Mock()
+        user_login_failed.connect(handler)
+        self.addCleanup(user_login_failed.disconnect, handler)
+
+        self.login(password="wrong")
+        self.login(password="wrong")
+
+        self.assertEqual(handler.call_count, 2)
+        self.assertEqual(handler.call_args.kwargs["credentials"]["username"], "testuser")
+
+    def test_unknown_user_is_hashed(self) -> None:
+        """Test that unknown usernames cost a hash like known ones."""
+        with mock.patch.object(User, "set_password") as set_password:
+            response = self.login(username="nobody")
+
+        self.assertEqual(response.status_code, 400)
+        set_password.assert_called_once_with("testpassword")
+
+    def test_inactive_user_is_refused(self) -> None:
+        """Test that inactive users get no token."""
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.login().status_code, 400)
+
+    def test_outdated_hash_is_upgraded(self) -> None:
+        """Test that a password stored with an outdated hasher is rehashed on login."""
+        with self.settings(PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]):
+            self.user.password = make_password("testpassword", hasher="md5")
+            self.user.save()
+            self.assertEqual(self.login().status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
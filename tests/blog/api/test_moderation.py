@@ -0,0 +1,115 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.api.views import ModerationQueueAPIView, PostAPIView
+from blog.models import Post, Comment
+
+
+class ModerationQueueAPIViewTestCase(TestCase):
+    """Moderation queue test case."""
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        cache.clear()
+        self.url = "comments/pending/"
+        self.view = ModerationQueueAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.posts = [Post.objects.create(author=self.user, title="Post %d" % index, text="Test") for index in range(2)]
+        self.approved = Comment.objects.create(post=self.posts[0], author="reader", text="Old", approved_comment=True)
+        self.pending = [
+            Comment.objects.create(post=self.posts[index % 2], author="reader", text="Pending %d" % index)
+            for index in range(4)
+        ]
+
+    def request(self, method, data=None, **params):
+        """Run a request against the view and return the response."""
+        if method == "get":
+            request = self.request_factory.get(self.url, params)
+        else:
+            request = getattr(self.request_factory, method)(self.url, data, format="json")
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return self.view(request)
+
+    def approved_count(self, post) -> int:
+        """Return the approved comment count served by the post API."""
+        request = self.request_factory.get("posts/%d/" % post.id)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return PostAPIView.as_view()(request, post_id=post.id).data["data"]["approved_comment_count"]
+
+    def test_queue_lists_pending_comments_oldest_first(self) -> None:
+        """Pending comments of every post are paged in creation order."""
+
+        first = self.request("get", limit=3)
+        second = self.request("get", limit=3, cursor=first.data["next"])
+
+        texts = [comment["text"] for comment in first.data["data"] + second.data["data"]]
+        self.assertEqual(texts, ["Pending 0", "Pending 1", "Pending 2", "Pending 3"])
+        self.assertIsNone(second.data["next"])
+
+    def test_batch_approve_updates_counts_and_queue(self) -> None:
+        """Approving a batch is one UPDATE, and counts and cached pages follow."""
+
+        self.assertEqual(self.approved_count(self.posts[0]), 1)
+        self.assertEqual(self.request("get").data["count"], 4)
+        ids = [comment.id for comment in self.pending[:3]] + [self.approved.id]
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.request("patch", {"ids": ids})
+        updates = [query for query in queries if query["sql"].startswith('UPDATE "blog_comment"')]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["ids"], ids[:3])
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.approved_count(self.posts[0]), 3)
+        self.assertEqual(self.approved_count(self.posts[1]), 1)
+        self.assertEqual([comment["id"] for comment in self.request("get").data["data"]], [self.pending[3].id])
+
+    def test_batch_delete_updates_counts(self) -> None:
+        """Deleting a batch is one DELETE and corrects the counts of approved comments."""
+
+        self.assertEqual(self.approved_count(self.posts[0]), 1)
+        ids = [self.approved.id, self.pending[0].id, 9999]
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.request("delete", {"ids": ids})
+        deletes = [query for query in queries if query["sql"].startswith("DELETE")]
+
+        self.assertEqual(response.data["data"]["ids"], ids[:2])
+        self.assertEqual(len(deletes), 1)
+        self.assertFalse(Comment.objects.filter(id__in=ids).exists())
+        self.assertEqual(self.approved_count(self.posts[0]), 0)
+        self.assertEqual(self.request("get").data["count"], 3)
+
+    def test_invalid_ids_return_400(self) -> None:
+        """Ids must be a list of integers."""
+
+        self.assertEqual(self.request("patch", {"ids": "all"}).status_code, 400)
+        self.assertEqual(self.request("delete", {}).status_code, 400)
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_moderation_page(self) -> None:
+        """The moderation page lists pending comments and approves the selected ones."""
+
+        self.client.force_login(self.user)
+        response = self.client.get("/moderation/")
+        self.assertContains(response, "Pending 0")
+        self.assertNotContains(response, "Old")
+
+        response = self.client.post("/moderation/", {"action": "approve", "ids": [self.pending[0].id]})
+        self.assertRedirects(response, "/moderation/")
+        self.assertTrue(Comment.objects.get(id=self.pending[0].id).approved_comment)
+
+    def test_moderation_page_ignores_invalid_ids(self) -> None:
+        """Ids that are not plain ASCII numbers, e.g. superscript digits, are ignored."""
+
+        self.client.force_login(self.user)
+        response = self.client.post("/moderation/", {"action": "approve", "ids": ["²", "x", self.pending[0].id]})
+
+        self.assertRedirects(response, "/moderation/", fetch_redirect_response=False)
+        self.assertTrue(Comment.objects.get(id=self.pending[0].id).approved_comment)
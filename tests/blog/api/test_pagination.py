@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.api.views import PublishedPostsAPIView, UnpublishedPostsAPIView
+from blog.models import Post
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Keyset pagination test case for the post list endpoints."""
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        cache.clear()
+        self.url = "post/published/"
+        self.view = PublishedPostsAPIView.as_view()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+
+        now = timezone.now()
+        # Two posts share a published date to exercise the id tie-breaker.
+        self.posts = [
+            Post.objects.create(
+                author=self.user,
+                title="Post %d" % index,
+                text="Test",
+                published_date=now + timedelta(minutes=index // 2)
+            )
+            for index in range(5)
+        ]
+        Post.objects.create(author=self.user, title="Draft", text="Test")
+
+    def get(self, view=None, **params) -> dict:
+        """Run a GET request against the view and return the response."""
+        request = self.request_factory.get(self.url, params)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return (view or self.view)(request)
+
+    def test_pages_follow_published_date_then_id(self) -> None:
+        """Following next cursors should walk every published post once in order."""
+
+        ids = []
+        response = self.get(limit=2)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(post["id"] for post in response.data["data"])
+            if response.data["next"] is None:
+                break
+            response = self.get(limit=2, cursor=response.data["next"])
+
+        self.assertEqual(ids, [post.id for post in self.posts])
+
+    def test_previous_cursor_returns_previous_page(self) -> None:
+        """The previous cursor should return the page before the current one."""
+
+        first = self.get(limit=2)
+        second = self.get(limit=2, cursor=first.data["next"])
+        previous = self.get(limit=2, cursor=second.data["previous"])
+
+        self.assertIsNone(first.data["previous"])
+        self.assertEqual(previous.data["data"], first.data["data"])
+        self.assertIsNone(previous.data["previous"])
+
+    def test_total_is_only_returned_when_requested(self) -> None:
+        """The approximate total is opt-in."""
+
+        self.assertNotIn("total", self.get().data)
+        self.assertEqual(self.get(total="approx").data["total"], 5)
+
+    def test_limit_is_clamped(self) -> None:
+        """Limits outside of the allowed range are clamped."""
+
+        self.assertEqual(self.get(limit=0).data["count"], 1)
+        self.assertEqual(self.get(limit=1000).data["count"], 5)
+
+    def test_invalid_cursor_returns_400(self) -> None:
+        """A cursor that can not be decoded returns an error."""
+
+        response = self.get(cursor="not-a-cursor")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["title"], "Error")
+
+    def test_cursor_values_of_the_wrong_type_return_400(self) -> None:
+        """A well-formed cursor whose values do not fit the ordering fields returns an error."""
+
+        for values in (["x", "y"], [{"dt": "2022-03-01T12:00:00+00:00"}, "y"], [None, 1], [[1], 1]):
+            payload = json.dumps({"k": values, "r": False}).encode()
+            cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+            response = self.get(cursor=cursor)
+
+            self.assertEqual(response.status_code, 400, values)
+
+    def test_unpublished_posts_are_paginated_by_created_date(self) -> None:
+        """The unpublished posts endpoint pages over drafts only."""
+
+        response = self.get(view=UnpublishedPostsAPIView.as_view())
+
+        self.assertEqual([post["title"] for post in response.data["data"]], ["Draft"])
+        self.assertIsNone(response.data["next"])
@@ -0,0 +1,65 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.api.views import ApprovedCommentsAPIView, PostCommentsAPIView
+from blog.conditional import comment_list_stamps, thread_stamps
+from blog.models import Post, Comment
+
+
+class CommentListQueryCountTestCase(TestCase):
+    """Comment list endpoints must not issue a query per comment."""
+
+    def setUp(self) -> None:
+        """Run this setup before each test."""
+        cache.clear()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.posts = []
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(3):
+                post = Post.objects.create(author=self.user, title="Post %d" % index, text="Test")
+                for _ in range(4):
+                    Comment.objects.create(post=post, author="Test author", text="Test", approved_comment=True)
+                self.posts.append(post)
+        # Validators are loaded once per change; only the payload queries are counted.
+        comment_list_stamps()
+        for post in self.posts:
+            thread_stamps(post.id)
+
+    def test_approved_comments_uses_constant_queries(self) -> None:
+        """Approved comments are fetched together with their posts in one query."""
+
+        request = self.request_factory.get("comments/approved/")
+        with self.assertNumQueries(1):
+            response = ApprovedCommentsAPIView.as_view()(request)
+            response.render()
+
+        self.assertEqual(response.data["count"], 12)
+
+    def test_post_comments_uses_constant_queries(self) -> None:
+        """Comments of a post are fetched with an existence check plus one query."""
+
+        post = self.posts[0]
+        request = self.request_factory.get("post/%d/comments/" % post.id)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        with self.assertNumQueries(2):
+            response = PostCommentsAPIView.as_view()(request, post_id=post.id)
+            response.render()
+
+        self.assertEqual(len(response.data["data"]), 4)
+
+    def test_post_payload_is_shared_between_comments(self) -> None:
+        """Comments on the same post embed a single post payload."""
+
+        request = self.request_factory.get("comments/approved/")
+        response = ApprovedCommentsAPIView.as_view()(request)
+
+        payloads = {}
+        for comment in response.data["data"]:
+            payloads.setdefault(comment["post"]["id"], set()).add(id(comment["post"]))
+
+        self.assertEqual(len(payloads), 3)
+        self.assertTrue(all(len(ids) == 1 for ids in payloads.values()))
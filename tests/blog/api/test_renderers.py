@@ -0,0 +1,36 @@
+import datetime
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from blog.api.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    """orjson renderer test case."""
+
+    def test_output_matches_json_renderer(self) -> None:
+        """Test that the orjson output is byte for byte JSONRenderer's."""
+        data = {
+            "data": [{"id": 1, "text_html": mark_safe("<b>é</b>\u2028"), "score": -1.5, "ok": True, "none": None}],
+            "created": datetime.datetime(2022, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            "day": datetime.date(2022, 3, 1),
+            "amount": Decimal("1.25"),
+            "message": gettext_lazy("Post not found."),
+            2: "integer key",
+        }
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_uses_json_renderer(self) -> None:
+        """Test that indented output is left to JSONRenderer."""
+        data = {"id": 1}
+
+        self.assertEqual(
+            ORJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
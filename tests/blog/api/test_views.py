@@ -3,6 +3,7 @@ from urllib import request, response
 from django.test import RequestFactory, TestCase
 from django.utils import timezone
 from django.contrib.auth.models import User
+from django.core.cache import cache
 
 from django.test.utils import tag
 from pprint import pprint
@@ -38,6 +39,7 @@ class PublishedPostsAPIViewTestCase(APITestCase):
 
     def setUp(self) -> None:
         """Run this setup before each test."""
+        cache.clear()
         self.url = "post/published/"
         self.view = PublishedPostsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -52,7 +54,10 @@ class PublishedPostsAPIViewTestCase(APITestCase):
                     "id": post.id, 
                     "title": post.title, 
                     "text": post.text,
+                    "text_html": post.text_html,
+                    "excerpt": post.excerpt,
                     "is_published": post.is_published(),
+                    "approved_comment_count": post.approved_comment_count,
                     }
                 posts_data.append(data)
 
@@ -66,7 +71,9 @@ class PublishedPostsAPIViewTestCase(APITestCase):
         posts_data = self.get_posts_data(posts)
         expected = {
             "data": posts_data,
-            "count": len(posts_data)
+            "count": len(posts_data),
+            "next": None,
+            "previous": None
         }
 
         published_posts_count = Post.objects.exclude(published_date=None).count()
@@ -91,6 +98,7 @@ class ApprovedCommentsAPIViewTestCase(TestCase):
     
     def setUp(self) -> None:
         """Run this setup before each test."""
+        cache.clear()
         self.url = "comments/approved/"
         self.view = ApprovedCommentsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -102,8 +110,11 @@ class ApprovedCommentsAPIViewTestCase(TestCase):
             "id": post.id, 
             "title": post.title, 
             "text": post.text, 
+            "text_html": post.text_html,
+            "excerpt": post.excerpt,
             "author": post.author.id,
-            "is_published": post.is_published()
+            "is_published": post.is_published(),
+            "approved_comment_count": post.approved_comment_count
             }
         return data
     
@@ -160,6 +171,7 @@ class UnpublishedPostsAPIViewTestCase(TestCase):
     
     def setUp(self) -> None:
         """Run one time class setup initialization."""
+        cache.clear()
         self.url = "post/unpublished/"
         self.view = UnpublishedPostsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -174,7 +186,10 @@ class UnpublishedPostsAPIViewTestCase(TestCase):
                     "id": post.id, 
                     "title": post.title, 
                     "text": post.text,
+                    "text_html": post.text_html,
+                    "excerpt": post.excerpt,
                     "is_published": post.is_published(),
+                    "approved_comment_count": post.approved_comment_count,
                     }
                 posts_data.append(data)
 
@@ -190,7 +205,9 @@ class UnpublishedPostsAPIViewTestCase(TestCase):
         posts_data = self.get_posts_data(posts)
         expected = {
             "data": posts_data,
-            "count": len(posts_data)
+            "count": len(posts_data),
+            "next": None,
+            "previous": None
         }
         
         unpublished_posts_count = Post.objects.filter(published_date = None).count()
@@ -216,6 +233,7 @@ class PostAPIViewTestCase(TestCase):
     
     def setUp(self) -> None:
         """Run one time class setup initialization."""
+        cache.clear()
         self.url = "post/", "posts/<int:post_id>/"
         self.view = PostAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -229,7 +247,10 @@ class PostAPIViewTestCase(TestCase):
                 "id": post.id, 
                 "title": post.title, 
                 "text": post.text,
+                "text_html": post.text_html,
+                "excerpt": post.excerpt,
                 "is_published": post.is_published(),
+                "approved_comment_count": post.approved_comment_count,
                 }
             posts_data.append(data)
 
@@ -242,8 +263,11 @@ class PostAPIViewTestCase(TestCase):
             "id": post.id, 
             "title": post.title, 
             "text": post.text, 
+            "text_html": post.text_html,
+            "excerpt": post.excerpt,
             "author": post.author.id,
-            "is_published": post.is_published()
+            "is_published": post.is_published(),
+            "approved_comment_count": post.approved_comment_count
             }
         return data
     
@@ -560,6 +584,7 @@ class ListAPIViewTestCase(TestCase):
         return super().setUpClass()
     
     def setUp(self) -> None:
+        cache.clear()
         self.url = "post/list/"
         self.view = ListAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -586,6 +611,7 @@ class CommentAPIViewTestCase(TestCase):
         return super().setUpClass()
     
     def setUp(self) -> None:
+        cache.clear()
         self.url = "comments/<int:comment_id>/"
         self.view = CommentAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -599,7 +625,10 @@ class CommentAPIViewTestCase(TestCase):
                 "id": post.id, 
                 "title": post.title, 
                 "text": post.text,
+                "text_html": post.text_html,
+                "excerpt": post.excerpt,
                 "is_published": post.is_published(),
+                "approved_comment_count": post.approved_comment_count,
                 }
             posts_data.append(data)
 
@@ -699,6 +728,7 @@ class CommentsAPIViewTestCase(TestCase):
         return super().setUpClass()
     
     def setUp(self) -> None:
+        cache.clear()
         self.url = "comment/new/"
         self.view = CommentsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -712,7 +742,10 @@ class CommentsAPIViewTestCase(TestCase):
                 "id": post.id, 
                 "title": post.title, 
                 "text": post.text,
+                "text_html": post.text_html,
+                "excerpt": post.excerpt,
                 "is_published": post.is_published(),
+                "approved_comment_count": post.approved_comment_count,
                 }
             posts_data.append(data)
 
@@ -725,8 +758,11 @@ class CommentsAPIViewTestCase(TestCase):
             "id": post.id, 
             "title": post.title, 
             "text": post.text, 
+            "text_html": post.text_html,
+            "excerpt": post.excerpt,
             "author": post.author.id,
-            "is_published": post.is_published()
+            "is_published": post.is_published(),
+            "approved_comment_count": post.approved_comment_count
             }
         return data
     
@@ -844,6 +880,7 @@ class PostCommentsAPIViewTestCase(TestCase):
         return super().setUpClass()
 
     def setUp(self) -> None:
+        cache.clear()
         self.url = "post/<int:post_id>/comments/"
         self.view =  PostCommentsAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -858,7 +895,10 @@ class PostCommentsAPIViewTestCase(TestCase):
                     "id": post.id, 
                     "title": post.title, 
                     "text": post.text,
+                    "text_html": post.text_html,
+                    "excerpt": post.excerpt,
                     "is_published": post.is_published(),
+                    "approved_comment_count": post.approved_comment_count,
                     }
                 posts_data.append(data)
 
@@ -871,8 +911,11 @@ class PostCommentsAPIViewTestCase(TestCase):
             "id": post.id, 
             "title": post.title, 
             "text": post.text, 
+            "text_html": post.text_html,
+            "excerpt": post.excerpt,
             "author": post.author.id,
-            "is_published": post.is_published()
+            "is_published": post.is_published(),
+            "approved_comment_count": post.approved_comment_count
             }
         return data
 
@@ -960,6 +1003,7 @@ class ApprovingCommentAPIViewTestCase(TestCase):
         return super().setUpClass()
     
     def setUp(self) -> None:
+        cache.clear()
         self.url = "approve/comment/<int:comment_id>/"
         self.request_factory = APIRequestFactory()
         self.view = ApprovingCommentAPIView.as_view()
@@ -1043,6 +1087,7 @@ class PostPublishingAPIViewTestCase(TestCase):
         return super().setUpClass()
     
     def setUp(self) -> None:
+        cache.clear()
         self.url = "post/publish/<int:post_id>/"
         self.view = PostPublishingAPIView.as_view()
         self.request_factory = APIRequestFactory()
@@ -1089,6 +1134,7 @@ class CustomAuthTokenTestCase(TestCase):
         return super().setUpClass()
     
     def setUp(self) -> None:
+        cache.clear()
         self.url = 'api-token-auth/'
         self.view =  CustomAuthToken.as_view()
         self.request_factory = APIRequestFactory()
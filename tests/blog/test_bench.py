@@ -0,0 +1,28 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from blog.management.commands.bench_blog import scenarios
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class BenchBlogTestCase(TestCase):
+    """bench_blog command smoke test case."""
+
+    def test_every_scenario_runs(self) -> None:
+        """Test that every scenario runs against a tiny data set and succeeds."""
+        stdout = StringIO()
+
+        call_command(
+            "bench_blog", "--no-test-database", users=2, posts=20, comments_per_post=2,
+            iterations=1, warmup=0, memory_iterations=1, stdout=stdout, stderr=StringIO(),
+        )
+
+        results = json.loads(stdout.getvalue())["results"]
+        for scenario in scenarios():
+            self.assertIn(scenario.name, results)
+        for name, result in results.items():
+            self.assertEqual(sum(result["statuses"].values()), 1, name)
+            self.assertTrue(all(int(status) < 400 for status in result["statuses"]), (name, result["statuses"]))
@@ -0,0 +1,89 @@
+import threading
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache as django_cache
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog import cache
+from blog.api.views import PostAPIView, PublishedPostsAPIView
+from blog.models import Post, Comment
+
+
+class BlogCacheTestCase(TestCase):
+    """Blog payload cache test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        django_cache.clear()
+        cache.reset_stats()
+        self.request_factory = APIRequestFactory()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(author=self.user, title="Test post", text="Test")
+
+    def get_post(self):
+        """GET the post through PostAPIView."""
+        request = self.request_factory.get("posts/%d/" % self.post.id)
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+        return PostAPIView.as_view()(request, post_id=self.post.id)
+
+    def test_second_read_is_a_hit(self) -> None:
+        """The second read of a post is served from the cache without queries."""
+        self.get_post()
+        with self.assertNumQueries(0):
+            response = self.get_post()
+
+        self.assertEqual(response.data["data"]["title"], "Test post")
+        self.assertEqual(cache.stats()["post"], {"miss": 1, "hit": 1})
+
+    def test_save_invalidates_post(self) -> None:
+        """Saving a post makes the next read see the change."""
+        self.get_post()
+        self.post.title = "Edited"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+
+        self.assertEqual(self.get_post().data["data"]["title"], "Edited")
+
+    def test_invalidation_waits_for_commit(self) -> None:
+        """Saving a post invalidates its cached payload only once the transaction commits."""
+        self.get_post()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post.title = "Edited"
+            self.post.save()
+            self.assertEqual(self.get_post().data["data"]["title"], "Test post")
+
+        self.assertEqual(self.get_post().data["data"]["title"], "Test post")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get_post().data["data"]["title"], "Edited")
+
+    def test_approve_invalidates_post_and_lists(self) -> None:
+        """Approving a comment refreshes the post's approved comment count."""
+        self.post.publish()
+        comment = Comment.objects.create(post=self.post, author="Test author", text="Test")
+        request = self.request_factory.get("post/published/")
+        PublishedPostsAPIView.as_view()(request)
+        self.get_post()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.approve()
+
+        self.assertEqual(self.get_post().data["data"]["approved_comment_count"], 1)
+        response = PublishedPostsAPIView.as_view()(request)
+        self.assertEqual(response.data["data"][0]["approved_comment_count"], 1)
+
+    def test_concurrent_miss_waits_for_single_flight(self) -> None:
+        """A miss while another caller holds the recompute lock waits for its value."""
+        key = "blog:test"
+        django_cache.add(key + ":lock", 1)
+        timer = threading.Timer(0.05, lambda: django_cache.set(key, "computed"))
+        timer.start()
+
+        value = cache.get_or_set(key, lambda: self.fail("should not recompute"), namespace="test")
+        timer.join()
+
+        self.assertEqual(value, "computed")
+        self.assertEqual(cache.stats()["test"], {"miss": 1, "coalesced": 1})
@@ -0,0 +1,94 @@
+import gzip
+import unittest
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog.compression import accepted_encoding, brotli
+from blog.models import Post
+
+
+class AcceptedEncodingTestCase(SimpleTestCase):
+    """Accept-Encoding negotiation test case."""
+
+    def test_accepted_encoding(self) -> None:
+        """Test that the preferred encoding the header allows is picked."""
+        self.assertEqual(accepted_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(accepted_encoding("br;q=0, gzip;q=0.5"), "gzip")
+        self.assertIsNone(accepted_encoding(""))
+        self.assertIsNone(accepted_encoding("identity"))
+        self.assertIsNone(accepted_encoding("gzip;q=0, br;q=0"))
+        self.assertEqual(accepted_encoding("*"), "br" if brotli else "gzip")
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class CompressionMiddlewareTestCase(TestCase):
+    """Response compression test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.posts = [
+            Post.objects.create(author=self.user, title="Post %d" % number, text="Some text " * 50,
+                                published_date=timezone.now())
+            for number in range(5)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_html_is_compressed(self) -> None:
+        """Test that pages are gzip compressed for clients that accept it."""
+        plain = self.client.get("/")
+        response = self.client.get("/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    @unittest.skipUnless(brotli, "Brotli is not installed")
+    def test_brotli_is_preferred(self) -> None:
+        """Test that brotli is used when the client accepts both encodings."""
+        plain = self.api.get("/post/list/")
+        response = self.api.get("/post/list/", HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    @override_settings(BLOG_COMPRESSION_MIN_SIZE=1024 * 1024)
+    def test_small_responses_are_not_compressed(self) -> None:
+        """Test that responses under BLOG_COMPRESSION_MIN_SIZE are sent as they are."""
+        response = self.api.get("/post/list/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_compressed_formats_are_left_alone(self) -> None:
+        """Test that responses which are compressed already are not compressed again."""
+        response = self.api.get("/post/list/", HTTP_ACCEPT="application/x-json-gzip", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_etag_revalidation(self) -> None:
+        """Test that the weakened ETag of a compressed response still gets a 304."""
+        url = "/posts/%d/" % self.posts[0].pk
+        response = self.api.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+
+        response = self.api.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_is_compressed(self) -> None:
+        """Test that streaming exports are compressed as they are sent."""
+        plain = b"".join(self.api.get("/export/posts/").streaming_content)
+        response = self.api.get("/export/posts/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response)
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
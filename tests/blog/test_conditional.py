@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog import cache as blog_cache
+from blog.models import Post, Comment
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ConditionalGetTestCase(TestCase):
+    """ETag / Last-Modified test case for the blog and API views."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(author=self.user, title="Test post", text="Test")
+        self.post.publish()
+        Comment.objects.create(post=self.post, author="Test author", text="Test", approved_comment=True)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_api_revalidation_returns_304_without_queries(self) -> None:
+        """A matching If-None-Match is answered with 304 and no database access."""
+        response = self.client.get("/comments/approved/")
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            revalidated = self.client.get("/comments/approved/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertFalse(etag.startswith("W/"))
+
+    def test_api_etag_changes_after_approval(self) -> None:
+        """Approving a comment changes the comment list validator."""
+        etag = self.client.get("/comments/approved/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author="Test author", text="Test").approve()
+
+        response = self.client.get("/comments/approved/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_api_if_modified_since_returns_304(self) -> None:
+        """The list Last-Modified header can be used for revalidation."""
+        response = self.client.get("/comments/approved/")
+
+        revalidated = self.client.get("/comments/approved/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_post_detail_revalidation_skips_rendering(self) -> None:
+        """post_detail answers a matching If-None-Match before rendering."""
+        response = self.client.get("/post/%d/" % self.post.id)
+
+        with self.assertTemplateNotUsed("blog/post_detail.html"):
+            revalidated = self.client.get("/post/%d/" % self.post.id, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_post_detail_etag_differs_per_user(self) -> None:
+        """Logged in users get a different validator than anonymous visitors."""
+        anonymous = self.client.get("/post/%d/" % self.post.id)["ETag"]
+        self.client.force_login(self.user)
+
+        response = self.client.get("/post/%d/" % self.post.id, HTTP_IF_NONE_MATCH=anonymous)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], anonymous)
+
+    def test_stamps_expire_and_reload_from_the_database(self) -> None:
+        """A change no bump announced, e.g. in another process, shows once the stamps expire."""
+        url = "/posts/%d/" % self.post.id
+        etag = self.api.get(url)["ETag"]
+        Post.objects.filter(pk=self.post.pk).update(title="Changed elsewhere", updated_at=timezone.now())
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        expire_stamps("post:%s" % self.post.pk)
+        response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["title"], "Changed elsewhere")
+
+    def test_etags_survive_stamp_reloads(self) -> None:
+        """Unchanged data keeps its ETag when the stamps reload, e.g. in another process."""
+        for url in ("/posts/%d/" % self.post.id, "/post/%d/comments/" % self.post.id, "/post/published/"):
+            etag = self.api.get(url)["ETag"]
+            cache.clear()
+
+            self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304, url)
+
+    def test_deletion_changes_the_list_etag(self) -> None:
+        """Deleting a comment that is not the latest one still changes the list validator."""
+        first = Comment.objects.get()
+        Comment.objects.create(post=self.post, author="Test author", text="Later", approved_comment=True)
+        etag = self.client.get("/comments/approved/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+
+        self.assertEqual(self.client.get("/comments/approved/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_scheduled_post_changes_the_list_etag(self) -> None:
+        """A post whose publication date comes changes the list validator once the stamp reloads."""
+        Post.objects.create(author=self.user, title="Scheduled", text="Test",
+                            published_date=timezone.now() + timedelta(seconds=1))
+        etag = self.client.get("/")["ETag"]
+        Post.objects.filter(title="Scheduled").update(published_date=timezone.now())
+        self.assertEqual(self.client.get("/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        expire_stamps("list:%s" % blog_cache.POSTS)
+        response = self.client.get("/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Scheduled")
+
+    def test_missing_ids_are_not_stamped(self) -> None:
+        """Stamps of ids that do not exist are not stored, so they never validate."""
+        response = self.api.get("/posts/999999/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get("blog:modified:post:999999"))
+        self.assertEqual(self.api.get("/posts/999999/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 404)
+
+
+def expire_stamps(name) -> None:
+    """Drop a stamp as its timeout would."""
+    cache.delete_many(["blog:version:%s" % name, "blog:modified:%s" % name])
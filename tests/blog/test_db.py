@@ -0,0 +1,130 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth.models import User
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog import db
+from blog.api.views import DatabasePoolsAPIView
+
+
+class FakeConnection:
+    """Stand-in for a DB-API connection."""
+
+    def __init__(self) -> None:
+        self.closed = False
+        self.broken = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """Connection pool test case."""
+
+    def make_pool(self, **kwargs) -> db.ConnectionPool:
+        """Return a pool of fake connections."""
+        return db.ConnectionPool(FakeConnection, **kwargs)
+
+    def test_connections_are_reused(self) -> None:
+        """A returned connection is handed out again instead of opening a new one."""
+
+        pool = self.make_pool()
+        first = pool.checkout()
+        pool.checkin(first)
+
+        self.assertIs(pool.checkout(), first)
+        self.assertEqual(pool.stats()["connections_opened"], 1)
+        self.assertEqual(pool.stats()["checkouts"], 2)
+
+    def test_checkout_waits_for_a_free_connection(self) -> None:
+        """With every connection in use, checkout blocks until one is returned."""
+
+        pool = self.make_pool(max_size=1)
+        held = pool.checkout()
+        threading.Timer(0.05, pool.checkin, [held]).start()
+
+        self.assertIs(pool.checkout(), held)
+        stats = pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreaterEqual(stats["wait_seconds_max"], 0.04)
+        self.assertGreaterEqual(stats["checkout_seconds_max"], 0.04)
+
+    def test_checkout_times_out(self) -> None:
+        """Waiting longer than the timeout raises PoolTimeout."""
+
+        pool = self.make_pool(max_size=1, timeout=0.01)
+        pool.checkout()
+
+        with self.assertRaises(db.PoolTimeout):
+            pool.checkout()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_broken_connections_are_discarded(self) -> None:
+        """Connections failing the check or the reset are closed and replaced."""
+
+        pool = self.make_pool(
+            max_size=1,
+            check=lambda connection: not connection.broken,
+            reset=lambda connection: not connection.closed,
+        )
+        first = pool.checkout()
+        pool.checkin(first)
+        first.broken = True
+
+        second = pool.checkout()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+
+        second.close()
+        pool.checkin(second)
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertEqual(pool.stats()["connections_discarded"], 2)
+
+    def test_failed_connect_frees_its_slot(self) -> None:
+        """A connection error does not leak pool capacity."""
+
+        pool = db.ConnectionPool(mock.Mock(side_effect=OSError), max_size=1)
+
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                pool.checkout()
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+class ConnectionSettingsTestCase(TestCase):
+    """Connection health check and SQLite pragma test case."""
+
+    def test_sqlite_pragmas_are_applied(self) -> None:
+        """New SQLite connections get the configured pragmas."""
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_unusable_connections_are_closed_at_request_start(self) -> None:
+        """A persistent connection that fails its health check is closed."""
+
+        connection.ensure_connection()
+        with mock.patch.dict(connection.settings_dict, CONN_HEALTH_CHECKS=True), \
+                mock.patch.object(connection, "is_usable", return_value=False), \
+                mock.patch.object(connection, "close") as close:
+            db.check_connections(sender=self.__class__)
+
+        close.assert_called_once_with()
+
+    def test_pool_metrics_endpoint_is_admin_only(self) -> None:
+        """Pool metrics are served to staff users only."""
+
+        user = User.objects.create(username="testuser")
+        request = APIRequestFactory().get("db/pools/")
+        force_authenticate(request, user=user, token=user.auth_token)
+        self.assertEqual(DatabasePoolsAPIView.as_view()(request).status_code, 403)
+
+        user.is_staff = True
+        with mock.patch.dict(db.pools, {"default": db.ConnectionPool(FakeConnection)}):
+            response = DatabasePoolsAPIView.as_view()(request)
+        self.assertEqual(response.data["data"]["default"]["size"], 0)
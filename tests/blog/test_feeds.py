@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog import bulk
+from blog.models import Post, Comment
+
+
+@override_settings(BLOG_FEED_ITEMS=2)
+class FeedTestCase(TestCase):
+    """Cached posts and comments feeds test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        now = timezone.now()
+        self.old = Post.objects.create(author=self.user, title="Old post", text="Old text",
+                                       published_date=now - timedelta(days=2))
+        self.post = Post.objects.create(author=self.user, title="Recent post", text="Recent text",
+                                        published_date=now - timedelta(days=1))
+        self.draft = Post.objects.create(author=self.user, title="Draft post", text="Draft text")
+
+    def test_rss_feed(self) -> None:
+        """Test that the RSS feed lists published posts with their excerpts."""
+        response = self.client.get("/feed/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("application/rss+xml"))
+        self.assertContains(response, "Recent post")
+        self.assertContains(response, "http://testserver/post/%d/" % self.post.pk)
+        self.assertNotContains(response, "Draft post")
+
+    def test_atom_feed(self) -> None:
+        """Test that the Atom feed lists the same posts."""
+        response = self.client.get("/feed/atom/")
+
+        self.assertTrue(response["Content-Type"].startswith("application/atom+xml"))
+        self.assertContains(response, "Old post")
+        self.assertContains(response, "<author><name>testuser</name></author>", html=False)
+
+    def test_feed_is_served_from_cache(self) -> None:
+        """Test that a repeated poll does not touch the database."""
+        first = self.client.get("/feed/")
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/feed/")
+
+        self.assertEqual(first.content, second.content)
+
+    def test_not_modified(self) -> None:
+        """Test that a poll with a matching ETag gets a 304."""
+        etag = self.client.get("/feed/")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_feed_survives_stamp_reloads(self) -> None:
+        """Test that a reloaded stamp finds the cached feed and keeps its ETag."""
+        first = self.client.get("/feed/")
+        cache.delete_many(["blog:version:feed", "blog:modified:feed"])
+
+        # The validator is reloaded; the feed is not rebuilt.
+        with self.assertNumQueries(1):
+            second = self.client.get("/feed/")
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_changes_outside_the_window_keep_the_feed(self) -> None:
+        """Test that comments, drafts and posts older than the window do not rebuild the feed."""
+        etag = self.client.get("/feed/")["ETag"]
+        newer = Post.objects.create(author=self.user, title="Newer post", text="Newer text",
+                                    published_date=timezone.now())
+        etag = self.client.get("/feed/")["ETag"]
+
+        Comment.objects.create(post=newer, author="reader", text="Remark", approved_comment=True)
+        self.draft.text = "Edited draft"
+        self.draft.save()
+        self.old.title = "Edited old post"
+        self.old.save()
+
+        self.assertEqual(self.client.get("/feed/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_changes_inside_the_window_rebuild_the_feed(self) -> None:
+        """Test that publishing and editing posts in the window show up in the feed."""
+        self.client.get("/feed/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.publish()
+        self.assertContains(self.client.get("/feed/"), "Draft post")
+
+        self.draft.title = "Edited post"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.save()
+        self.assertContains(self.client.get("/feed/"), "Edited post")
+
+        bulk.set_published([self.draft.pk], False)
+        self.assertNotContains(self.client.get("/feed/"), "Edited post")
+
+    def test_comments_feed(self) -> None:
+        """Test that the comments feed of a post lists its approved comments."""
+        comment = Comment.objects.create(post=self.post, author="reader", text="Pending remark")
+        self.assertNotContains(self.client.get("/post/%d/comments/feed/" % self.post.pk), "Pending remark")
+
+        comment.approve()
+        response = self.client.get("/post/%d/comments/feed/atom/" % self.post.pk)
+
+        self.assertContains(response, "Pending remark")
+        self.assertContains(response, "/post/%d/#comment-%d" % (self.post.pk, comment.pk))
+
+    def test_comments_feed_of_draft(self) -> None:
+        """Test that drafts have no comments feed."""
+        response = self.client.get("/post/%d/comments/feed/" % self.draft.pk)
+
+        self.assertEqual(response.status_code, 404)
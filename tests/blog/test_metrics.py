@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog import metrics
+from blog.models import Post
+
+
+@override_settings(
+    BLOG_METRICS_SAMPLE_RATE=1.0,
+    BLOG_METRICS_TOKEN="secret",
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class MetricsTestCase(TestCase):
+    """Request metrics test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        metrics.reset()
+        self.user = User.objects.create(username="testuser")
+        Post.objects.create(author=self.user, title="Post", text="Test", published_date=timezone.now())
+
+    def get_timings(self, response) -> dict:
+        """Parse the Server-Timing header into {name: milliseconds}."""
+        timings = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, duration = entry.split(";")[:2]
+            timings[name] = float(duration[len("dur="):])
+        return timings
+
+    def test_api_request_records_queries_and_serialization(self) -> None:
+        """API responses report database and serialization time."""
+
+        response = self.client.get("/post/published/", HTTP_ACCEPT="application/json")
+
+        timings = self.get_timings(response)
+        self.assertGreater(timings["db"], 0)
+        self.assertGreater(timings["serialize"], 0)
+        self.assertEqual(timings["template"], 0)
+        self.assertIn("queries", response["Server-Timing"])
+        self.assertIn('blog_db_queries_count{route="post/published/",method="GET"} 1', metrics.render_prometheus())
+
+    def test_page_request_records_template_time(self) -> None:
+        """HTML pages report template render time under their URL name."""
+
+        response = self.client.get("/")
+
+        self.assertGreater(self.get_timings(response)["template"], 0)
+        self.assertIn('blog_template_duration_seconds_count{route="post_list",method="GET"} 1', metrics.render_prometheus())
+
+    def test_unsampled_requests_are_not_recorded(self) -> None:
+        """With a sample rate of zero nothing is timed."""
+
+        with self.settings(BLOG_METRICS_SAMPLE_RATE=0):
+            response = self.client.get("/")
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn('route="post_list"', metrics.render_prometheus())
+
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        """Bucket counts include every smaller bucket, ending with +Inf."""
+
+        metrics.observe("db_queries", "test", "GET", 2)
+        metrics.observe("db_queries", "test", "GET", 1000)
+
+        text = metrics.render_prometheus()
+        self.assertIn('blog_db_queries_bucket{route="test",method="GET",le="1"} 0', text)
+        self.assertIn('blog_db_queries_bucket{route="test",method="GET",le="2"} 1', text)
+        self.assertIn('blog_db_queries_bucket{route="test",method="GET",le="500"} 1', text)
+        self.assertIn('blog_db_queries_bucket{route="test",method="GET",le="+Inf"} 2', text)
+        self.assertIn('blog_db_queries_sum{route="test",method="GET"} 1002', text)
+
+    def test_pool_metrics_are_typed(self) -> None:
+        """Pool statistics are grouped per metric under a counter or gauge TYPE line."""
+
+        stats = {"default": {"checkouts": 3, "idle": 1}, "replica": {"checkouts": 5, "idle": 2}}
+        with mock.patch("blog.metrics.pool_stats", return_value=stats):
+            text = metrics.render_prometheus()
+
+        self.assertIn(
+            '# TYPE blog_db_pool_checkouts counter\n'
+            'blog_db_pool_checkouts{alias="default"} 3\n'
+            'blog_db_pool_checkouts{alias="replica"} 5\n',
+            text,
+        )
+        self.assertIn(
+            '# TYPE blog_db_pool_idle gauge\n'
+            'blog_db_pool_idle{alias="default"} 1\n'
+            'blog_db_pool_idle{alias="replica"} 2\n',
+            text,
+        )
+
+    def test_metrics_endpoint_requires_staff_or_token(self) -> None:
+        """The Prometheus endpoint is not public."""
+
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        self.assertEqual(self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE blog_request_duration_seconds histogram", response.content.decode())
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/metrics/").status_code, 200)
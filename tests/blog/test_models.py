@@ -1,6 +1,11 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.utils import timezone
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 
 from blog.models import Post, Comment
@@ -48,7 +53,41 @@ class PostModelTestCase(TestCase):
 
         self.assertEqual(post.__str__(), expected)
         self.assertEqual(str(post), expected)
-        
+
+
+class PostRenderedTextTestCase(TestCase):
+    """Post.text_html and Post.excerpt test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(author=self.user, title="Test", text="<b>Line one</b>\nLine two")
+
+    def test_save_renders_text(self) -> None:
+        """Test that saving a post renders the escaped text and the excerpt."""
+        self.assertEqual(self.post.text_html, "&lt;b&gt;Line one&lt;/b&gt;<br>Line two")
+        self.assertEqual(self.post.excerpt, "<b>Line one</b> Line two")
+
+    def test_update_fields_include_rendered_text(self) -> None:
+        """Test that saving only the text keeps the rendered fields in step."""
+        self.post.text = " ".join(["word"] * 60)
+        self.post.save(update_fields=["text"])
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.text_html, self.post.text)
+        self.assertEqual(self.post.excerpt, " ".join(["word"] * 50) + "…")
+
+    def test_backfill_command(self) -> None:
+        """Test that the backfill command renders rows saved without the rendered fields."""
+        Post.objects.filter(pk=self.post.pk).update(text_html="", excerpt="")
+        self.assertEqual(Post.objects.get(pk=self.post.pk).body_html, self.post.text_html)
+        out = StringIO()
+
+        call_command("backfill_post_html", stdout=out)
+
+        self.assertEqual(Post.objects.get(pk=self.post.pk).text_html, self.post.text_html)
+        self.assertIn("1 posts", out.getvalue())
+
 
 class CommentModelTestCase(TestCase):
     """Comment model test case."""
@@ -103,4 +142,102 @@ class CommentModelTestCase(TestCase):
         
     def test_approved_comments_method(self) -> None:
         """Test approved_comments method"""
-        pass
\ No newline at end of file
+        pass
+
+class ApprovedCommentCountTestCase(TestCase):
+    """Post.approved_comment_count maintenance test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(
+            author=self.user,
+            title="Test post",
+            text="Test",
+        )
+        self.comment = Comment.objects.create(
+            author="Test author",
+            post=self.post,
+            text="Test comment",
+        )
+
+    def get_count(self) -> int:
+        """Return the stored approved comment count of the post."""
+        return Post.objects.get(pk=self.post.pk).approved_comment_count
+
+    def test_new_post_has_no_approved_comments(self) -> None:
+        """A new post starts with a zero count."""
+        self.assertEqual(self.get_count(), 0)
+
+    def test_approve_increments_count_once(self) -> None:
+        """Approving a comment increments the count, re-approving does not."""
+        self.comment.approve()
+        self.comment.approve()
+        Comment.objects.get(pk=self.comment.pk).approve()
+
+        self.assertEqual(self.get_count(), 1)
+
+    def test_creating_approved_comment_increments_count(self) -> None:
+        """A comment created already approved is counted."""
+        Comment.objects.create(author="Test author", post=self.post, text="Test", approved_comment=True)
+
+        self.assertEqual(self.get_count(), 1)
+
+    def test_delete_decrements_count(self) -> None:
+        """Deleting an approved comment decrements the count."""
+        self.comment.approve()
+        Comment.objects.get(pk=self.comment.pk).delete()
+
+        self.assertEqual(self.get_count(), 0)
+
+    def test_queryset_delete_decrements_count(self) -> None:
+        """Deleting approved comments through a queryset, as the admin does, decrements the count."""
+        self.comment.approve()
+
+        deleted = Comment.objects.filter(post=self.post).delete()
+
+        self.assertEqual(deleted, (1, {"blog.Comment": 1}))
+        self.assertEqual(self.get_count(), 0)
+
+    def test_moving_a_comment_moves_its_count(self) -> None:
+        """Moving an approved comment to another post decrements the old post and increments the new one."""
+        self.comment.approve()
+        other = Post.objects.create(author=self.user, title="Other post", text="Test")
+
+        comment = Comment.objects.get(pk=self.comment.pk)
+        comment.post = other
+        comment.save()
+
+        self.assertEqual(self.get_count(), 0)
+        self.assertEqual(Post.objects.get(pk=other.pk).approved_comment_count, 1)
+
+    def test_post_delete_removes_comments_in_one_query(self) -> None:
+        """Deleting a post does not load or signal its comments one by one."""
+        for _ in range(5):
+            Comment.objects.create(author="Test author", post=self.post, text="Test", approved_comment=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.post.delete()
+
+        comment_queries = [query["sql"] for query in queries if '"blog_comment"' in query["sql"]]
+        self.assertEqual(len([sql for sql in comment_queries if sql.startswith("DELETE")]), 1)
+        self.assertEqual(len(comment_queries), 2)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_recount_command_repairs_drift(self) -> None:
+        """The recount command rebuilds counts from the comments table."""
+        self.comment.approve()
+        Post.objects.update(approved_comment_count=7)
+
+        call_command("recount_approved_comments", stdout=StringIO())
+
+        self.assertEqual(self.get_count(), 1)
+
+    def test_recount_command_chunks_drifted_ids(self) -> None:
+        """A batch with more drifted posts than SQLite allows parameters is repaired."""
+        Post.objects.bulk_create([Post(author=self.user, title="Post", text="Test") for _ in range(1000)])
+        Post.objects.update(approved_comment_count=3)
+
+        call_command("recount_approved_comments", stdout=StringIO())
+
+        self.assertFalse(Post.objects.exclude(approved_comment_count=0).exists())
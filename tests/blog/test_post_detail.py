@@ -0,0 +1,71 @@
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+
+from blog.models import Post, Comment
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PostDetailThreadTestCase(TestCase):
+    """Cached comment thread fragment test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.post = Post.objects.create(author=self.user, title="Test post", text="Test")
+        self.post.publish()
+        self.approved = Comment.objects.create(post=self.post, author="reader", text="Approved remark",
+                                               approved_comment=True)
+        self.pending = Comment.objects.create(post=self.post, author="reader", text="Pending remark")
+        self.url = "/post/%d/" % self.post.pk
+
+    def test_anonymous_thread_loads_approved_comments_only(self) -> None:
+        """Test that anonymous visitors neither see nor load pending comments."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        comment_queries = [query["sql"] for query in queries if 'FROM "blog_comment"' in query["sql"]
+                           and "MAX" not in query["sql"]]
+        self.assertEqual(len(comment_queries), 1)
+        self.assertIn('"approved_comment"', comment_queries[0])
+        self.assertContains(response, "Approved remark")
+        self.assertNotContains(response, "Pending remark")
+
+    def test_cached_thread_runs_no_comment_query(self) -> None:
+        """Test that a repeated view renders the thread from the fragment cache."""
+        self.client.get(self.url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertFalse([query for query in queries if "blog_comment" in query["sql"]])
+        self.assertContains(response, "Approved remark")
+
+    def test_authenticated_variant(self) -> None:
+        """Test that logged in users get their own variant with pending comments."""
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertContains(response, "Pending remark")
+        self.assertContains(response, "/comment/%d/approve/" % self.pending.pk)
+
+    def test_thread_is_invalidated(self) -> None:
+        """Test that creating, approving and removing comments refreshes the fragment."""
+        self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, author="reader", text="Fresh remark", approved_comment=True)
+        self.assertContains(self.client.get(self.url), "Fresh remark")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending.approve()
+        self.assertContains(self.client.get(self.url), "Pending remark")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.approved.delete()
+        self.assertNotContains(self.client.get(self.url), "Approved remark")
@@ -0,0 +1,95 @@
+import base64
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.api.views import SearchPostsAPIView
+from blog.models import Post
+from blog.search import search_posts
+
+
+class SearchPostsTestCase(TestCase):
+    """Full-text search test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.user = User.objects.create(username="testuser")
+        self.title_match = Post.objects.create(
+            author=self.user, title="Django performance", text="Notes", published_date=timezone.now()
+        )
+        self.text_match = Post.objects.create(
+            author=self.user, title="Notes", text="Some words about django <b>templates</b>", published_date=timezone.now()
+        )
+        self.draft = Post.objects.create(author=self.user, title="Django draft", text="Draft")
+
+    def test_prefix_terms_match_and_title_ranks_first(self) -> None:
+        """Every term matches as a prefix and title matches rank higher."""
+        hits = search_posts("djan", published_only=True)
+
+        self.assertEqual([hit.id for hit in hits], [self.title_match.id, self.text_match.id])
+
+    def test_all_terms_are_required(self) -> None:
+        """A post must contain every term."""
+        hits = search_posts("django templ")
+
+        self.assertEqual([hit.id for hit in hits], [self.text_match.id])
+
+    def test_highlight_escapes_post_content(self) -> None:
+        """Highlights mark the terms and escape the rest of the text."""
+        hit = search_posts("templates")[0]
+
+        self.assertIn("&lt;b&gt;<mark>templates</mark>&lt;/b&gt;", hit.excerpt)
+
+    def test_index_follows_updates_and_deletes(self) -> None:
+        """The index is kept in sync when posts are edited or deleted."""
+        self.title_match.title = "Renamed"
+        self.title_match.save()
+        Post.objects.filter(pk=self.text_match.pk).delete()
+
+        self.assertEqual([hit.id for hit in search_posts("django")], [self.draft.id])
+        self.assertEqual(search_posts("renamed")[0].id, self.title_match.id)
+
+    def test_api_pages_with_cursor(self) -> None:
+        """The search API returns ranked pages linked by cursors."""
+        request_factory = APIRequestFactory()
+        view = SearchPostsAPIView.as_view()
+        ids = []
+        params = {"q": "django", "limit": 1}
+        while True:
+            request = request_factory.get("posts/search/", params)
+            force_authenticate(request, user=self.user, token=self.user.auth_token)
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(hit["id"] for hit in response.data["data"])
+            if response.data["next"] is None:
+                break
+            params["cursor"] = response.data["next"]
+
+        self.assertEqual(ids, [hit.id for hit in search_posts("django")])
+        self.assertEqual(len(ids), 3)
+
+    def test_api_refuses_cursor_without_numbers(self) -> None:
+        """A search cursor whose rank is not a number is refused."""
+        payload = json.dumps({"k": ["x", 1], "r": False}).encode()
+        request = APIRequestFactory().get("posts/search/", {
+            "q": "django", "cursor": base64.urlsafe_b64encode(payload).decode().rstrip("="),
+        })
+        force_authenticate(request, user=self.user, token=self.user.auth_token)
+
+        response = SearchPostsAPIView.as_view()(request)
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_search_page_lists_published_posts(self) -> None:
+        """The HTML search page only shows published posts."""
+        response = self.client.get("/search/", {"q": "django"})
+
+        self.assertEqual([hit.id for hit in response.context["hits"]], [self.title_match.id, self.text_match.id])
+        self.assertContains(response, "<mark>Django</mark> performance")
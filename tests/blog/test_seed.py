@@ -0,0 +1,75 @@
+import random
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Q
+from rest_framework.authtoken.models import Token
+
+from blog.models import Post, Comment
+from blog.search import search_posts
+from blog.seed import seed
+
+
+class SeedTestCase(TestCase):
+    """Synthetic data seeding test case."""
+
+    def test_counts_and_tokens(self) -> None:
+        """Test that every seeded user gets a token and the returned counts match the rows."""
+        counts = seed(users=5, posts=120, max_comments=10, batch_size=50, rng=random.Random(1))
+
+        self.assertEqual(counts["users"], 5)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Token.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), counts["comments"])
+
+    def test_approved_comment_count(self) -> None:
+        """Test that the denormalized approved comment counts match the comments."""
+        seed(users=3, posts=60, max_comments=8, batch_size=25, rng=random.Random(2))
+
+        mismatched = Post.objects.annotate(
+            approved=Count("post_comments", filter=Q(post_comments__approved_comment=True)),
+        ).exclude(approved_comment_count=F("approved"))
+        self.assertFalse(mismatched.exists())
+
+    def test_distributions(self) -> None:
+        """Test that comments per post and publishing follow the requested shape."""
+        seed(users=2, posts=400, max_comments=30, published_ratio=0.5, batch_size=400, rng=random.Random(3))
+
+        per_post = Counter(Post.objects.annotate(n=Count("post_comments")).values_list("n", flat=True))
+        # Zipf: posts without comments are the most common, long threads rare.
+        self.assertGreater(per_post[0], per_post[1])
+        self.assertGreater(per_post[1], per_post[10])
+        self.assertTrue(100 < Post.objects.filter(published_date__isnull=True).count() < 300)
+
+    def test_search_index_after_seed(self) -> None:
+        """Test that posts inserted with the triggers dropped are searchable."""
+        seed(users=1, posts=30, max_comments=0, batch_size=10, rng=random.Random(4))
+        word = Post.objects.first().title.split()[0]
+
+        self.assertTrue(search_posts(word))
+        Post.objects.create(author=User.objects.first(), title="zzquux", text="Test")
+        self.assertEqual(len(search_posts("zzquux")), 1)
+
+    def test_creates_after_seed(self) -> None:
+        """Test that ordinary creates after seeding get ids past the seeded ones."""
+        seed(users=2, posts=10, max_comments=3, batch_size=5, rng=random.Random(6))
+
+        user = User.objects.create(username="created")
+        post = Post.objects.create(author=user, title="Created", text="Test")
+        comment = Comment.objects.create(post=post, author="reader", text="Test")
+
+        self.assertEqual(post.pk, Post.objects.exclude(pk=post.pk).latest("pk").pk + 1)
+        self.assertTrue(Token.objects.filter(user=user).exists())
+        self.assertGreater(comment.pk, 0)
+
+    def test_command(self) -> None:
+        """Test the seed_blog management command."""
+        out = StringIO()
+        call_command("seed_blog", users=2, posts=20, max_comments=3, seed=5, stdout=out)
+
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertIn("Seeded 2 users, 20 posts", out.getvalue())
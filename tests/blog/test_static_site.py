@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+
+from blog import bulk, static_site
+from blog.models import Post, Comment
+
+
+class StaticSiteTestCase(TestCase):
+    """Static page generation test case."""
+
+    def setUp(self) -> None:
+        """Run this set up before each test."""
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(
+            BLOG_STATIC_SITE_ROOT=self.root,
+            BLOG_STATIC_SITE_BACKGROUND=False,
+            STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create(username="testuser")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(author=self.user, title="Static post", text="Test")
+            self.post.publish()
+
+    def read(self, path) -> str:
+        """Return the generated file of a page, or None."""
+        try:
+            with open(static_site.file_for(path), encoding="utf-8") as stream:
+                return stream.read()
+        except FileNotFoundError:
+            return None
+
+    def test_publish_writes_post_and_index(self) -> None:
+        """Test that publishing a post renders its page and the index."""
+        self.assertIn("Static post", self.read("/post/%d/" % self.post.pk))
+        self.assertIn("Static post", self.read("/"))
+
+    def test_draft_has_no_page(self) -> None:
+        """Test that drafts are not rendered, and unpublished posts lose their page."""
+        with self.captureOnCommitCallbacks(execute=True):
+            draft = Post.objects.create(author=self.user, title="Draft", text="Test")
+            bulk.set_published([self.post.pk], False)
+
+        self.assertIsNone(self.read("/post/%d/" % draft.pk))
+        self.assertIsNone(self.read("/post/%d/" % self.post.pk))
+        self.assertNotIn("Static post", self.read("/"))
+
+    def test_comment_approval_updates_post_page(self) -> None:
+        """Test that only approved comments reach the static page."""
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(post=self.post, author="reader", text="Pending remark")
+        self.assertNotIn("Pending remark", self.read("/post/%d/" % self.post.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.approve()
+
+        self.assertIn("Pending remark", self.read("/post/%d/" % self.post.pk))
+        self.assertIn("Comments: 1", self.read("/"))
+
+    def test_delete_removes_page(self) -> None:
+        """Test that deleting a post removes its page."""
+        path = "/post/%d/" % self.post.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+
+        self.assertIsNone(self.read(path))
+        self.assertFalse(os.path.exists(static_site.file_for(path) + ".gz"))
+
+    def test_anonymous_requests_get_the_file(self) -> None:
+        """Test that anonymous visitors are served the file without queries."""
+        with self.assertNumQueries(0):
+            response = self.client.get("/post/%d/" % self.post.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Static post", b"".join(response.streaming_content))
+        self.assertIn("Last-Modified", response)
+
+    def test_anonymous_requests_get_the_compressed_file(self) -> None:
+        """Test that clients accepting gzip are served the precompressed variant."""
+        response = self.client.get("/post/%d/" % self.post.pk, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        with open(static_site.file_for("/post/%d/" % self.post.pk) + ".gz", "rb") as stream:
+            self.assertEqual(b"".join(response.streaming_content), stream.read())
+
+    def test_authenticated_requests_are_rendered(self) -> None:
+        """Test that logged in users get the dynamic page."""
+        self.client.force_login(self.user)
+
+        response = self.client.get("/post/%d/" % self.post.pk)
+
+        self.assertFalse(response.streaming)
+        self.assertContains(response, "Static post")
+
+    def test_build_site(self) -> None:
+        """Test that a full build writes every page and drops stale ones."""
+        stale = os.path.join(self.root, "post", "999999")
+        os.makedirs(stale)
+        os.remove(static_site.file_for("/"))
+
+        call_command("build_site", workers=1, stdout=open(os.devnull, "w"))
+
+        self.assertIn("Static post", self.read("/"))
+        self.assertFalse(os.path.exists(stale))